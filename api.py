@@ -0,0 +1,245 @@
+# api.py
+"""API HTTP sem Streamlit: as mesmas respostas determinísticas de route_question para integrações de BI.
+
+O conjunto é carregado uma vez por processo (dados.obter_conjunto) e a versão dos dados é reconferida
+no máximo a cada `--intervalo-versao` segundos, sem reexecutar script, cabeçalho ou amostras.
+
+Rotas:
+    GET  /saude       versão dos dados, estatísticas do cache de respostas e do despacho ao modelo
+    GET  /kpis        indicadores do cabeçalho do app
+    GET  /metricas    instrumentação no formato texto do Prometheus (/metricas.json: o mesmo em JSON)
+    GET  /perfil      texto do último cProfile (POST /perfilar arma o cProfile para a próxima requisição)
+    POST /perguntar   {"pergunta": "...", "explicar": false, "modelo": "..."}
+    POST /lote        {"perguntas": ["...", "..."]}  (uma varredura compartilhada entre as perguntas)
+
+Uso:
+    python api.py --porta 8000 --instrumentacao
+    curl -s localhost:8000/perguntar -d '{"pergunta": "qual o ticket médio?"}'
+"""
+import argparse
+import json
+import math
+import os
+import socket
+import threading
+import time
+from dataclasses import asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from consultas import CACHE_RESPOSTAS, route_question, route_questions
+from cubos import obter_cubos
+from dados import PASTA_DADOS, obter_conjunto
+from metricas import kpis, obter_agregados
+import instrumentacao
+
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+MODELO_PADRAO = os.getenv("OPENROUTER_MODEL", "mistralai/mistral-7b-instruct")
+MAX_PERGUNTAS_LOTE = 1000
+MAX_CORPO = 1 << 20
+
+
+def para_json(valor):
+    """Resultado das consultas -> tipos JSON (DataFrame vira lista de registros; NaN vira null)."""
+    if isinstance(valor, pd.DataFrame):
+        # coluna a coluna com tolist(): bem mais barato que to_dict(orient="records") em tabelas pequenas
+        colunas = [str(c) for c in valor.columns]
+        linhas = zip(*(valor.iloc[:, i].tolist() for i in range(valor.shape[1])))
+        return [dict(zip(colunas, map(para_json, linha))) for linha in linhas]
+    if isinstance(valor, pd.Series):
+        return para_json(valor.to_dict())
+    if isinstance(valor, dict):
+        return {str(k): para_json(v) for k, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [para_json(v) for v in valor]
+    if isinstance(valor, np.generic):
+        valor = valor.item()
+    if valor is pd.NA or (isinstance(valor, float) and math.isnan(valor)):
+        return None
+    return valor
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # cabeçalho e corpo saem em escritas separadas: sem NODELAY o ACK atrasado custa ~40 ms por resposta
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, *args):
+        pass
+
+    def _responder(self, status: int, corpo):
+        dados = json.dumps(para_json(corpo), ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _responder_texto(self, status: int, texto: str, tipo: str = "text/plain; version=0.0.4"):
+        dados = texto.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{tipo}; charset=utf-8")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _ler_corpo(self) -> dict:
+        tamanho = int(self.headers.get("Content-Length", 0))
+        if tamanho > MAX_CORPO:
+            raise ValueError("corpo da requisição grande demais")
+        corpo = json.loads(self.rfile.read(tamanho) or b"{}")
+        if not isinstance(corpo, dict):
+            raise ValueError("o corpo deve ser um objeto JSON")
+        return corpo
+
+    def do_GET(self):
+        self._tratar(self._get)
+
+    def do_POST(self):
+        self._tratar(self._post)
+
+    def _tratar(self, metodo):
+        try:
+            rota = self.path.split("?")[0].rstrip("/")
+            with instrumentacao.perfil(f"{self.command} {rota}"):
+                metodo(rota)
+        except Exception as e:
+            self._responder(500, {"erro": f"{type(e).__name__}: {e}"})
+
+    def _get(self, rota: str):
+        if rota == "/metricas":
+            self._responder_texto(200, instrumentacao.exportar_prometheus())
+            return
+        if rota == "/metricas.json":
+            self._responder(200, {"ativa": instrumentacao.ativo, **instrumentacao.resumo()})
+            return
+        if rota == "/perfil":
+            perfil = instrumentacao.ultimo_perfil
+            self._responder_texto(200, perfil["texto"] if perfil else "sem perfil gravado\n", "text/plain")
+            return
+        conjunto = self.server.conjunto()
+        if rota == "/saude":
+            from llm import obter_despacho
+
+            self._responder(
+                200,
+                {
+                    "versao": conjunto.versao,
+                    "cache_respostas": CACHE_RESPOSTAS.estatisticas(),
+                    "despacho_llm": obter_despacho().estatisticas(),
+                },
+            )
+        elif rota == "/kpis":
+            self._responder(200, {"versao": conjunto.versao, **para_json(asdict(kpis(conjunto)))})
+        else:
+            self._responder(404, {"erro": f"rota não encontrada: {self.path}"})
+
+    def _post(self, rota: str):
+        if rota == "/perfilar":
+            instrumentacao.perfilar_proxima()
+            self._responder(200, {"perfilar_proxima": True})
+            return
+        if rota not in ("/perguntar", "/lote"):
+            self._responder(404, {"erro": f"rota não encontrada: {self.path}"})
+            return
+        try:
+            corpo = self._ler_corpo()
+        except ValueError as e:
+            self._responder(400, {"erro": f"JSON inválido: {e}"})
+            return
+        conjunto = self.server.conjunto()
+        if rota == "/perguntar":
+            pergunta = corpo.get("pergunta")
+            if not isinstance(pergunta, str) or not pergunta.strip():
+                self._responder(400, {"erro": "informe 'pergunta'"})
+                return
+            intencao, resultado = route_question(pergunta, conjunto)
+            resposta = {"versao": conjunto.versao, "intencao": intencao, "resultado": resultado}
+            if isinstance(resultado, pd.DataFrame) and "periodo" in resultado.attrs:
+                resposta["periodo"] = resultado.attrs["periodo"]  # tabelas levam o período fora das linhas
+            if corpo.get("explicar"):
+                resposta["explicacao"], resposta["erro_explicacao"] = self.server.explicar(
+                    pergunta, resultado, corpo.get("modelo") or MODELO_PADRAO
+                )
+            self._responder(200, resposta)
+        else:
+            perguntas = corpo.get("perguntas")
+            if not isinstance(perguntas, list) or not all(isinstance(p, str) for p in perguntas):
+                self._responder(400, {"erro": "informe 'perguntas' (lista de textos)"})
+                return
+            if len(perguntas) > MAX_PERGUNTAS_LOTE:
+                self._responder(400, {"erro": f"no máximo {MAX_PERGUNTAS_LOTE} perguntas por lote"})
+                return
+            respostas = [
+                {"pergunta": p, "intencao": i, "resultado": r}
+                for p, (i, r) in zip(perguntas, route_questions(perguntas, conjunto))
+            ]
+            self._responder(200, {"versao": conjunto.versao, "respostas": respostas})
+
+
+class ServidorAPI(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, endereco, pasta: str = PASTA_DADOS, backend: str = None, intervalo_versao: float = 1.0):
+        super().__init__(endereco, _Handler)
+        self.pasta, self.backend, self.intervalo_versao = pasta, backend, intervalo_versao
+        self._conjunto = obter_conjunto(pasta, backend)  # carga feita antes de aceitar conexões
+        obter_agregados(self._conjunto)  # KPIs prontos para a primeira requisição
+        obter_cubos(self._conjunto)  # e os cubos das perguntas com período (nenhum, se faltam colunas)
+        self._conferido_em = time.monotonic()
+        self._trava = threading.Lock()
+
+    def conjunto(self):
+        # obter_conjunto confere a versão (stat nos arquivos); aqui no máximo uma vez por intervalo
+        with self._trava:
+            if time.monotonic() - self._conferido_em >= self.intervalo_versao:
+                self._conjunto = obter_conjunto(self.pasta, self.backend)
+                self._conferido_em = time.monotonic()
+            return self._conjunto
+
+    def explicar(self, pergunta: str, resultado, modelo: str):
+        """(texto, erro) da explicação por IA; sem OPENROUTER_API_KEY devolve só o erro."""
+        from llm import ask_model_explain, obter_cliente
+
+        api_key = os.getenv("OPENROUTER_API_KEY", "")
+        if not api_key:
+            return None, "API key não encontrada. Configure OPENROUTER_API_KEY."
+        try:
+            client = obter_cliente(OPENROUTER_BASE_URL, api_key)
+        except Exception as e:
+            return None, f"Erro criando cliente OpenRouter: {e}"
+        return ask_model_explain(client, modelo, pergunta, resultado)
+
+
+def iniciar_api(porta: int = 0, pasta: str = PASTA_DADOS, backend: str = None, host: str = "127.0.0.1"):
+    """Sobe a API numa thread daemon; devolve (servidor, url_base). Usado pelo teste de carga."""
+    servidor = ServidorAPI((host, porta), pasta=pasta, backend=backend)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f"http://{host}:{servidor.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8000)
+    parser.add_argument("--pasta", default=PASTA_DADOS)
+    parser.add_argument("--backend", choices=["pandas", "duckdb"], help="padrão: SKYONE_BACKEND ou pandas")
+    parser.add_argument("--intervalo-versao", type=float, default=1.0, help="segundos entre conferências de versão")
+    parser.add_argument("--instrumentacao", action="store_true", help="mede etapas e intenções (GET /metricas)")
+    args = parser.parse_args()
+    if args.instrumentacao:
+        instrumentacao.ativar()
+    servidor = ServidorAPI(
+        (args.host, args.porta), pasta=args.pasta, backend=args.backend, intervalo_versao=args.intervalo_versao
+    )
+    url = f"http://{args.host}:{servidor.server_address[1]}"
+    print(f"API ouvindo em {url} (versão {servidor.conjunto().versao})", flush=True)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        servidor.shutdown()
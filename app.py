@@ -1,11 +1,23 @@
 # app.py
 import os
-import io
+import importlib.util
+import json
 from datetime import datetime
 
 import pandas as pd
 # app.py
 import streamlit as st
+
+from consultas import CACHE_RESPOSTAS, route_question
+from dados import obter_conjunto, relatorio_ingestao, relatorio_memoria
+from exportacao import FORMATOS, exportar as exportar_tabela
+from metricas import kpis
+import instrumentacao
+from instrumentacao import etapa
+from llm import (
+    Latencia, ask_model_explain_stream, ask_model_fallback, obter_cache_llm, obter_cliente, obter_despacho
+)
+
 st.set_page_config(page_title="POC Expressa - E-commerce (IA opcional)", layout="wide")
 
 # CSS - look & feel moderno
@@ -64,11 +76,9 @@ st.title("POC Expressa de E-commerce — Modo IA Opcional")
 
 
 
-# IA é opcional
-try:
-    from openai import OpenAI
-except Exception:
-    OpenAI = None
+# IA é opcional: o pacote openai (~1 s de import) só é importado quando o primeiro cliente é criado
+# (llm.obter_cliente); aqui basta saber se está instalado.
+IA_INSTALADA = importlib.util.find_spec("openai") is not None
 
 # ------------------------------------------------------------------
 # Configuração
@@ -86,6 +96,8 @@ OPENROUTER_API_KEY = (
     if USE_IA
     else ""
 )
+# Permite apontar para um endpoint compatível local (ex.: python stub_llm.py) em testes offline.
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
 MODEL_NAME = st.sidebar.text_input(
     "Modelo (OpenRouter)", value="mistralai/mistral-7b-instruct", disabled=not USE_IA
 )
@@ -100,23 +112,20 @@ with st.sidebar.expander("❓ O que significam esses parâmetros?"):
 
     **Modelo:** é o modelo que será consultado via OpenRouter (ex: mistral-7b).
 
-    **Quantos números no resumo enviado à IA:** limita quantos valores numéricos serão enviados para a IA basear a explicação. Valores maiores aumentam contexto, mas também o custo e tempo.
+    **Quantos números no resumo enviado à IA:** define o orçamento de contexto enviado à IA (≈3 tokens por número). O resultado vai como uma tabela compacta, truncada quando passa do orçamento. Valores maiores aumentam contexto, mas também o custo e tempo.
     """
     )
 
 # ------------------------------------------------------------------
 # Helpers
 # ------------------------------------------------------------------
-@st.cache_data
 def carregar_dados():
+    # Conjunto único por processo (dados.obter_conjunto), compartilhado sem cópia entre as sessões;
+    # a checagem de versão é só um stat nos CSVs, então pode rodar a cada rerun.
     try:
-        clientes = pd.read_csv("data/clients.csv", encoding="utf-8")
-        pedidos = pd.read_csv("data/orders.csv", encoding="utf-8")
-        itens = pd.read_csv("data/items.csv", encoding="utf-8")
-        produtos = pd.read_csv("data/products.csv", encoding="utf-8")
-        return clientes, pedidos, itens, produtos, None
+        return obter_conjunto(), None
     except Exception as e:
-        return None, None, None, None, str(e)
+        return None, str(e)
 
 
 def build_client():
@@ -124,244 +133,70 @@ def build_client():
         return None, None
     if not OPENROUTER_API_KEY:
         return None, "API key não encontrada. Configure OPENROUTER_API_KEY em Secrets."
-    if OpenAI is None:
+    if not IA_INSTALADA:
         return None, "Pacote openai não instalado."
     try:
-        client = OpenAI(base_url="https://openrouter.ai/api/v1", api_key=OPENROUTER_API_KEY)
-        return client, None
+        # cliente do processo (llm.obter_cliente): pool keep-alive reaproveitado entre reruns e sessões
+        return obter_cliente(OPENROUTER_BASE_URL, OPENROUTER_API_KEY), None
     except Exception as e:
         return None, f"Erro criando cliente OpenRouter: {e}"
 
 
-def safe_float(x):
-    try:
-        return float(x)
-    except Exception:
-        return 0.0
-
-
-# ---------------- Cálculos determinísticos ----------------
-def answer_ticket_medio(pedidos: pd.DataFrame):
-    df = pedidos.copy()
-    df = df[df["SituacaoPedido"].astype(str).str.lower().eq("faturado")]
-    tm = df["TotalPedido"].apply(safe_float).mean()
-    n = df.shape[0]
-    soma = df["TotalPedido"].apply(safe_float).sum()
-    return {
-        "titulo": "Ticket médio (pedidos faturados)",
-        "valor": tm,
-        "detalhe": {
-            "soma_total": soma,
-            "num_pedidos_faturados": n,
-        },
-    }
-
-
-def answer_desconto_medio(pedidos: pd.DataFrame):
-    df = pedidos.copy()
-    df = df[df["SituacaoPedido"].astype(str).str.lower().eq("faturado")]
-
-    descontos = df["ValorDesconto"].apply(safe_float)
-    media = descontos.mean()
-    total = descontos.sum()
-
-    return {
-        "titulo": "Desconto médio (pedidos faturados)",
-        "valor": media,
-        "detalhe": {
-            "soma_descontos": total,
-            "num_pedidos_faturados": df.shape[0]
-        },
-    }
-
-
-
-def top_produtos(itens: pd.DataFrame, produtos: pd.DataFrame, n=5):
-    top = (
-        itens.groupby("CodigoProdutoVendido")["QuantidadeVendidaItem"]
-        .sum()
-        .reset_index()
-        .sort_values(by="QuantidadeVendidaItem", ascending=False)
-        .head(n)
-    )
-    top = top.merge(
-        produtos.drop_duplicates(subset="CodigoProduto"),
-        left_on="CodigoProdutoVendido",
-        right_on="CodigoProduto",
-        how="left",
-    )
-    return top[["Produto", "QuantidadeVendidaItem"]]
-
-
-def formas_pagamento(pedidos: pd.DataFrame):
-    fp = pedidos["FormaPagamento"].value_counts().reset_index()
-    fp.columns = ["Forma de Pagamento", "Total"]
-    return fp
-
-
-def status_pedidos(pedidos: pd.DataFrame):
-    status = pedidos["SituacaoPedido"].value_counts().reset_index()
-    status.columns = ["Situação", "Total"]
-    return status
-
-
-def tipo_cliente(pedidos: pd.DataFrame, clientes: pd.DataFrame):
-    pedidos_clientes = pedidos.merge(
-        clientes, left_on="CodigoClientePedido", right_on="CodigoCliente", how="left"
-    )
-    tipos = pedidos_clientes["TipoCliente"].value_counts().reset_index()
-    tipos.columns = ["Tipo de Cliente", "Total de Pedidos"]
-    return tipos
-
-
-# ---------------- IA prompts/helpers ----------------
-def default_system_prompt():
-    return (
-        "Você é um analista de dados sênior. Explique o raciocínio com clareza, "
-        "cite as fórmulas usadas e a interpretação do resultado. Use apenas os números que eu te passar. "
-        "Se algo não fizer sentido, diga explicitamente."
-    )
-
-
-def summarize_numbers_for_llm(d: dict, limit=60) -> str:
-    flat = []
-
-    def walk(x):
-        if isinstance(x, dict):
-            for v in x.values():
-                walk(v)
-        elif isinstance(x, (list, tuple, set)):
-            for v in x:
-                walk(v)
-        else:
-            try:
-                v = float(x)
-                flat.append(v)
-            except Exception:
-                pass
-
-    walk(d)
-    return ", ".join(f"{v:.4f}" for v in flat[:limit])
-
-
-def dataset_min_snapshot(clientes, pedidos, itens, produtos) -> dict:
-    """Resumo curto com números úteis para fallback em perguntas não mapeadas."""
-    out = {}
-    try:
-        if pedidos is not None and not pedidos.empty:
-            ped_faturados = pedidos[pedidos["SituacaoPedido"].astype(str).str.lower().eq("faturado")]
-            out.update(
-                dict(
-                    total_pedidos=int(pedidos.shape[0]),
-                    total_pedidos_faturados=int(ped_faturados.shape[0]),
-                    ticket_medio=pd.to_numeric(ped_faturados["TotalPedido"], errors="coerce").mean(),
-                    desconto_medio=pd.to_numeric(ped_faturados["ValorDesconto"], errors="coerce").mean(),
-                )
-            )
-    except Exception:
-        pass
-    try:
-        if itens is not None and not itens.empty:
-            top = (
-                itens.groupby("CodigoProdutoVendido")["QuantidadeVendidaItem"].sum().sort_values(ascending=False).head(5)
-            )
-            out["top_qtd_itens"] = list(top.values)
-    except Exception:
-        pass
-    return out
-
-
-def ask_model_explain(client, model, question: str, result: dict, max_numbers=60, temperature=0.1):
-    if not client:
-        return None, "Cliente IA não disponível."
+def exibir_fluxo(fluxo, latencia, nome_etapa="llm:explicacao"):
+    """Escreve a explicação token a token e mostra o detalhamento de latência."""
     try:
-        numbers = summarize_numbers_for_llm(result, limit=max_numbers)
-        content = (
-            f"Pergunta do usuário: {question}\n"
-            f"Números já calculados pelo backend (use apenas estes): {numbers}\n"
-            f"Resultado estruturado (não envie de volta, apenas use para explicar): {result}"
-        )
-        completion = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": default_system_prompt()},
-                {"role": "user", "content": content},
-            ],
-            temperature=temperature,
-        )
-        return completion.choices[0].message.content, None
+        with etapa(nome_etapa):
+            st.write_stream(fluxo)
     except Exception as e:
-        return None, f"Erro ao chamar o modelo: {e}"
-
-
-
-def ask_model_fallback(client, model, question: str, clientes, pedidos, itens, produtos, max_numbers=60):
-    """Quando a pergunta não é mapeada, tenta responder SOMENTE com um snapshot pequeno do dataset."""
-    if not client:
-        return None, "Cliente IA não disponível."
-    payload = dataset_min_snapshot(clientes, pedidos, itens, produtos)
-    if not payload:
-        return None, "Snapshot vazio – não há números para enviar."
-    return ask_model_explain(client, model, question, payload, max_numbers=max_numbers)
-
-
-# ---------------- Router ----------------
-def route_question(pergunta: str, clientes, pedidos, itens, produtos):
-    q = pergunta.lower()
-    if "ticket" in q and ("médio" in q or "medio" in q):
-        return "ticket_medio", answer_ticket_medio(pedidos)
-    if "desconto" in q and "médio" in q:
-        return "desconto_medio", answer_desconto_medio(pedidos)
-    if "produtos mais vendidos" in q or "top produtos" in q:
-        return "top_produtos", top_produtos(itens, produtos, n=5)
-    if "forma de pagamento" in q or "formas de pagamento" in q:
-        return "formas_pgto", formas_pagamento(pedidos)
-    if "frete grátis" in q or "frete gratis" in q:
-        total = pedidos[pedidos["FreteGratis"].astype(str).str.lower().isin(["sim", "s", "true", "1"])].shape[0]
-        return "frete_gratis", {"total_frete_gratis": int(total)}
-    if "status" in q:
-        return "status_pedidos", status_pedidos(pedidos)
-    if (
-        "tipo de cliente" in q
-        or "cliente físico" in q
-        or "cliente juridico" in q
-        or "jurídico" in q
-    ):
-        return "tipo_cliente", tipo_cliente(pedidos, clientes)
-    return "nao_mapeado", {}
+        st.error(f"Erro ao chamar o modelo: {e}")
+        return
+    if instrumentacao.ativo and latencia.primeiro_token is not None:
+        instrumentacao.registrar("etapa", f"{nome_etapa}:primeiro_token", latencia.primeiro_token)
+    st.caption(f"⏱️ {latencia.resumo()}")
 
 
 # ------------------------------------------------------------------
 # Carregamento
 # ------------------------------------------------------------------
-clientes, pedidos, itens, produtos, erro = carregar_dados()
+conjunto, erro = carregar_dados()
 if erro:
     st.error(f"❌ Erro ao carregar CSVs: {erro}")
     st.stop()
 else:
     st.success("✅ Dados carregados com sucesso!")
+    st.caption(f"Camada de fatos montada em {conjunto.fatos.segundos_construcao * 1000:.0f} ms (versão {conjunto.versao})")
 
 col1, col2, col3, col4 = st.columns(4)
 try:
-    total_pedidos = pedidos.shape[0]
-    ticket_medio_df = pedidos[pedidos["SituacaoPedido"].astype(str).str.lower().eq("faturado")]["TotalPedido"].apply(safe_float).mean()
-    frete_gratis_qtd = pedidos[pedidos["FreteGratis"].astype(str).str.lower().isin(["sim", "s", "true", "1"])].shape[0]
-    pct_frete_gratis = (frete_gratis_qtd / total_pedidos) * 100 if total_pedidos > 0 else 0
-    desconto_medio = pedidos[pedidos["SituacaoPedido"].astype(str).str.lower().eq("faturado")]["ValorDesconto"].apply(safe_float).mean()
-
-
-    col1.metric("📦 Total de Pedidos", f"{total_pedidos:,}")
-    col2.metric("💰 Ticket Médio", f"R$ {ticket_medio_df:,.2f}")
-    col3.metric("🚚 Frete Grátis (%)", f"{pct_frete_gratis:.1f}%")
-    col4.metric("🔻 Desconto Médio", f"R$ {desconto_medio:,.2f}")
+    # núcleo de métricas compartilhado com o app clássico (metricas.py): uma passada por versão dos dados
+    with etapa("kpis"):
+        indicadores = kpis(conjunto)
+
+    col1.metric("📦 Total de Pedidos", f"{indicadores.total_pedidos:,}")
+    col2.metric("💰 Ticket Médio", f"R$ {indicadores.ticket_medio:,.2f}")
+    col3.metric("🚚 Frete Grátis (%)", f"{indicadores.pct_frete_gratis:.1f}%")
+    col4.metric("🔻 Desconto Médio", f"R$ {indicadores.desconto_medio:,.2f}")
 except Exception as e:
     st.warning(f"⚠️ Não foi possível calcular os KPIs: {e}")
 
 with st.expander("🔍 Ver amostras de dados carregados"):
-    st.write("Clientes", clientes.head())
-    st.write("Pedidos", pedidos.head())
-    st.write("Itens", itens.head())
-    st.write("Produtos", produtos.head())
+    st.write("Clientes", conjunto.amostra("clientes"))
+    st.write("Pedidos", conjunto.amostra("pedidos"))
+    st.write("Itens", conjunto.amostra("itens"))
+    st.write("Produtos", conjunto.amostra("produtos"))
+
+    invalidos = {
+        f"{tabela}.{coluna}": qtd
+        for tabela, manifesto in relatorio_ingestao().items()
+        for coluna, qtd in manifesto.get("valores_invalidos", {}).items()
+        if qtd
+    }
+    if invalidos:
+        st.caption(f"⚠️ Valores não numéricos convertidos para 0 na ingestão (na exportação saem vazios): {invalidos}")
+    ignoradas = [m["origem_ignorada"] for m in relatorio_ingestao().values() if m.get("origem_ignorada")]
+    if ignoradas:
+        st.caption(f"⚠️ Arquivos mais antigos que a versão em outro formato, ignorados: {ignoradas}")
+    st.write("Memória por tabela (memory_usage deep, CSV bruto vs. tipos otimizados)", relatorio_memoria())
 
 # ------------------------------------------------------------------
 # Chat
@@ -386,82 +221,157 @@ if pergunta:
     with st.chat_message("user"):
         st.markdown(pergunta)
 
-    intent, result = route_question(pergunta, clientes, pedidos, itens, produtos)
+    # cProfile só quando pedido no painel de instrumentação (uma pergunta)
+    with instrumentacao.perfil(pergunta):
+        intent, result = route_question(pergunta, conjunto)
 
-    with st.chat_message("assistant"):
-        is_result_empty = (
-            result is None
-            or (isinstance(result, dict) and not result)
-            or (isinstance(result, pd.DataFrame) and result.empty)
-        )
+        with st.chat_message("assistant"):
+            is_result_empty = (
+                result is None
+                or (isinstance(result, dict) and not result)
+                or (isinstance(result, pd.DataFrame) and result.empty)
+            )
+            # perguntas com período ("este mês", "em 2024") saem dos cubos e trazem o intervalo
+            periodo = result.attrs.get("periodo") if isinstance(result, pd.DataFrame) else (
+                result.get("periodo") if isinstance(result, dict) else None
+            )
 
-        if is_result_empty:
-            if USE_IA:
-                st.warning("⚠️ Pergunta não está mapeada para cálculo. Pesquisando com IA…")
-                with st.spinner("Consultando modelo…"):
-                    explicacao, err = ask_model_fallback(
-                        client, MODEL_NAME, pergunta, clientes, pedidos, itens, produtos, max_numbers=MAX_NUMBERS_TO_SEND
+            if is_result_empty and periodo:
+                st.info(f"📅 Nenhum pedido em {periodo}.")
+            elif is_result_empty:
+                if USE_IA:
+                    st.warning("⚠️ Pergunta não está mapeada para cálculo. Pesquisando com IA…")
+                    latencia = Latencia()
+                    fluxo, err = ask_model_fallback(
+                        client, MODEL_NAME, pergunta, conjunto,
+                        max_numbers=MAX_NUMBERS_TO_SEND, stream=True, latencia=latencia,
                     )
-                if err:
-                    st.error(err)
+                    if err:
+                        st.error(err)
+                    else:
+                        exibir_fluxo(fluxo, latencia, "llm:fallback")
                 else:
-                    st.markdown(explicacao)
-            else:
-                st.warning(
-                    "⚠️ Pergunta não está mapeada para cálculo determinístico. "
-                    "Ative a IA na barra lateral ou diga qual métrica específica quer que eu implemente."
-                )
-        else:
-            # 1) Mostra a resposta determinística
-            if isinstance(result, pd.DataFrame):
-                st.dataframe(result)
-            else:
-                st.write(result)
-
-            # 2) Explica com IA (opcional)
-            if USE_IA:
-                with st.spinner("Explicando com IA…"):
-                    explicacao, err = ask_model_explain(
-                        client, MODEL_NAME, pergunta, result, max_numbers=MAX_NUMBERS_TO_SEND
+                    st.warning(
+                        "⚠️ Pergunta não está mapeada para cálculo determinístico. "
+                        "Ative a IA na barra lateral ou diga qual métrica específica quer que eu implemente."
                     )
-                if err:
-                    st.error(err)
+            else:
+                # 1) Mostra a resposta determinística
+                if periodo:
+                    st.caption(f"📅 Período: {periodo}")
+                if isinstance(result, pd.DataFrame):
+                    st.dataframe(result)
                 else:
-                    st.markdown(explicacao)
-
-        # salva no histórico
-        st.session_state.messages.append(
-            {
-                "role": "assistant",
-                "content": "(ver acima – resposta renderizada com dataframe/valores + IA opcional)",
-            }
+                    st.write(result)
+
+                # 2) Explica com IA (opcional)
+                if USE_IA:
+                    latencia = Latencia()
+                    exibir_fluxo(
+                        ask_model_explain_stream(
+                            client, MODEL_NAME, pergunta, result, max_numbers=MAX_NUMBERS_TO_SEND, latencia=latencia
+                        ),
+                        latencia,
+                    )
+
+            # salva no histórico
+            st.session_state.messages.append(
+                {
+                    "role": "assistant",
+                    "content": "(ver acima – resposta renderizada com dataframe/valores + IA opcional)",
+                }
+            )
+
+if USE_IA:
+    with st.sidebar.expander("🧠 Cache de respostas da IA"):
+        stats_llm = obter_cache_llm().estatisticas()
+        st.caption(
+            f"Taxa de acerto {stats_llm['taxa_acerto']:.0%} · {stats_llm['acertos']} acertos / "
+            f"{stats_llm['falhas']} falhas · {stats_llm['entradas']}/{stats_llm['max_entradas']} entradas"
         )
+        despacho = obter_despacho().estatisticas()
+        st.caption(
+            f"Despacho: {despacho['na_fila']} na fila · {despacho['em_execucao']}/{despacho['max_concorrentes']} "
+            f"em execução · {despacho['coalescidas']} coalescidas · espera p50 {despacho['espera_p50_ms']:.0f} ms "
+            f"/ p95 {despacho['espera_p95_ms']:.0f} ms · {despacho['tempo_esgotado']} tempo esgotado"
+        )
+
+with st.sidebar.expander("⚡ Cache de respostas"):
+    stats = CACHE_RESPOSTAS.estatisticas()
+    c1, c2 = st.columns(2)
+    c1.metric("Acertos", stats["acertos"])
+    c2.metric("Falhas", stats["falhas"])
+    st.caption(
+        f"Taxa de acerto {stats['taxa_acerto']:.0%} · {stats['entradas']}/{stats['capacidade']} entradas · "
+        f"{stats['invalidacoes']} invalidações"
+    )
+
+with st.sidebar.expander("⏱️ Instrumentação"):
+    # a chave é global do processo: o toggle mostra o estado atual (outra sessão pode tê-lo mudado)
+    # e só liga/desliga quando alguém mexe nele (on_change roda antes do rerun)
+    st.session_state["instrumentacao_ativa"] = instrumentacao.ativo
+    st.toggle(
+        "Medir etapas (processo inteiro, todas as sessões)", key="instrumentacao_ativa",
+        on_change=lambda: instrumentacao.ativar(st.session_state["instrumentacao_ativa"]),
+        help="Tempo de parede e linhas varridas por etapa; desligado, o custo é desprezível. "
+        "Vale para todas as sessões deste servidor.",
+    )
+    if st.button("🔬 Perfilar a próxima pergunta"):
+        instrumentacao.perfilar_proxima()
+        st.caption("cProfile armado para a próxima pergunta.")
+    medidas = instrumentacao.resumo()
+    for familia, titulo in (("intencao", "Latência por intenção (ms)"), ("etapa", "Etapas (ms)")):
+        if medidas[familia]:
+            st.caption(titulo)
+            st.dataframe(
+                pd.DataFrame.from_dict(medidas[familia], orient="index")[
+                    ["contagem", "p50_ms", "p95_ms", "p99_ms", "linhas"]
+                ].round(2)
+            )
+    if not (medidas["etapa"] or medidas["intencao"]):
+        st.caption("Sem medições ainda." if instrumentacao.ativo else "Instrumentação desligada.")
+    c1, c2 = st.columns(2)
+    c1.download_button(
+        "JSON", data=json.dumps(medidas, ensure_ascii=False, indent=2), file_name="instrumentacao.json",
+        mime="application/json",
+    )
+    c2.download_button(
+        "Prometheus", data=instrumentacao.exportar_prometheus(), file_name="metricas.prom", mime="text/plain"
+    )
+    perfil = instrumentacao.ultimo_perfil
+    if perfil:
+        st.caption(f"Último perfil: {perfil['rotulo']!r}")
+        st.code(perfil["texto"], language="text")
+        with open(perfil["caminho"], "rb") as f:
+            st.download_button("⬇️ .prof (snakeviz/pstats)", data=f.read(), file_name=os.path.basename(perfil["caminho"]))
 
 # ------------------------------------------------------------------
 # Exportar dados
 # ------------------------------------------------------------------
-with st.expander("📁 Exportar dados para Excel"):
-    if clientes is None:
+with st.expander("📁 Exportar dados"):
+    if conjunto is None:
         st.warning("Carregue os dados primeiro.")
     else:
         exportar = st.selectbox(
             "Escolha o conjunto de dados:", ["Clientes", "Pedidos", "Itens", "Produtos"]
         )
+        formato = st.radio(
+            "Formato:", list(FORMATOS), horizontal=True,
+            help="xlsx é quebrado em abas/arquivos no limite do Excel; para tabelas grandes prefira csv.gz ou parquet.",
+        )
         if st.button("📄 Exportar"):
-            dfs = {
-                "Clientes": clientes,
-                "Pedidos": pedidos,
-                "Itens": itens,
-                "Produtos": produtos,
-            }
-            df_export = dfs[exportar]
-            buffer = io.BytesIO()
-            with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
-                df_export.to_excel(writer, sheet_name=exportar, index=False)
-            buffer.seek(0)
-            st.download_button(
-                label=f"⬇️ Baixar {exportar}.xlsx",
-                data=buffer,
-                file_name=f"{exportar}_{datetime.now().strftime('%Y%m%d')}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            )
+            # gravado em fluxo no disco e guardado por versão dos dados (exportacao.py)
+            with st.spinner("Gerando arquivo…"):
+                arquivo = exportar_tabela(exportar.lower(), formato, conjunto)
+            if arquivo.do_cache:
+                st.caption("Arquivo já gerado para esta versão dos dados.")
+            else:
+                st.caption(f"{arquivo.linhas:,} linhas em {arquivo.arquivos} arquivo(s).")
+            extensao = arquivo.nome_arquivo.split(".", 1)[1]
+            with open(arquivo.caminho, "rb") as f:
+                st.download_button(
+                    label=f"⬇️ Baixar {exportar}.{extensao}",
+                    data=f,
+                    file_name=f"{exportar}_{datetime.now().strftime('%Y%m%d')}.{extensao}",
+                    mime=arquivo.mime,
+                )
@@ -1,45 +1,49 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import io
+import time
 from datetime import datetime
 
+from dados import obter_conjunto, relatorio_memoria
+from exportacao import FORMATOS, exportar as exportar_tabela
+from graficos import grafico
+from metricas import kpis, resposta
+
 # Configuração da interface
 st.set_page_config(page_title="POC Expressa - E-commerce", layout="wide")
 st.title("📦 POC Expressa de E-commerce")
 
-# Carrega os dados CSV da pasta 'data'
-@st.cache_data
+# Carrega os dados da pasta 'data' (conjunto compartilhado entre sessões, ver dados.obter_conjunto)
 def carregar_dados():
     try:
-        clientes = pd.read_csv("data/clients.csv", encoding="utf-8")
-        pedidos = pd.read_csv("data/orders.csv", encoding="utf-8")
-        itens = pd.read_csv("data/items.csv", encoding="utf-8")
-        produtos = pd.read_csv("data/products.csv", encoding="utf-8")
-        return clientes, pedidos, itens, produtos
+        # o app clássico calcula direto sobre os DataFrames: sempre no backend pandas
+        return obter_conjunto(backend="pandas")
     except Exception as e:
         st.error(f"Erro ao carregar os dados: {e}")
-        return None, None, None, None
+        return None
+
+# Gráfico da resposta, montado uma vez por versão dos dados (graficos.py), com os tempos na legenda
+def exibir_grafico(intencao, dados):
+    g = grafico(intencao, dados, conjunto.versao)
+    inicio = time.perf_counter()
+    st.plotly_chart(g.figura, use_container_width=True)
+    st.caption(f"📈 {g.resumo(time.perf_counter() - inicio)}")
 
 # Carregamento inicial
-clientes, pedidos, itens, produtos = carregar_dados()
+conjunto = carregar_dados()
+clientes, pedidos, itens, produtos = conjunto.tabelas() if conjunto else (None, None, None, None)
 
 if clientes is not None:
     st.success("✅ Dados carregados com sucesso!")
+    st.caption(f"Camada de fatos montada em {conjunto.fatos.segundos_construcao * 1000:.0f} ms (versão {conjunto.versao})")
 
-    # KPIs executivos
+    # KPIs executivos (metricas.py: mesmos números do app.py, uma passada por versão dos dados)
     col1, col2, col3, col4 = st.columns(4)
     try:
-        total_pedidos = pedidos.shape[0]
-        ticket_medio = pedidos[pedidos["SituacaoPedido"] == "Faturado"]["TotalPedido"].mean()
-        frete_gratis_qtd = pedidos[pedidos["FreteGratis"].astype(str).str.lower().isin(["sim", "s", "true", "1"])].shape[0]
-        pct_frete_gratis = (frete_gratis_qtd / total_pedidos) * 100
-        desconto_medio = pedidos["ValorDesconto"].mean()
-
-        col1.metric("📦 Total de Pedidos", f"{total_pedidos:,}")
-        col2.metric("💰 Ticket Médio", f"R$ {ticket_medio:,.2f}")
-        col3.metric("🚚 Frete Grátis (%)", f"{pct_frete_gratis:.1f}%")
-        col4.metric("🔻 Desconto Médio", f"R$ {desconto_medio:,.2f}")
+        indicadores = kpis(conjunto)
+
+        col1.metric("📦 Total de Pedidos", f"{indicadores.total_pedidos:,}")
+        col2.metric("💰 Ticket Médio", f"R$ {indicadores.ticket_medio:,.2f}")
+        col3.metric("🚚 Frete Grátis (%)", f"{indicadores.pct_frete_gratis:.1f}%")
+        col4.metric("🔻 Desconto Médio", f"R$ {indicadores.desconto_medio:,.2f}")
     except Exception as e:
         st.warning(f"⚠️ Não foi possível calcular os KPIs: {e}")
 
@@ -49,30 +53,25 @@ if clientes is not None:
         st.write("Pedidos", pedidos.head())
         st.write("Itens", itens.head())
         st.write("Produtos", produtos.head())
+        st.write("Memória por tabela (memory_usage deep, CSV bruto vs. tipos otimizados)", relatorio_memoria())
 
-    # Exportar dados para Excel
-    with st.expander("📁 Exportar dados para Excel"):
+    # Exportar dados (em fluxo, guardado por versão dos dados: exportacao.py)
+    with st.expander("📁 Exportar dados"):
         exportar = st.selectbox("Escolha o conjunto de dados:", ["Clientes", "Pedidos", "Itens", "Produtos"])
+        formato = st.radio("Formato:", list(FORMATOS), horizontal=True)
         btn_exportar = st.button("📤 Exportar")
 
         if btn_exportar:
-            dfs = {
-                "Clientes": clientes,
-                "Pedidos": pedidos,
-                "Itens": itens,
-                "Produtos": produtos
-            }
-            df_export = dfs[exportar]
-            buffer = io.BytesIO()
-            with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
-                df_export.to_excel(writer, sheet_name=exportar, index=False)
-            buffer.seek(0)
-            st.download_button(
-                label=f"⬇️ Baixar {exportar}.xlsx",
-                data=buffer,
-                file_name=f"{exportar}_{datetime.now().strftime('%Y%m%d')}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
+            with st.spinner("Gerando arquivo…"):
+                arquivo = exportar_tabela(exportar.lower(), formato, conjunto)
+            extensao = arquivo.nome_arquivo.split(".", 1)[1]
+            with open(arquivo.caminho, "rb") as f:
+                st.download_button(
+                    label=f"⬇️ Baixar {exportar}.{extensao}",
+                    data=f,
+                    file_name=f"{exportar}_{datetime.now().strftime('%Y%m%d')}.{extensao}",
+                    mime=arquivo.mime
+                )
 
     # Campo de pergunta
     pergunta = st.text_input("Digite uma pergunta sobre os dados:")
@@ -83,8 +82,7 @@ if clientes is not None:
         # 1. Ticket médio
         if "ticket médio" in pergunta.lower():
             try:
-                pedidos_faturados = pedidos[pedidos["SituacaoPedido"] == "Faturado"]
-                ticket_medio = pedidos_faturados["TotalPedido"].mean()
+                ticket_medio = resposta("ticket_medio", conjunto)["valor"]
                 st.success(f"📊 O ticket médio dos pedidos faturados é de R$ {ticket_medio:.2f}")
             except Exception as e:
                 st.error(f"Erro ao calcular o ticket médio: {e}")
@@ -92,34 +90,11 @@ if clientes is not None:
         # 2. Produtos mais vendidos
         elif "produtos mais vendidos" in pergunta.lower():
             try:
-                top_produtos = (
-                    itens.groupby("CodigoProdutoVendido")["QuantidadeVendidaItem"]
-                    .sum()
-                    .reset_index()
-                    .sort_values(by="QuantidadeVendidaItem", ascending=False)
-                    .head(5)
-                )
-                resultado = top_produtos.merge(
-                    produtos.drop_duplicates(subset="CodigoProduto"),
-                    left_on="CodigoProdutoVendido",
-                    right_on="CodigoProduto",
-                    how="left"
-                )[["Produto", "QuantidadeVendidaItem"]]
+                resultado = resposta("top_produtos", conjunto)
 
                 st.write("📦 Top 5 produtos mais vendidos por quantidade:", resultado)
 
-                fig = px.bar(
-                    resultado,
-                    x="QuantidadeVendidaItem",
-                    y="Produto",
-                    orientation="h",
-                    color="QuantidadeVendidaItem",
-                    color_continuous_scale="blues",
-                    labels={"QuantidadeVendidaItem": "Qtd Vendida"},
-                    title="Top 5 Produtos Mais Vendidos"
-                )
-                fig.update_layout(height=400, template="plotly_dark")
-                st.plotly_chart(fig, use_container_width=True)
+                exibir_grafico("top_produtos", resultado)
 
             except Exception as e:
                 st.error(f"Erro ao buscar produtos mais vendidos: {e}")
@@ -127,19 +102,10 @@ if clientes is not None:
         # 3. Formas de pagamento
         elif "forma de pagamento" in pergunta.lower() or "formas de pagamento" in pergunta.lower():
             try:
-                forma_pgto = pedidos["FormaPagamento"].value_counts().reset_index()
-                forma_pgto.columns = ["Forma de Pagamento", "Total"]
+                forma_pgto = resposta("formas_pgto", conjunto)
                 st.write("💳 Formas de pagamento mais utilizadas:", forma_pgto)
 
-                fig = px.pie(
-                    forma_pgto,
-                    names="Forma de Pagamento",
-                    values="Total",
-                    title="Distribuição das Formas de Pagamento",
-                    color_discrete_sequence=px.colors.sequential.RdBu
-                )
-                fig.update_layout(template="plotly_dark")
-                st.plotly_chart(fig, use_container_width=True)
+                exibir_grafico("formas_pgto", forma_pgto)
 
             except Exception as e:
                 st.error(f"Erro ao calcular formas de pagamento: {e}")
@@ -147,7 +113,7 @@ if clientes is not None:
         # 4. Frete grátis
         elif "frete grátis" in pergunta.lower() or "frete gratis" in pergunta.lower():
             try:
-                total_frete_gratis = pedidos[pedidos["FreteGratis"].astype(str).str.lower().isin(["sim", "s", "true", "1"])].shape[0]
+                total_frete_gratis = resposta("frete_gratis", conjunto)["total_frete_gratis"]
                 st.success(f"📦 Total de pedidos com frete grátis: {total_frete_gratis}")
             except Exception as e:
                 st.error(f"Erro ao calcular pedidos com frete grátis: {e}")
@@ -155,19 +121,10 @@ if clientes is not None:
         # 5. Distribuição de status
         elif "status dos pedidos" in pergunta.lower() or "distribuição de status" in pergunta.lower():
             try:
-                status = pedidos["SituacaoPedido"].value_counts().reset_index()
-                status.columns = ["Situação", "Total"]
+                status = resposta("status_pedidos", conjunto)
                 st.write("📊 Distribuição de pedidos por situação:", status)
 
-                fig = px.pie(
-                    status,
-                    names="Situação",
-                    values="Total",
-                    title="Status dos Pedidos",
-                    color_discrete_sequence=px.colors.sequential.Agsunset
-                )
-                fig.update_layout(template="plotly_dark")
-                st.plotly_chart(fig, use_container_width=True)
+                exibir_grafico("status_pedidos", status)
 
             except Exception as e:
                 st.error(f"Erro ao calcular status dos pedidos: {e}")
@@ -175,29 +132,18 @@ if clientes is not None:
         # 6. Desconto médio
         elif "valor médio de desconto" in pergunta.lower() or "desconto médio" in pergunta.lower():
             try:
-                desconto_medio = pedidos["ValorDesconto"].mean()
-                st.success(f"💰 Valor médio de desconto aplicado: R$ {desconto_medio:.2f}")
+                desconto_medio = resposta("desconto_medio", conjunto)["valor"]
+                st.success(f"💰 Valor médio de desconto dos pedidos faturados: R$ {desconto_medio:.2f}")
             except Exception as e:
                 st.error(f"Erro ao calcular o valor médio de desconto: {e}")
 
         # 7. Tipo de cliente
         elif "tipo de cliente" in pergunta.lower() or "cliente físico" in pergunta.lower() or "cliente jurídico" in pergunta.lower():
             try:
-                pedidos_clientes = pedidos.merge(clientes, left_on="CodigoClientePedido", right_on="CodigoCliente", how="left")
-                tipos = pedidos_clientes["TipoCliente"].value_counts().reset_index()
-                tipos.columns = ["Tipo de Cliente", "Total de Pedidos"]
+                tipos = resposta("tipo_cliente", conjunto)
                 st.write("🧾 Pedidos por tipo de cliente:", tipos)
 
-                fig = px.bar(
-                    tipos,
-                    x="Tipo de Cliente",
-                    y="Total de Pedidos",
-                    color="Tipo de Cliente",
-                    title="Pedidos por Tipo de Cliente",
-                    color_discrete_sequence=px.colors.qualitative.Set2
-                )
-                fig.update_layout(template="plotly_dark")
-                st.plotly_chart(fig, use_container_width=True)
+                exibir_grafico("tipo_cliente", tipos)
 
             except Exception as e:
                 st.error(f"Erro ao calcular pedidos por tipo de cliente: {e}")
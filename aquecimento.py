@@ -0,0 +1,112 @@
+# aquecimento.py
+"""Sobe o app Streamlit com o conjunto carregado e os KPIs calculados antes da primeira sessão.
+
+O Streamlit roda o script do app no mesmo processo do servidor, então o que `aquecer` deixa pronto
+(dados.obter_conjunto, metricas.obter_agregados, cubos.obter_cubos, recuperacao.obter_indice) é o
+que a primeira sessão encontra: sem ler os CSVs, sem montar os fatos e sem recalcular os KPIs, os
+cubos de período nem o índice de fatos do fallback da IA. Também importa o que o Streamlit só
+importa na primeira tela e, depois dos dados, os pacotes que os apps só importam quando precisam
+(plotly, openai), para o primeiro gráfico ou a primeira chamada à IA também não pagarem o import.
+
+Por padrão a porta abre logo e o aquecimento corre em paralelo: uma sessão que chegue antes do fim
+espera a mesma carga (as travas de dados/incremental), nunca uma segunda. Com --esperar, a porta só
+abre depois do aquecimento.
+
+Uso:
+    python aquecimento.py app.py
+    python aquecimento.py app_classico.py --esperar -- --server.port 8502
+    python aquecimento.py --somente   # só aquece e mostra os tempos (ex.: teste de deploy)
+"""
+import argparse
+import importlib
+import sys
+import threading
+import time
+
+from cubos import obter_cubos
+from dados import PASTA_DADOS, obter_conjunto
+from metricas import obter_agregados
+from recuperacao import obter_indice
+
+MODULOS_ADIADOS = ("plotly.express", "openai")
+# importados pelo próprio Streamlit na primeira tela: st.success com ícone compila a regex de emojis (~0,3 s)
+MODULOS_PRIMEIRA_TELA = ("streamlit.emojis",)
+BACKEND_DOS_APPS = {"app_classico.py": "pandas"}  # o app clássico calcula direto sobre os DataFrames
+
+
+def aquecer(pasta: str = PASTA_DADOS, backend: str = None, modulos=MODULOS_ADIADOS) -> dict:
+    """Carrega o conjunto, calcula KPIs, cubos e índice de fatos e importa `modulos`; devolve o tempo de cada passo (s)."""
+    tempos = {}
+    for modulo in MODULOS_PRIMEIRA_TELA:
+        inicio = time.perf_counter()
+        importlib.import_module(modulo)
+        tempos[f"import:{modulo}"] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    conjunto = obter_conjunto(pasta, backend)
+    tempos["conjunto"] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    obter_agregados(conjunto)
+    tempos["kpis"] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    if obter_cubos(conjunto) is not None:  # faltam colunas (cubos.COLUNAS_CUBOS): não há cubos a montar
+        tempos["cubos"] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    obter_indice(conjunto)
+    tempos["indice"] = time.perf_counter() - inicio
+
+    for modulo in modulos:
+        inicio = time.perf_counter()
+        try:
+            importlib.import_module(modulo)
+        except ImportError:
+            continue  # dependência opcional ausente: o app mostra o aviso quando precisar dela
+        tempos[f"import:{modulo}"] = time.perf_counter() - inicio
+    return tempos
+
+
+def _relatar(tempos: dict):
+    partes = " · ".join(f"{nome} {segundos * 1000:.0f} ms" for nome, segundos in tempos.items())
+    print(f"🔥 Aquecido em {sum(tempos.values()):.1f}s ({partes})", file=sys.stderr, flush=True)
+
+
+def _aquecer_e_relatar(pasta: str, backend: str, modulos):
+    try:
+        _relatar(aquecer(pasta, backend, modulos))
+    except Exception as e:
+        # o app mostra o erro de carga na primeira sessão; aqui só registra
+        print(f"⚠️ Aquecimento falhou: {e}", file=sys.stderr, flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("app", nargs="?", default="app.py")
+    parser.add_argument("--pasta", default=PASTA_DADOS)
+    parser.add_argument("--backend", choices=["pandas", "duckdb"], help="padrão: o do app (SKYONE_BACKEND ou pandas)")
+    parser.add_argument("--esperar", action="store_true", help="só abre a porta depois do aquecimento")
+    parser.add_argument("--sem-importacoes", action="store_true", help="não importa plotly/openai antecipadamente")
+    parser.add_argument("--somente", action="store_true", help="aquece, mostra os tempos e sai (sem servidor)")
+    parser.add_argument("streamlit", nargs=argparse.REMAINDER, help="argumentos repassados ao streamlit run (após --)")
+    args = parser.parse_args()
+
+    backend = args.backend or BACKEND_DOS_APPS.get(args.app)
+    modulos = () if args.sem_importacoes else MODULOS_ADIADOS
+    if args.somente or args.esperar:
+        _aquecer_e_relatar(args.pasta, backend, modulos)
+        if args.somente:
+            return
+    else:
+        threading.Thread(target=_aquecer_e_relatar, args=(args.pasta, backend, modulos), daemon=True).start()
+
+    from streamlit.web import cli as stcli
+
+    extras = args.streamlit[1:] if args.streamlit[:1] == ["--"] else args.streamlit
+    sys.argv = ["streamlit", "run", args.app, *extras]
+    sys.exit(stcli.main())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+# avaliar_perguntas.py
+"""Reexecuta um log de perguntas (JSONL) pelo roteador, sem a interface, com um pool de processos.
+
+Cada linha de entrada é um objeto com a pergunta no campo `--campo` (padrão: "pergunta"; também aceita
+"question" e "title") ou uma string JSON. A saída tem uma linha por pergunta, na ordem de entrada, com
+intenção, resultado e latência. No final sai o relatório: distribuição de intenções, taxa de
+`nao_mapeado` e percentis de latência por intenção.
+
+Uso:
+    python avaliar_perguntas.py perguntas.jsonl --saida resultados.jsonl --processos 4
+    python avaliar_perguntas.py perguntas.jsonl --llm-stub --atraso-stub 0.05   # inclui a explicação via stub local
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from api import para_json
+from dados import PASTA_DADOS, obter_conjunto, versao_dados
+
+CAMPOS_PERGUNTA = ("pergunta", "question", "title")
+PERGUNTAS_POR_TAREFA = 200
+TAREFAS_EM_VOO_POR_PROCESSO = 4  # limita a memória: a entrada é lida aos poucos
+
+_estado = {}
+
+
+def _iniciar_processo(pasta, backend, usar_cache, llm_url, modelo):
+    """Roda uma vez em cada processo do pool: carrega o conjunto e, se pedido, o cliente do stub."""
+    _estado.update(pasta=pasta, backend=backend, usar_cache=usar_cache, modelo=modelo, cliente=None)
+    obter_conjunto(pasta, backend)
+    if llm_url:
+        from llm import obter_cliente
+
+        _estado["cliente"] = obter_cliente(llm_url, "stub")
+
+
+def _avaliar(perguntas):
+    from consultas import route_question
+
+    conjunto = obter_conjunto(_estado["pasta"], _estado["backend"])
+    saida = []
+    for pergunta in perguntas:
+        registro = {"pergunta": pergunta}
+        inicio = time.perf_counter()
+        try:
+            intencao, resultado = route_question(pergunta, conjunto, usar_cache=_estado["usar_cache"])
+            registro.update(intencao=intencao, resultado=para_json(resultado))
+        except Exception as e:
+            intencao, resultado = "erro", None
+            registro.update(intencao=intencao, erro=f"{type(e).__name__}: {e}")
+        registro["latencia_ms"] = (time.perf_counter() - inicio) * 1000
+
+        if _estado["cliente"] is not None and intencao != "erro":
+            from llm import ask_model_explain
+
+            inicio = time.perf_counter()
+            if intencao == "nao_mapeado":
+                from llm import ask_model_fallback
+
+                texto, erro = ask_model_fallback(_estado["cliente"], _estado["modelo"], pergunta, conjunto)
+            else:
+                texto, erro = ask_model_explain(_estado["cliente"], _estado["modelo"], pergunta, resultado, cache=False)
+            registro.update(explicacao=texto, erro_explicacao=erro)
+            registro["latencia_llm_ms"] = (time.perf_counter() - inicio) * 1000
+        saida.append(registro)
+    return saida
+
+
+def ler_perguntas(caminho: str, campo: str):
+    """Gera as perguntas do JSONL; linhas vazias ou sem pergunta são ignoradas (com aviso)."""
+    campos = (campo,) + tuple(c for c in CAMPOS_PERGUNTA if c != campo)
+    with (sys.stdin if caminho == "-" else open(caminho, encoding="utf-8")) as f:
+        for numero, linha in enumerate(f, 1):
+            if not linha.strip():
+                continue
+            try:
+                obj = json.loads(linha)
+            except ValueError:
+                print(f"⚠️ linha {numero}: JSON inválido, ignorada", file=sys.stderr)
+                continue
+            if isinstance(obj, str):
+                pergunta = obj
+            else:
+                pergunta = next((obj[c] for c in campos if isinstance(obj, dict) and isinstance(obj.get(c), str)), None)
+            if pergunta is None:
+                print(f"⚠️ linha {numero}: sem pergunta ({'/'.join(campos)}), ignorada", file=sys.stderr)
+                continue
+            yield pergunta
+
+
+def _em_tarefas(perguntas, tamanho: int):
+    tarefa = []
+    for pergunta in perguntas:
+        tarefa.append(pergunta)
+        if len(tarefa) >= tamanho:
+            yield tarefa
+            tarefa = []
+    if tarefa:
+        yield tarefa
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(int(len(ordenados) * p), len(ordenados) - 1)]
+
+
+def relatorio(registros_por_intencao: dict, latencias_llm: list, segundos: float) -> dict:
+    total = sum(len(v) for v in registros_por_intencao.values())
+    intencoes = {}
+    for intencao, latencias in sorted(registros_por_intencao.items(), key=lambda kv: -len(kv[1])):
+        intencoes[intencao] = {
+            "total": len(latencias),
+            "percentual": len(latencias) / total * 100 if total else 0.0,
+            "p50_ms": _percentil(latencias, 0.50),
+            "p95_ms": _percentil(latencias, 0.95),
+            "p99_ms": _percentil(latencias, 0.99),
+        }
+    saida = {
+        "perguntas": total,
+        "segundos": segundos,
+        "perguntas_por_s": total / segundos if segundos else 0.0,
+        "taxa_nao_mapeado": len(registros_por_intencao.get("nao_mapeado", [])) / total if total else 0.0,
+        "intencoes": intencoes,
+    }
+    if latencias_llm:
+        saida["llm"] = {
+            "chamadas": len(latencias_llm),
+            "p50_ms": _percentil(latencias_llm, 0.50),
+            "p95_ms": _percentil(latencias_llm, 0.95),
+            "p99_ms": _percentil(latencias_llm, 0.99),
+        }
+    return saida
+
+
+def imprimir_relatorio(r: dict):
+    print(
+        f"\n{r['perguntas']:,} perguntas em {r['segundos']:.1f}s ({r['perguntas_por_s']:,.0f}/s) | "
+        f"nao_mapeado: {r['taxa_nao_mapeado']:.1%}"
+    )
+    print(f"{'intenção':<24}{'total':>9}{'%':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for intencao, i in r["intencoes"].items():
+        print(
+            f"{intencao:<24}{i['total']:>9,}{i['percentual']:>7.1f}%"
+            f"{i['p50_ms']:>10.2f}{i['p95_ms']:>10.2f}{i['p99_ms']:>10.2f}"
+        )
+    if "llm" in r:
+        ia = r["llm"]
+        print(f"{'(IA)':<24}{ia['chamadas']:>9,}{'':>8}{ia['p50_ms']:>10.1f}{ia['p95_ms']:>10.1f}{ia['p99_ms']:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("entrada", help="JSONL de perguntas ('-' para stdin)")
+    parser.add_argument("--saida", help="JSONL de resultados (padrão: não grava)")
+    parser.add_argument("--relatorio", help="grava o relatório também em JSON")
+    parser.add_argument("--campo", default="pergunta", help="campo com a pergunta em cada linha")
+    parser.add_argument("--pasta", default=PASTA_DADOS)
+    parser.add_argument("--backend", choices=["pandas", "duckdb"])
+    parser.add_argument("--processos", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--perguntas-por-tarefa", type=int, default=PERGUNTAS_POR_TAREFA)
+    parser.add_argument(
+        "--sem-cache", action="store_true", help="recalcula toda pergunta (mede o cálculo, não o cache)"
+    )
+    parser.add_argument("--llm-stub", action="store_true", help="inclui a explicação por IA contra o stub local")
+    parser.add_argument("--atraso-stub", type=float, default=0.0, help="latência simulada do stub (s)")
+    parser.add_argument("--modelo", default="stub")
+    args = parser.parse_args()
+
+    llm_url, servidor = None, None
+    if args.llm_stub:
+        from stub_llm import iniciar_stub
+
+        servidor, llm_url = iniciar_stub(atraso=args.atraso_stub)
+
+    # valida/reconstrói o cache colunar uma vez antes de subir os processos (cada um só lê)
+    versao_dados(args.pasta)
+
+    latencias = defaultdict(list)
+    latencias_llm = []
+    saida = open(args.saida, "w", encoding="utf-8") if args.saida else None
+    inicio = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(
+            max_workers=max(args.processos, 1),
+            initializer=_iniciar_processo,
+            initargs=(args.pasta, args.backend, not args.sem_cache, llm_url, args.modelo),
+        ) as pool:
+            em_voo = deque()
+            tarefas = _em_tarefas(ler_perguntas(args.entrada, args.campo), args.perguntas_por_tarefa)
+            limite = max(args.processos, 1) * TAREFAS_EM_VOO_POR_PROCESSO
+            while True:
+                while len(em_voo) < limite:
+                    tarefa = next(tarefas, None)
+                    if tarefa is None:
+                        break
+                    em_voo.append(pool.submit(_avaliar, tarefa))
+                if not em_voo:
+                    break
+                # resultados gravados na ordem de entrada
+                for registro in em_voo.popleft().result():
+                    latencias[registro["intencao"]].append(registro["latencia_ms"])
+                    if "latencia_llm_ms" in registro:
+                        latencias_llm.append(registro["latencia_llm_ms"])
+                    if saida:
+                        saida.write(json.dumps(registro, ensure_ascii=False) + "\n")
+    finally:
+        if saida:
+            saida.close()
+        if servidor:
+            servidor.shutdown()
+
+    r = relatorio(latencias, latencias_llm, time.perf_counter() - inicio)
+    imprimir_relatorio(r)
+    if args.relatorio:
+        with open(args.relatorio, "w", encoding="utf-8") as f:
+            json.dump(r, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# benchmarks/bench_cache_llm.py
+"""Latência da explicação por IA com e sem o cache em disco, contra o stub local (sem rede).
+
+Uso:
+    python benchmarks/bench_cache_llm.py --atraso 0.8 --repeticoes 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import llm  # noqa: E402
+from cache_llm import CacheLLM  # noqa: E402
+from stub_llm import iniciar_stub  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--atraso", type=float, default=0.5, help="latência simulada do modelo (s)")
+    parser.add_argument("--repeticoes", type=int, default=10)
+    args = parser.parse_args()
+
+    from openai import OpenAI
+
+    servidor, url = iniciar_stub(atraso=args.atraso)
+    client = OpenAI(base_url=url, api_key="stub")
+    llm._cache_llm = CacheLLM(os.path.join(tempfile.mkdtemp(), "llm.sqlite"))
+
+    resultado = {"titulo": "Ticket médio (pedidos faturados)", "valor": 301.8, "detalhe": {"soma_total": 4263218.32}}
+    tempos = []
+    for i in range(args.repeticoes):
+        pergunta = "Qual é o ticket médio?" if i % 2 == 0 else "  qual é o TICKET médio? "
+        inicio = time.perf_counter()
+        _, erro = llm.ask_model_explain(client, "stub-model", pergunta, resultado)
+        tempos.append(time.perf_counter() - inicio)
+        if erro:
+            raise SystemExit(erro)
+
+    stats = llm.obter_cache_llm().estatisticas()
+    print(f"primeira chamada (falha no cache): {tempos[0] * 1000:8.1f} ms")
+    print(f"demais chamadas (média, cache):   {sum(tempos[1:]) / max(len(tempos) - 1, 1) * 1000:8.1f} ms")
+    print(f"requisições ao stub: {servidor.chamadas} | acertos {stats['acertos']} | falhas {stats['falhas']}")
+    servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# benchmarks/bench_carregamento.py
+"""Compara o carregamento frio (CSV -> cache colunar) com o carregamento quente (cache mapeado).
+
+Uso:
+    python benchmarks/bench_carregamento.py --pasta data --repeticoes 5
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dados  # noqa: E402
+
+
+def cronometrar(fn, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        fn()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos), sum(tempos) / len(tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pasta", default=dados.PASTA_DADOS)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    def csv_direto():
+        for arquivo in dados.ARQUIVOS.values():
+            pd.read_csv(os.path.join(args.pasta, arquivo), encoding="utf-8")
+
+    def frio():
+        dados.limpar_cache(args.pasta)
+        dados.carregar_tabelas(args.pasta)
+
+    def quente():
+        dados.carregar_tabelas(args.pasta)
+
+    resultados = {
+        "csv (read_csv, comportamento anterior)": cronometrar(csv_direto, args.repeticoes),
+        "frio (csv + construção do cache)": cronometrar(frio, args.repeticoes),
+        "quente (cache colunar mapeado)": cronometrar(quente, args.repeticoes),
+    }
+    for nome, (melhor, media) in resultados.items():
+        print(f"{nome:<42} melhor {melhor * 1000:9.1f} ms | média {media * 1000:9.1f} ms")
+
+    base = resultados["csv (read_csv, comportamento anterior)"][0]
+    print(f"\nGanho do carregamento quente sobre o CSV: {base / resultados['quente (cache colunar mapeado)'][0]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
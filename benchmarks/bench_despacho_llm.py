@@ -0,0 +1,136 @@
+# benchmarks/bench_despacho_llm.py
+"""Despacho das chamadas ao modelo (despacho_llm.py) contra o stub local: coalescência, limites e prazo.
+
+Vários analistas fazem ao mesmo tempo um punhado de perguntas repetidas. Compara a chamada direta de
+cada um (como o app fazia) com o despacho: requisições que chegam ao stub, pico de requisições
+simultâneas, latência e espera na fila. Depois confere o balde de tokens (perguntas distintas em
+sequência rápida) e o prazo (stub mais lento que o timeout).
+
+Uso:
+    python benchmarks/bench_despacho_llm.py --analistas 24 --distintas 6 --atraso 0.5
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import llm  # noqa: E402
+from despacho_llm import DespachoLLM  # noqa: E402
+from stub_llm import iniciar_stub  # noqa: E402
+
+RESULTADO = {"titulo": "Ticket médio (pedidos faturados)", "valor": 301.8, "detalhe": {"soma_total": 4263218.32}}
+
+
+def _em_paralelo(funcao, n: int):
+    """Roda funcao(i) em n threads liberadas juntas; devolve (latências, erros, tempo de parede)."""
+    latencias, erros = [None] * n, []
+    largada = threading.Barrier(n + 1)
+
+    def analista(i):
+        largada.wait()
+        inicio = time.perf_counter()
+        erro = funcao(i)
+        latencias[i] = time.perf_counter() - inicio
+        if erro:
+            erros.append(erro)
+
+    threads = [threading.Thread(target=analista, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    largada.wait()
+    inicio = time.perf_counter()
+    for t in threads:
+        t.join()
+    return latencias, erros, time.perf_counter() - inicio
+
+
+def _zerar(servidor):
+    servidor.chamadas = servidor.max_simultaneas = 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--analistas", type=int, default=24, help="threads perguntando ao mesmo tempo")
+    parser.add_argument("--distintas", type=int, default=6, help="perguntas diferentes entre os analistas")
+    parser.add_argument("--atraso", type=float, default=0.5, help="latência simulada do modelo (s)")
+    parser.add_argument("--max-concorrentes", type=int, default=4)
+    parser.add_argument("--taxa", type=float, default=8.0, help="requisições por segundo do balde")
+    parser.add_argument("--rajada", type=int, default=4)
+    args = parser.parse_args()
+
+    servidor, url = iniciar_stub(atraso=args.atraso)
+    cliente = llm.obter_cliente(url, "stub")
+    perguntas = [f"pergunta {i % args.distintas}" for i in range(args.analistas)]
+    messages = [[{"role": "user", "content": p}] for p in perguntas]
+
+    def direto(i):
+        try:
+            cliente.chat.completions.create(model="stub", messages=messages[i], temperature=0.1)
+        except Exception as e:
+            return str(e)
+
+    def despachado(i):
+        return llm.ask_model_explain(cliente, "stub", perguntas[i], RESULTADO, cache=False)[1]
+
+    def novo_despacho(**extra):
+        llm._despacho = DespachoLLM(
+            max_concorrentes=args.max_concorrentes, taxa=args.taxa, rajada=args.rajada, **extra
+        )
+        return llm._despacho
+
+    print(
+        f"{args.analistas} analistas, {args.distintas} perguntas distintas, stub {args.atraso * 1000:.0f} ms; "
+        f"despacho: {args.max_concorrentes} concorrentes, {args.taxa:g}/s (rajada {args.rajada})"
+    )
+    print(f"{'cenário':<26}{'requisições':>12}{'pico simult.':>13}{'p50 ms':>9}{'p95 ms':>9}{'parede ms':>11}  erros")
+    cenarios = [("chamada direta", direto, None), ("despacho", despachado, novo_despacho)]
+    for nome, funcao, preparar in cenarios:
+        despacho = preparar() if preparar else None
+        _zerar(servidor)
+        latencias, erros, parede = _em_paralelo(funcao, args.analistas)
+        ordenadas = sorted(latencias)
+        print(
+            f"{nome:<26}{servidor.chamadas:>12}{servidor.max_simultaneas:>13}"
+            f"{statistics.median(ordenadas) * 1000:>9.0f}{ordenadas[int(len(ordenadas) * 0.95) - 1] * 1000:>9.0f}"
+            f"{parede * 1000:>11.0f}  {len(erros)}"
+        )
+        if despacho:
+            e = despacho.estatisticas()
+            print(
+                f"{'':<26}coalescidas {e['coalescidas']} ({e['taxa_coalescencia']:.0%}) · "
+                f"espera na fila p50 {e['espera_p50_ms']:.0f} ms / p95 {e['espera_p95_ms']:.0f} ms"
+            )
+
+    # balde de tokens: perguntas todas distintas, a vazão não passa de `taxa` depois da rajada
+    distintas = max(args.rajada * 3, 12)
+    novo_despacho()
+    servidor.atraso = 0.0
+    _zerar(servidor)
+    _, erros, parede = _em_paralelo(lambda i: llm.ask_model_explain(cliente, "stub", f"única {i}", RESULTADO, cache=False)[1], distintas)
+    minimo = (distintas - args.rajada) / args.taxa
+    print(
+        f"balde de tokens: {distintas} perguntas distintas em {parede:.2f} s "
+        f"(mínimo esperado {minimo:.2f} s) · {servidor.chamadas} requisições · {len(erros)} erros"
+    )
+
+    # prazo: stub mais lento que o timeout de quem pergunta
+    despacho = novo_despacho(timeout=0.3)
+    servidor.atraso = 1.0
+    inicio = time.perf_counter()
+    _, erro = llm.ask_model_explain(cliente, "stub", "pergunta lenta", RESULTADO, cache=False)
+    espera = time.perf_counter() - inicio
+    time.sleep(1.2)  # a chamada abandonada termina no stub e libera a vaga
+    e = despacho.estatisticas()
+    print(
+        f"prazo de 0.3 s: desistiu em {espera:.2f} s ({erro}) · depois: {e['na_fila']} na fila, "
+        f"{e['em_execucao']} em execução, {e['tempo_esgotado']} tempo esgotado"
+    )
+    servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
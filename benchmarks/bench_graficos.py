@@ -0,0 +1,85 @@
+# benchmarks/bench_graficos.py
+"""Camada de gráficos (graficos.py) em dimensões de alta cardinalidade: montagem, JSON e tamanho.
+
+Para cada dimensão (pedidos por cliente, quantidade por produto, pedidos por forma de pagamento)
+compara a figura montada do zero com todas as categorias (como o app fazia), sem limite mas com
+WebGL, com o limite de categorias ("Outros") e a busca no cache por versão.
+
+Uso:
+    python benchmarks/bench_graficos.py --pasta /tmp/skyone-bench/1m
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import graficos  # noqa: E402
+from dados import PASTA_DADOS, obter_conjunto  # noqa: E402
+from graficos import ESPECIFICACOES, Especificacao, grafico, montar  # noqa: E402
+from motor import Consulta, executar  # noqa: E402
+
+
+def _antigo(esp: Especificacao, dados):
+    """Como o app clássico montava: px direto sobre a resposta inteira, SVG."""
+    import plotly.express as px
+
+    inicio = time.perf_counter()
+    if esp.tipo == "pizza":
+        fig = px.pie(dados, names=esp.rotulo, values=esp.valor, title=esp.titulo)
+    else:
+        fig = px.bar(dados, x=esp.rotulo, y=esp.valor, title=esp.titulo)
+    fig.update_layout(template="plotly_dark")
+    construcao = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    tamanho = len(fig.to_json())
+    return construcao, time.perf_counter() - inicio, tamanho
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pasta", default=PASTA_DADOS)
+    args = parser.parse_args()
+
+    conjunto = obter_conjunto(args.pasta, "pandas")
+    fatos = conjunto.fatos
+    por_cliente = fatos.pedidos.groupby("CodigoClientePedido", observed=True).size().reset_index()
+    por_cliente.columns = ["Cliente", "Pedidos"]
+    por_cliente["Cliente"] = por_cliente["Cliente"].astype(str)
+    casos = {
+        "pedidos por cliente": (Especificacao("barras", "Cliente", "Pedidos", "Pedidos por cliente"), por_cliente),
+        "quantidade por produto": (
+            Especificacao("barras", "Produto", "Quantidade vendida", "Quantidade por produto"),
+            executar(Consulta(("quantidade",), ("produto",)), fatos),
+        ),
+        "formas de pagamento": (
+            ESPECIFICACOES["formas_pgto"],
+            executar(Consulta(("pedidos",), ("forma_pagamento",)), fatos).set_axis(["Forma de Pagamento", "Total"], axis=1),
+        ),
+    }
+
+    print(f"{'dimensão':<24}{'modo':<22}{'categorias':>11}{'montagem ms':>13}{'JSON ms':>10}{'KB':>10}")
+    for nome, (esp, dados) in casos.items():
+        construcao, serializacao, tamanho = _antigo(esp, dados)
+        linhas = [("anterior (tudo, SVG)", len(dados), construcao, serializacao, tamanho)]
+        for modo, maximo in (("sem limite", None), (f"limite {graficos.MAX_CATEGORIAS}", graficos.MAX_CATEGORIAS)):
+            g = montar(esp, dados, maximo=maximo)
+            modo += " + WebGL" if g.webgl else ""
+            linhas.append((modo, g.exibidas, g.segundos_construcao, g.segundos_serializacao, g.bytes_json))
+
+        graficos.ESPECIFICACOES["_bench"] = esp  # só neste processo: grafico() procura a especificação pela intenção
+        grafico("_bench", dados, f"bench-{nome}")
+        inicio = time.perf_counter()
+        grafico("_bench", dados, f"bench-{nome}")
+        linhas.append(("cache por versão", linhas[-1][1], time.perf_counter() - inicio, 0.0, linhas[-1][4]))
+
+        for modo, categorias, construcao, serializacao, tamanho in linhas:
+            print(
+                f"{nome:<24}{modo:<22}{categorias:>11,}{construcao * 1000:>13.1f}"
+                f"{serializacao * 1000:>10.1f}{tamanho / 1024:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
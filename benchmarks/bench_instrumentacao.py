@@ -0,0 +1,60 @@
+# benchmarks/bench_instrumentacao.py
+"""Custo da instrumentação no caminho quente: route_question com ela desligada vs. ligada.
+
+Mede com e sem o cache de respostas (sem cache, cada pergunta passa pelo motor). Ao final
+imprime o resumo das etapas medidas na rodada ligada.
+
+Uso:
+    python benchmarks/bench_instrumentacao.py --pasta data --repeticoes 2000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import instrumentacao  # noqa: E402
+from consultas import route_question  # noqa: E402
+from dados import PASTA_DADOS, obter_conjunto  # noqa: E402
+
+PERGUNTAS = [
+    "qual o ticket médio?",
+    "top produtos",
+    "formas de pagamento",
+    "status dos pedidos",
+    "ticket médio por tipo de cliente",
+    "quantidade por produto",
+]
+
+
+def rodada(conjunto, repeticoes: int, usar_cache: bool) -> float:
+    inicio = time.perf_counter()
+    for i in range(repeticoes):
+        route_question(PERGUNTAS[i % len(PERGUNTAS)], conjunto, usar_cache=usar_cache)
+    return (time.perf_counter() - inicio) / repeticoes * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pasta", default=PASTA_DADOS)
+    parser.add_argument("--backend", choices=["pandas", "duckdb"])
+    parser.add_argument("--repeticoes", type=int, default=2000)
+    args = parser.parse_args()
+
+    conjunto = obter_conjunto(args.pasta, args.backend)
+    print(f"{'cenário':<12} {'desligada µs':>14} {'ligada µs':>11} {'custo':>8}")
+    for usar_cache, nome, repeticoes in ((True, "com cache", args.repeticoes), (False, "sem cache", args.repeticoes // 10)):
+        rodada(conjunto, len(PERGUNTAS), usar_cache)  # aquece cache e motor
+        instrumentacao.ativar(False)
+        desligada = rodada(conjunto, repeticoes, usar_cache)
+        instrumentacao.ativar(True)
+        ligada = rodada(conjunto, repeticoes, usar_cache)
+        print(f"{nome:<12} {desligada:>14.1f} {ligada:>11.1f} {(ligada - desligada) / desligada:>8.1%}")
+    print(json.dumps(instrumentacao.resumo(), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+# benchmarks/bench_intencoes.py
+"""Roteador anterior (cadeia de `in`) vs. índice compilado de intencoes.py: acerto e perguntas/s.
+
+O corpus é gerado a partir de modelos rotulados com variações reais de digitação: sem acento, caixa,
+pontuação, prefixos ("me mostre..."), sinônimos e um erro de digitação por pergunta em parte delas,
+além de perguntas fora do escopo (devem ficar `nao_mapeado`). Cada `nao_mapeado` indevido é uma
+chamada paga e lenta ao modelo no app. Com --entrada, compara também os dois roteadores num log real.
+
+Uso:
+    python benchmarks/bench_intencoes.py --perguntas 200000
+    python benchmarks/bench_intencoes.py --entrada perguntas.jsonl
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import unicodedata
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from intencoes import interpretar, termo_canonico  # noqa: E402
+from motor import DIMENSOES, METRICAS  # noqa: E402
+
+# (intenção esperada, parâmetros esperados, modelos)
+MODELOS = [
+    ("ticket_medio", {}, ["qual o ticket médio?", "ticket médio", "ticket medio dos pedidos", "valor do ticket médio"]),
+    ("desconto_medio", {}, ["desconto médio", "qual o desconto medio?", "desconto médio dos pedidos", "média de desconto"]),
+    ("top_produtos", {}, ["top produtos", "produtos mais vendidos", "quais os produtos mais vendidos?"]),
+    ("top_produtos", {"n": 10}, ["top 10 produtos", "os 10 produtos mais vendidos", "top dez produtos"]),
+    ("formas_pgto", {}, ["formas de pagamento", "quais as formas de pagamento?", "forma de pagamento mais usada"]),
+    ("frete_gratis", {}, ["frete grátis", "quantos pedidos com frete gratis", "pedidos com frete grátis"]),
+    ("status_pedidos", {}, ["status dos pedidos", "situação dos pedidos", "qual o status dos pedidos?"]),
+    ("tipo_cliente", {}, ["tipo de cliente", "clientes por tipo de cliente", "quantos clientes jurídicos?", "pessoa jurídica"]),
+    (
+        "metricas_por_dimensao",
+        {"metricas": ("ticket_medio",), "dimensoes": ("tipo_cliente",)},
+        ["ticket médio por tipo de cliente", "qual o ticket medio por tipo de cliente?"],
+    ),
+    (
+        "metricas_por_dimensao",
+        {"metricas": ("faturamento",), "dimensoes": ("forma_pagamento",)},
+        ["faturamento por forma de pagamento", "faturamento por formas de pagamento"],
+    ),
+    (
+        "metricas_por_dimensao",
+        {"metricas": ("desconto_medio",), "dimensoes": ("situacao",)},
+        ["desconto médio por status", "desconto medio por situação"],
+    ),
+    (
+        "metricas_por_dimensao",
+        {"metricas": ("quantidade",), "dimensoes": ("produto",)},
+        ["quantidade por produto", "quantidade vendida por produto"],
+    ),
+    (
+        "metricas_por_dimensao",
+        {"metricas": ("pedidos",), "dimensoes": ("situacao",)},
+        ["quantos pedidos por status", "número de pedidos por situação"],
+    ),
+    ("nao_mapeado", {}, [
+        "qual a previsão do tempo?", "quem é o melhor vendedor?", "como está o estoque?",
+        "qual o prazo de entrega?", "resuma os dados", "quais clientes compraram ontem?",
+        "qual o lucro líquido?", "explique a sazonalidade das vendas",
+    ]),
+]
+PREFIXOS = ["", "", "me mostre ", "quero saber ", "por favor, ", "Olá! "]
+
+
+# ------------------------------------------------------------------
+# Roteador anterior (substrings, sensível a acento), mantido aqui só para comparação
+# ------------------------------------------------------------------
+_FRASES_METRICAS = {
+    "ticket_medio": [("ticket", "médio"), ("ticket", "medio")],
+    "desconto_medio": [("desconto", "médio")],
+    "faturamento": [("faturamento",)],
+    "quantidade": [("quantidade",), ("itens vendidos",)],
+    "pedidos": [("quantos pedidos",), ("número de pedidos",), ("numero de pedidos",), ("total de pedidos",)],
+}
+_FRASES_DIMENSOES = {
+    "tipo_cliente": ["por tipo de cliente", "por tipo cliente"],
+    "forma_pagamento": ["por forma de pagamento", "por formas de pagamento"],
+    "situacao": ["por status", "por situação", "por situacao"],
+    "produto": ["por produto"],
+}
+_INTENCOES_FIXAS = [
+    ("ticket_medio", [("ticket", "médio"), ("ticket", "medio")]),
+    ("desconto_medio", [("desconto", "médio")]),
+    ("top_produtos", [("produtos mais vendidos",), ("top produtos",)]),
+    ("formas_pgto", [("forma de pagamento",), ("formas de pagamento",)]),
+    ("frete_gratis", [("frete grátis",), ("frete gratis",)]),
+    ("status_pedidos", [("status",)]),
+    ("tipo_cliente", [("tipo de cliente",), ("cliente físico",), ("cliente juridico",), ("jurídico",)]),
+]
+
+
+def _casa(q, gatilhos):
+    return any(all(termo in q for termo in gatilho) for gatilho in gatilhos)
+
+
+def interpretar_anterior(pergunta: str):
+    q = pergunta.lower()
+    metricas = tuple(m for m, gatilhos in _FRASES_METRICAS.items() if _casa(q, gatilhos))
+    tabelas = {METRICAS[m].tabela for m in metricas}
+    dimensoes = tuple(
+        d for d, frases in _FRASES_DIMENSOES.items()
+        if any(f in q for f in frases) and tabelas <= DIMENSOES[d].colunas.keys()
+    )
+    if metricas and dimensoes:
+        return "metricas_por_dimensao", {"metricas": metricas, "dimensoes": dimensoes}
+    for intencao, gatilhos in _INTENCOES_FIXAS:
+        if _casa(q, gatilhos):
+            return intencao, {}
+    return "nao_mapeado", {}
+
+
+# ------------------------------------------------------------------
+# Corpus
+# ------------------------------------------------------------------
+def _sem_acento(texto):
+    return unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+
+
+def _erro_digitacao(texto, rng):
+    """Troca duas letras vizinhas ou apaga uma, numa palavra de 6+ letras."""
+    palavras = texto.split(" ")
+    candidatas = [i for i, p in enumerate(palavras) if len(p) >= 6 and p.isalpha()]
+    if not candidatas:
+        return texto
+    i = rng.choice(candidatas)
+    p = palavras[i]
+    j = rng.randrange(1, len(p) - 2)
+    palavras[i] = p[:j] + p[j + 1] + p[j] + p[j + 2 :] if rng.random() < 0.5 else p[:j] + p[j + 1 :]
+    return " ".join(palavras)
+
+
+def gerar_corpus(n: int, semente: int = 7, taxa_sem_acento=0.35, taxa_erro=0.15):
+    rng = random.Random(semente)
+    corpus = []
+    for _ in range(n):
+        intencao, parametros, modelos = rng.choice(MODELOS)
+        texto = rng.choice(PREFIXOS) + rng.choice(modelos)
+        if rng.random() < taxa_sem_acento:
+            texto = _sem_acento(texto)
+        if rng.random() < taxa_erro and intencao != "nao_mapeado":
+            texto = _erro_digitacao(texto, rng)
+        r = rng.random()
+        texto = texto.upper() if r < 0.05 else texto.capitalize() if r < 0.3 else texto
+        corpus.append((texto, intencao, parametros))
+    return corpus
+
+
+def avaliar(nome, funcao, corpus):
+    inicio = time.perf_counter()
+    respostas = [funcao(p) for p, _, _ in corpus]
+    segundos = time.perf_counter() - inicio
+    certas = sum(r == (i, par) for r, (_, i, par) in zip(respostas, corpus))
+    esperadas = sum(i != "nao_mapeado" for _, i, _ in corpus)
+    falso_nao_mapeado = sum(r[0] == "nao_mapeado" and i != "nao_mapeado" for r, (_, i, _) in zip(respostas, corpus))
+    errada = sum(r[0] not in ("nao_mapeado", i) for r, (_, i, _) in zip(respostas, corpus))
+    print(
+        f"{nome:<22}{len(corpus) / segundos:>12,.0f}{certas / len(corpus):>9.1%}"
+        f"{falso_nao_mapeado / esperadas:>14.1%}{errada / len(corpus):>13.2%}"
+    )
+    return respostas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--perguntas", type=int, default=200_000)
+    parser.add_argument("--semente", type=int, default=7)
+    parser.add_argument("--entrada", help="JSONL de perguntas reais (mesmo formato de avaliar_perguntas.py)")
+    parser.add_argument("--campo", default="pergunta")
+    args = parser.parse_args()
+
+    corpus = gerar_corpus(args.perguntas, args.semente)
+    print(f"{len(corpus):,} perguntas sintéticas ({len({p for p, _, _ in corpus}):,} distintas)")
+    print(f"{'roteador':<22}{'perguntas/s':>12}{'acerto':>9}{'nao_mapeado*':>14}{'intenção ≠':>13}")
+    avaliar("anterior (in)", interpretar_anterior, corpus)
+    termo_canonico.cache_clear()
+    avaliar("índice (frio)", interpretar, corpus[: max(len(corpus) // 20, 1)])
+    novas = avaliar("índice", interpretar, corpus)
+    print("* entre as perguntas que têm resposta determinística")
+
+    erros = Counter((p, r[0], i) for (p, i, par), r in zip(corpus, novas) if r != (i, par))
+    if erros:
+        print("\nErros mais comuns do índice (pergunta, obtida, esperada):")
+        for (p, obtida, esperada), n in erros.most_common(10):
+            print(f"  {n:>6} × {p!r}: {obtida} ≠ {esperada}")
+
+    if args.entrada:
+        from avaliar_perguntas import ler_perguntas
+
+        perguntas = list(ler_perguntas(args.entrada, args.campo))
+        antes = Counter(interpretar_anterior(p)[0] for p in perguntas)
+        depois = Counter(interpretar(p)[0] for p in perguntas)
+        print(f"\nLog real ({len(perguntas):,} perguntas): intenção — anterior → índice")
+        for intencao in sorted(set(antes) | set(depois), key=lambda i: -depois[i]):
+            print(f"  {intencao:<24}{antes[intencao]:>9,} →{depois[intencao]:>9,}")
+
+
+if __name__ == "__main__":
+    main()
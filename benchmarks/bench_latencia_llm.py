@@ -0,0 +1,73 @@
+# benchmarks/bench_latencia_llm.py
+"""Detalhamento de latência (conexão, primeiro token, total) contra o stub local, sem rede.
+
+Compara o comportamento anterior (cliente novo a cada rerun, resposta bloqueante) com o cliente
+do processo (pool keep-alive) em modo bloqueante e em fluxo.
+
+Uso:
+    python benchmarks/bench_latencia_llm.py --atraso 0.3 --atraso-token 0.02 --repeticoes 10
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import llm  # noqa: E402
+from despacho_llm import DespachoLLM  # noqa: E402
+from stub_llm import iniciar_stub  # noqa: E402
+
+RESULTADO = {"titulo": "Ticket médio (pedidos faturados)", "valor": 301.8, "detalhe": {"soma_total": 4263218.32}}
+
+
+def medir_bloqueante(fabrica_cliente, repeticoes):
+    totais = []
+    for i in range(repeticoes):
+        inicio = time.perf_counter()
+        _, erro = llm.ask_model_explain(fabrica_cliente(), "stub", f"pergunta {i}", RESULTADO, cache=False)
+        if erro:
+            raise SystemExit(erro)
+        totais.append(time.perf_counter() - inicio)
+    # sem fluxo, o primeiro token só aparece junto com a resposta inteira
+    return {"conexao": totais, "primeiro_token": totais, "total": totais}
+
+
+def medir_fluxo(cliente, repeticoes):
+    tempos = {"conexao": [], "primeiro_token": [], "total": []}
+    for i in range(repeticoes):
+        latencia = llm.Latencia()
+        for _ in llm.ask_model_explain_stream(cliente, "stub", f"pergunta {i}", RESULTADO, cache=False, latencia=latencia):
+            pass
+        for campo in tempos:
+            tempos[campo].append(getattr(latencia, campo))
+    return tempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--atraso", type=float, default=0.2, help="tempo simulado até os cabeçalhos (s)")
+    parser.add_argument("--atraso-token", type=float, default=0.02, help="intervalo simulado entre tokens (s)")
+    parser.add_argument("--repeticoes", type=int, default=10)
+    args = parser.parse_args()
+
+    from openai import OpenAI
+
+    servidor, url = iniciar_stub(atraso=args.atraso, atraso_token=args.atraso_token)
+    # só a latência da chamada: sem o limite de taxa do despacho (chamadas em sequência rápida)
+    llm._despacho = DespachoLLM(taxa=1e6, rajada=1e6)
+    cenarios = {
+        "cliente novo por chamada, bloqueante": medir_bloqueante(lambda: OpenAI(base_url=url, api_key="stub"), args.repeticoes),
+        "cliente do processo, bloqueante": medir_bloqueante(lambda: llm.obter_cliente(url, "stub"), args.repeticoes),
+        "cliente do processo, em fluxo": medir_fluxo(llm.obter_cliente(url, "stub"), args.repeticoes),
+    }
+    print(f"{'cenário':<40} {'conexão':>10} {'1º token':>10} {'total':>10}   (mediana, ms)")
+    for nome, tempos in cenarios.items():
+        colunas = " ".join(f"{statistics.median(tempos[c]) * 1000:>10.1f}" for c in ("conexao", "primeiro_token", "total"))
+        print(f"{nome:<40} {colunas}")
+    servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# benchmarks/bench_partida.py
+"""Tempo até a primeira tela: primeira execução do script do app num processo novo, com e sem aquecimento.
+
+Cada cenário roda num subprocesso que faz o papel do servidor recém-subido: importa o Streamlit (o
+servidor já o tem importado e o runtime de pé antes de qualquer sessão), opcionalmente roda
+aquecimento.aquecer e só então mede a primeira execução completa do script (streamlit.testing.AppTest), que é o que a primeira
+sessão espera para ver a tela. Cenários:
+
+  deploy novo      sem cache colunar em disco: a primeira sessão lê os CSVs
+  sem aquecimento  cache em disco, mas carga, fatos e KPIs na primeira sessão
+  com aquecimento  aquecimento.aquecer() antes da sessão (o que `python aquecimento.py` faz)
+
+Mostra também quanto custam os imports adiados (plotly.express, openai) num processo novo.
+
+Uso:
+    python benchmarks/bench_partida.py
+    python benchmarks/bench_partida.py --app app_classico.py --pasta /tmp/skyone-bench/1m --repeticoes 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+CENARIOS = ("deploy novo", "sem aquecimento", "com aquecimento")
+
+
+def primeira_tela(app: str, cenario: str) -> dict:
+    """Roda no subprocesso (cwd com `data` apontando para a pasta medida)."""
+    from streamlit.testing.v1 import AppTest
+
+    import aquecimento
+    import dados
+
+    # a primeira execução do AppTest inicializa o runtime (~200 ms), que num servidor já está de pé
+    AppTest.from_string("import streamlit as st\nst.empty()").run()
+
+    resultado = {}
+    if cenario == "deploy novo":
+        dados.limpar_cache()
+    elif cenario == "com aquecimento":
+        inicio = time.perf_counter()
+        aquecimento.aquecer(backend=aquecimento.BACKEND_DOS_APPS.get(app))
+        resultado["aquecimento_s"] = time.perf_counter() - inicio
+
+    at = AppTest.from_file(os.path.join(RAIZ, app), default_timeout=600)
+    if hasattr(at, "_bidi_component_manager"):
+        # o servidor varre os componentes instalados uma vez, ao subir; o AppTest faria isso dentro
+        # da medida (e mais devagar quanto mais pacotes importados, ex.: depois do aquecimento)
+        from streamlit.components.v2.component_manager import BidiComponentManager
+
+        at._bidi_component_manager = BidiComponentManager()
+        at._bidi_component_manager.discover_and_register_components(start_file_watching=False)
+    inicio = time.perf_counter()
+    at.run()
+    resultado["primeira_tela_s"] = time.perf_counter() - inicio
+    if at.exception:
+        resultado["erro"] = str(at.exception[0].value)
+    return resultado
+
+
+def custo_import(modulo: str) -> float:
+    codigo = f"import time; t = time.perf_counter(); import {modulo}; print(time.perf_counter() - t)"
+    saida = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True)
+    return float(saida.stdout) if saida.returncode == 0 else None
+
+
+def _em_subprocesso(app: str, cenario: str, cwd: str) -> dict:
+    comando = [sys.executable, os.path.abspath(__file__), "--app", app, "--cenario", cenario]
+    saida = subprocess.run(comando, capture_output=True, text=True, cwd=cwd)
+    if saida.returncode != 0:
+        erro = saida.stderr.strip().splitlines()
+        return {"erro": erro[-1] if erro else f"código {saida.returncode}"}
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default="app.py", choices=["app.py", "app_classico.py"])
+    parser.add_argument("--pasta", default=os.path.join(RAIZ, "data"), help="pasta de dados medida")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--cenario", choices=CENARIOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.cenario:
+        sys.stdout.write("\n")  # separa do que o Streamlit imprimir
+        print(json.dumps(primeira_tela(args.app, args.cenario)))
+        return
+
+    # os apps leem a pasta relativa `data`: cada subprocesso roda numa pasta com o link para a medida
+    with tempfile.TemporaryDirectory() as cwd:
+        os.symlink(os.path.abspath(args.pasta), os.path.join(cwd, "data"))
+        print(f"{args.app} sobre {args.pasta} (mediana de {args.repeticoes})")
+        print(f"{'cenário':<18}{'primeira tela ms':>18}{'aquecimento ms':>16}")
+        for cenario in CENARIOS:
+            medidas = [_em_subprocesso(args.app, cenario, cwd) for _ in range(args.repeticoes)]
+            erros = [m["erro"] for m in medidas if "erro" in m]
+            if erros:
+                print(f"{cenario:<18}  ❌ {erros[0]}")
+                continue
+            tela = sorted(m["primeira_tela_s"] for m in medidas)[len(medidas) // 2]
+            aquecimento = sorted(m.get("aquecimento_s", 0.0) for m in medidas)[len(medidas) // 2]
+            print(f"{cenario:<18}{tela * 1000:>18.0f}{aquecimento * 1000 if aquecimento else float('nan'):>16.0f}")
+
+    print("\nImports adiados (processo novo; pagos só no primeiro gráfico/chamada à IA, ou no aquecimento):")
+    for modulo in ("plotly.express", "openai"):
+        segundos = custo_import(modulo)
+        print(f"  {modulo:<16}" + (f"{segundos * 1000:>8.0f} ms" if segundos is not None else "  não instalado"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# benchmarks/bench_periodos.py
+"""Perguntas com período: somar células dos cubos (cubos.py) x filtrar os pedidos a cada pergunta.
+
+Para cada pergunta, o tempo de responder pelos cubos (consultas.responder com `cubos`) e o de filtrar
+pedidos e itens do período e rodar o motor sobre o recorte (o que seria feito sem os cubos); confere
+que os números batem. Os períodos relativos ("mês passado") são resolvidos contra o último dia com
+pedidos, para caírem dentro dos dados gerados.
+
+Uso:
+    python benchmarks/bench_periodos.py --pasta /tmp/skyone-bench/1m
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from consultas import responder  # noqa: E402
+from cubos import COLUNA_DATA, _dias, construir_cubos  # noqa: E402
+from dados import PASTA_DADOS, obter_conjunto  # noqa: E402
+from fatos import Fatos  # noqa: E402
+from incremental import _celulas, _mesmo_valor  # noqa: E402
+from intencoes import interpretar  # noqa: E402
+from periodos import Periodo  # noqa: E402
+
+PERGUNTAS = [
+    "ticket médio do mês passado",
+    "desconto médio no último trimestre",
+    "top 10 produtos este ano",
+    "faturamento por forma de pagamento nos últimos 90 dias",
+    "ticket médio por tipo de cliente em 2024",
+    "quantidade por produto de 15/02/2024 a 10/05/2024",
+    "status dos pedidos nos últimos 7 dias",
+]
+
+
+def _melhor(funcao, repeticoes: int) -> float:
+    melhor = math.inf
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def filtrando(fatos, dias, intencao: str, parametros: dict):
+    """Sem cubos: recorta pedidos e itens do período e responde pelo motor."""
+    periodo = Periodo.de_parametro(parametros["periodo"])
+    no_periodo = (dias >= np.datetime64(periodo.inicio, "ns")) & (dias <= np.datetime64(periodo.fim, "ns"))
+    pedidos = fatos.pedidos[no_periodo]
+    itens = fatos.itens[fatos.itens["CodigoPedidoItem"].isin(pedidos["CodigoPedido"]).to_numpy()]
+    recorte = Fatos(pedidos, itens, fatos.clientes, fatos.produtos, None, None)
+    return responder(intencao, {k: v for k, v in parametros.items() if k != "periodo"}, recorte)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pasta", default=PASTA_DADOS)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    fatos = obter_conjunto(args.pasta, "pandas").fatos
+    inicio = time.perf_counter()
+    cubos = construir_cubos(fatos)
+    construcao = time.perf_counter() - inicio
+    memoria = sum(
+        int(c.memory_usage(deep=True).sum()) for c in (cubos.pedidos_dia, cubos.itens_dia, cubos.pedidos_mes, cubos.itens_mes)
+    )
+    print(
+        f"{len(fatos.pedidos):,} pedidos, {len(fatos.itens):,} itens · cubos montados em {construcao * 1000:.0f} ms "
+        f"({len(cubos.pedidos_dia) + len(cubos.itens_dia):,} células diárias, "
+        f"{len(cubos.pedidos_mes) + len(cubos.itens_mes):,} mensais, {memoria / 1024 ** 2:.1f} MB)"
+    )
+
+    dias = _dias(fatos.pedidos[COLUNA_DATA])  # a conversão de datas não entra na medida do filtro
+    print(f"{'pergunta':<56}{'cubos ms':>10}{'filtro ms':>11}{'ganho':>8}  mesmos números")
+    for pergunta in PERGUNTAS:
+        intencao, parametros = interpretar(pergunta, hoje=cubos.ultimo_dia)
+        if "periodo" not in parametros:
+            print(f"{pergunta:<56}  ❌ sem período ({intencao})")
+            continue
+        por_cubos = responder(intencao, parametros, fatos, cubos=cubos)
+        por_filtro = filtrando(fatos, dias, intencao, parametros)
+        if isinstance(por_cubos, dict):
+            por_cubos = {k: v for k, v in por_cubos.items() if k != "periodo"}
+        a, b = _celulas(por_cubos), _celulas(por_filtro)
+        iguais = len(a) == len(b) and all(_mesmo_valor(x, y) for x, y in zip(a, b))
+        t_cubos = _melhor(lambda: responder(intencao, parametros, fatos, cubos=cubos), args.repeticoes)
+        t_filtro = _melhor(lambda: filtrando(fatos, dias, intencao, parametros), args.repeticoes)
+        print(
+            f"{pergunta:<56}{t_cubos * 1000:>10.2f}{t_filtro * 1000:>11.1f}"
+            f"{t_filtro / t_cubos:>7.0f}×  {'✔️' if iguais else '❌'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# benchmarks/bench_recuperacao.py
+"""Fallback da IA com o índice de fatos (recuperacao.py): construção, busca e contexto enviado ao modelo.
+
+Mede o tempo de montar o índice (trechos + BM25) e a latência da busca. Depois, para perguntas não
+mapeadas, compara três contextos: o resumo genérico de antes (consultas.dataset_min_snapshot,
+calculado a cada pergunta), todos os fatos do índice (contexto grande e genérico) e os k fatos mais
+relevantes no orçamento de tokens. Para cada um: tempo de montar o contexto, tokens do prompt, custo
+estimado, se o fato que responde a pergunta foi enviado e a latência ponta a ponta contra o stub,
+que demora mais para prompts maiores (--atraso-prompt).
+
+Uso:
+    python benchmarks/bench_recuperacao.py --pasta /tmp/skyone-bench/1m
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import llm  # noqa: E402
+from consultas import dataset_min_snapshot  # noqa: E402
+from contexto_llm import TOKENS_POR_NUMERO, estimar_tokens  # noqa: E402
+from cubos import obter_cubos  # noqa: E402
+from dados import PASTA_DADOS, obter_conjunto  # noqa: E402
+from despacho_llm import DespachoLLM  # noqa: E402
+from metricas import obter_agregados  # noqa: E402
+from recuperacao import construir_indice, gerar_trechos  # noqa: E402
+from stub_llm import iniciar_stub  # noqa: E402
+
+# (pergunta, trecho que tem de estar no contexto para ela ser respondível)
+PERGUNTAS = [
+    ("qual forma de pagamento tem o maior ticket?", "Forma de pagamento"),
+    ("clientes jurídicos compram mais que os físicos?", "Tipo de cliente Jurídica"),
+    ("quantos pedidos foram cancelados?", "Situação do pedido Cancelado"),
+    ("qual mês teve o maior faturamento?", "Meses com mais faturamento"),
+    ("quanto vendemos em março de 2024?", "Mês março de 2024"),
+    ("quais os produtos menos vendidos?", "menos vendidos"),
+    ("como está o produto 17?", "(código 17)"),
+    ("o pix é muito usado pelos clientes?", "Forma de pagamento Pix"),
+]
+
+
+def _ms(valores, p=0.5):
+    ordenados = sorted(valores)
+    return ordenados[min(int(len(ordenados) * p), len(ordenados) - 1)] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pasta", default=PASTA_DADOS)
+    parser.add_argument("--max-numbers", type=int, default=60, help="orçamento do app (slider): × 3 tokens")
+    parser.add_argument("--buscas", type=int, default=2000, help="buscas para os percentis de latência")
+    parser.add_argument("--atraso", type=float, default=0.2, help="latência fixa simulada do modelo (s)")
+    parser.add_argument("--atraso-prompt", type=float, default=0.05, help="latência simulada por mil tokens de prompt (s)")
+    parser.add_argument("--preco", type=float, default=0.5, help="US$ por milhão de tokens de entrada")
+    args = parser.parse_args()
+
+    conjunto = obter_conjunto(args.pasta, "pandas")
+    fatos, cubos, agregados = conjunto.fatos, obter_cubos(conjunto), obter_agregados(conjunto)
+    inicio = time.perf_counter()
+    trechos = gerar_trechos(fatos, cubos, agregados)
+    t_trechos = time.perf_counter() - inicio
+    indice = construir_indice(trechos, conjunto.versao)
+    print(
+        f"{len(fatos.pedidos):,} pedidos · índice: {len(trechos)} trechos, {len(indice.listas)} termos, "
+        f"{sum(t.tokens for t in trechos):,} tokens · trechos {t_trechos * 1000:.0f} ms + "
+        f"BM25 {indice.segundos_construcao * 1000:.1f} ms"
+    )
+
+    orcamento = args.max_numbers * TOKENS_POR_NUMERO
+    tempos = []
+    for i in range(args.buscas):
+        pergunta = PERGUNTAS[i % len(PERGUNTAS)][0]
+        inicio = time.perf_counter()
+        indice.selecionar(pergunta, orcamento)
+        tempos.append(time.perf_counter() - inicio)
+    print(f"busca + seleção: p50 {_ms(tempos) * 1000:.0f} µs · p95 {_ms(tempos, 0.95) * 1000:.0f} µs ({args.buscas} buscas)")
+
+    def generico(pergunta):
+        return llm._montar_pedido(pergunta, dataset_min_snapshot(fatos), args.max_numbers)
+
+    def todos(pergunta):
+        return llm._montar_pedido_fallback(pergunta, trechos)
+
+    def top_k(pergunta):
+        return llm._montar_pedido_fallback(pergunta, indice.selecionar(pergunta, orcamento))
+
+    servidor, url = iniciar_stub(atraso=args.atraso, atraso_por_mil_tokens=args.atraso_prompt)
+    cliente = llm.obter_cliente(url, "stub")
+    llm._despacho = DespachoLLM(taxa=1e6, rajada=1e6)  # só a latência da chamada, sem limite de taxa
+
+    print(
+        f"\n{'contexto':<28}{'montagem ms':>12}{'tokens':>9}{'US$/mil perguntas':>19}{'com o fato':>12}"
+        f"{'ponta a ponta ms':>18}"
+    )
+    for nome, montar in (("resumo genérico (anterior)", generico), ("todos os fatos", todos), ("top-k BM25", top_k)):
+        montagens, tokens, acertos, totais = [], [], 0, []
+        for pergunta, esperado in PERGUNTAS:
+            inicio = time.perf_counter()
+            messages, payload = montar(pergunta)
+            montagens.append(time.perf_counter() - inicio)
+            tokens.append(sum(estimar_tokens(m["content"]) for m in messages))
+            acertos += esperado in payload
+            _, erro = llm._chamar(cliente, "stub", pergunta, messages, payload, 0.1, False)
+            if erro:
+                raise SystemExit(erro)
+            totais.append(time.perf_counter() - inicio)
+        media_tokens = statistics.mean(tokens)
+        print(
+            f"{nome:<28}{_ms(montagens):>12.2f}{media_tokens:>9.0f}{media_tokens * args.preco / 1000:>19.3f}"
+            f"{f'{acertos}/{len(PERGUNTAS)}':>12}{_ms(totais):>18.0f}"
+        )
+    servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# benchmarks/bench_sessoes.py
+"""Pico de RSS com N sessões simuladas: cópia por sessão (st.cache_data) vs. conjunto compartilhado.
+
+st.cache_data guarda o retorno serializado e entrega um pickle.loads novo a cada chamada, então cada
+sessão segura sua própria cópia das quatro tabelas. dados.obter_conjunto entrega o mesmo objeto.
+Cada modo roda em um subprocesso separado para que o pico de um não contamine o outro.
+
+Uso:
+    python benchmarks/bench_sessoes.py --pasta data --sessoes 30
+"""
+import argparse
+import os
+import pickle
+import resource
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import dados  # noqa: E402
+
+
+def pico_rss_mb() -> float:
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (2**20 if sys.platform == "darwin" else 2**10)
+
+
+def executar_modo(modo: str, pasta: str, sessoes: int):
+    inicio = time.perf_counter()
+    abertas = []
+    if modo == "cache_data":
+        serializado = pickle.dumps(dados.carregar_tabelas(pasta))
+        for _ in range(sessoes):
+            abertas.append(pickle.loads(serializado))
+    else:
+        for _ in range(sessoes):
+            abertas.append(dados.obter_conjunto(pasta).tabelas())
+    # toca as tabelas como um rerun faria
+    total = sum(int(t[1].shape[0]) for t in abertas)
+    print(f"{modo};{pico_rss_mb():.1f};{time.perf_counter() - inicio:.3f};{total}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pasta", default=dados.PASTA_DADOS)
+    parser.add_argument("--sessoes", type=int, default=30)
+    parser.add_argument("--modo", choices=["cache_data", "compartilhado"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.modo:
+        executar_modo(args.modo, args.pasta, args.sessoes)
+        return
+
+    dados.versao_dados(args.pasta)  # garante o cache em disco antes de medir
+    print(f"{'modo':<15} {'pico RSS (MB)':>14} {'tempo (s)':>10}")
+    for modo in ("cache_data", "compartilhado"):
+        saida = subprocess.run(
+            [sys.executable, __file__, "--pasta", args.pasta, "--sessoes", str(args.sessoes), "--modo", modo],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip().splitlines()[-1]
+        _, rss, segundos, _ = saida.split(";")
+        print(f"{modo:<15} {float(rss):>14.1f} {float(segundos):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
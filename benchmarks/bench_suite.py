@@ -0,0 +1,244 @@
+# benchmarks/bench_suite.py
+"""Suíte de desempenho em escala: tempo e pico de memória de cada etapa do app sobre dados sintéticos.
+
+Para cada escala (gerar_dados.py; a pasta é reaproveitada se já foi gerada com os mesmos parâmetros)
+cada caso roda num subprocesso próprio: o conjunto é carregado, o pico de RSS é reiniciado e o caso é
+repetido; o "pico extra" é quanto o caso levou o RSS acima do conjunto já carregado. Os resultados
+podem ser gravados em JSON e comparados com uma execução anterior para pegar regressões.
+
+Uso:
+    python benchmarks/bench_suite.py --escalas 10k 1m --saida base.json
+    python benchmarks/bench_suite.py --escalas 10k 1m --comparar base.json --tolerancia 0.25
+    python benchmarks/bench_suite.py --pasta data --casos kpis top_produtos   # dados existentes
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import consultas  # noqa: E402
+import dados  # noqa: E402
+import exportacao  # noqa: E402
+import gerar_dados  # noqa: E402
+import incremental  # noqa: E402
+import metricas  # noqa: E402
+
+def _status_mb(campo: str):
+    """VmHWM/VmRSS de /proc (Linux): ao contrário de ru_maxrss, o pico não é herdado do processo pai."""
+    try:
+        with open("/proc/self/status") as f:
+            for linha in f:
+                if linha.startswith(campo + ":"):
+                    return int(linha.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def pico_rss_mb() -> float:
+    pico = _status_mb("VmHWM")
+    if pico is not None:
+        return pico
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (2**20 if sys.platform == "darwin" else 2**10)
+
+
+def zerar_pico() -> float:
+    """Reinicia o pico de RSS no valor atual (quando o kernel permite) e devolve a base para o 'pico extra'."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return _status_mb("VmRSS")
+    except OSError:
+        return pico_rss_mb()
+
+
+# ------------------------------------------------------------------
+# Casos: os de carga recebem (pasta, backend); os demais, o conjunto carregado
+# ------------------------------------------------------------------
+def _carga_fria(pasta, backend):
+    dados.limpar_cache(pasta)
+    dados._conjuntos.clear()
+    dados.obter_conjunto(pasta, backend)
+
+
+def _carga_quente(pasta, backend):
+    # o que carregar_dados() do app faz num processo novo: cache colunar já em disco
+    dados._conjuntos.clear()
+    dados.obter_conjunto(pasta, backend)
+
+
+def _kpis(conjunto):
+    # KPIs e respostas fixas de uma versão nova dos dados: a passada fundida de metricas.py
+    return metricas.passada_fundida(conjunto.fatos, conjunto.versao)
+
+
+def _kpis_motor(conjunto):
+    # o mesmo pelo motor (uma consulta por métrica/dimensão): referência da passada fundida
+    return incremental.recalcular_agregados(conjunto.fatos, conjunto.versao)
+
+
+def _kpis_agregados(conjunto):
+    # caminho do app com os agregados já gravados em disco
+    metricas._agregados.clear()
+    return metricas.kpis(conjunto)
+
+
+def _exportar(conjunto, formato, tabela="pedidos"):
+    # mesmo caminho do botão "Exportar" do app, sem o cache por versão (mede a geração)
+    shutil.rmtree(os.path.join(conjunto.pasta, dados.PASTA_CACHE, exportacao.PASTA_EXPORTACOES), ignore_errors=True)
+    return exportacao.exportar(tabela, formato, conjunto)
+
+
+CASOS = {
+    "carga_fria": _carga_fria,
+    "carga_quente": _carga_quente,
+    "answer_ticket_medio": lambda c: consultas.answer_ticket_medio(c.fatos),
+    "answer_desconto_medio": lambda c: consultas.answer_desconto_medio(c.fatos),
+    "top_produtos": lambda c: consultas.top_produtos(c.fatos),
+    "formas_pagamento": lambda c: consultas.formas_pagamento(c.fatos),
+    "status_pedidos": lambda c: consultas.status_pedidos(c.fatos),
+    "tipo_cliente": lambda c: consultas.tipo_cliente(c.fatos),
+    "frete_gratis": lambda c: consultas.frete_gratis(c.fatos),
+    "kpis": _kpis,
+    "kpis_motor": _kpis_motor,
+    "kpis_agregados": _kpis_agregados,
+    "exportar_xlsx": lambda c: _exportar(c, "xlsx"),
+    "exportar_csv_gz": lambda c: _exportar(c, "csv.gz"),
+    "exportar_parquet": lambda c: _exportar(c, "parquet"),
+}
+CASOS_CARGA = ("carga_fria", "carga_quente")
+CASOS_LENTOS = ("carga_fria", "exportar_xlsx", "exportar_csv_gz", "exportar_parquet")  # uma repetição só
+
+
+def rodar_caso(caso: str, pasta: str, backend: str, repeticoes: int) -> dict:
+    """Roda no processo atual (chamado pelo subprocesso): melhor tempo, mediana e pico extra de RSS."""
+    if caso in CASOS_CARGA:
+        dados.versao_dados(pasta)  # garante o cache em disco; a carga fria o apaga de novo
+        dados._conjuntos.clear()
+        base_rss = zerar_pico()
+        alvo = (pasta, backend)
+    else:
+        conjunto = dados.obter_conjunto(pasta, backend)
+        if caso == "kpis_agregados":
+            metricas.obter_agregados(conjunto)  # grava agregados.json se faltar
+        base_rss = zerar_pico()
+        alvo = (conjunto,)
+
+    tempos = []
+    for _ in range(1 if caso in CASOS_LENTOS else repeticoes):
+        inicio = time.perf_counter()
+        CASOS[caso](*alvo)
+        tempos.append(time.perf_counter() - inicio)
+    tempos.sort()
+    return {
+        "melhor_ms": tempos[0] * 1000,
+        "mediana_ms": tempos[len(tempos) // 2] * 1000,
+        "pico_rss_mb": pico_rss_mb(),
+        "pico_extra_mb": pico_rss_mb() - base_rss,
+    }
+
+
+def _em_subprocesso(caso: str, pasta: str, backend: str, repeticoes: int) -> dict:
+    comando = [sys.executable, __file__, "--caso", caso, "--pasta", pasta, "--repeticoes", str(repeticoes)]
+    if backend:
+        comando += ["--backend", backend]
+    saida = subprocess.run(comando, capture_output=True, text=True)
+    if saida.returncode != 0:
+        erro = saida.stderr.strip().splitlines()
+        return {"erro": erro[-1] if erro else f"código {saida.returncode}"}
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def preparar_escala(escala: str, raiz: str) -> str:
+    """Pasta com os CSVs sintéticos da escala, gerando só se ainda não existe com esse tamanho."""
+    pasta = os.path.join(raiz, escala)
+    if gerar_dados.gerado_com(pasta).get("pedidos") != gerar_dados.ESCALAS[escala]:
+        print(f"Gerando {escala} em {pasta}…", flush=True)
+        # em outro processo, para o pico de memória da geração não ficar neste
+        subprocess.run(
+            [sys.executable, os.path.join(RAIZ, "gerar_dados.py"), "--escala", escala, "--destino", pasta],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+    return pasta
+
+
+def comparar(atual: dict, base: dict, tolerancia: float) -> list:
+    """[(escala, caso, medida, antes, depois)] que pioraram mais que `tolerancia` (fração)."""
+    regressoes = []
+    for escala, casos in atual.items():
+        for caso, r in casos.items():
+            anterior = base.get(escala, {}).get(caso)
+            if not anterior or "erro" in r or "erro" in anterior:
+                continue
+            for medida, folga in (("melhor_ms", 1.0), ("pico_extra_mb", 16.0)):
+                # folga absoluta: ruído de poucos ms/MB não conta como regressão
+                if r[medida] > anterior[medida] * (1 + tolerancia) + folga:
+                    regressoes.append((escala, caso, medida, anterior[medida], r[medida]))
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--escalas", nargs="+", choices=list(gerar_dados.ESCALAS), default=["10k", "1m"])
+    parser.add_argument("--pasta", help="mede uma pasta de dados existente em vez das escalas sintéticas")
+    parser.add_argument(
+        "--raiz", default=os.path.join(tempfile.gettempdir(), "skyone-bench"), help="onde guardar os dados gerados"
+    )
+    parser.add_argument("--casos", nargs="+", choices=list(CASOS), default=list(CASOS))
+    parser.add_argument("--backend", choices=["pandas", "duckdb"])
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--saida", help="grava os resultados em JSON")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior; sai com código 1 se houver regressão")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="piora relativa aceita na comparação")
+    parser.add_argument("--caso", choices=list(CASOS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.caso:
+        print(json.dumps(rodar_caso(args.caso, args.pasta, args.backend, args.repeticoes)))
+        return
+
+    alvos = {os.path.basename(os.path.normpath(args.pasta)): args.pasta} if args.pasta else {
+        escala: preparar_escala(escala, args.raiz) for escala in args.escalas
+    }
+    resultados = {}
+    for escala, pasta in alvos.items():
+        print(f"\n== {escala} ({pasta}) ==")
+        print(f"{'caso':<24}{'melhor ms':>12}{'mediana ms':>12}{'pico RSS MB':>13}{'pico extra MB':>15}")
+        resultados[escala] = {}
+        for caso in args.casos:
+            r = _em_subprocesso(caso, pasta, args.backend, args.repeticoes)
+            resultados[escala][caso] = r
+            if "erro" in r:
+                print(f"{caso:<24}  ❌ {r['erro']}")
+            else:
+                print(
+                    f"{caso:<24}{r['melhor_ms']:>12.1f}{r['mediana_ms']:>12.1f}"
+                    f"{r['pico_rss_mb']:>13.0f}{r['pico_extra_mb']:>15.1f}"
+                )
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2)
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            regressoes = comparar(resultados, json.load(f), args.tolerancia)
+        for escala, caso, medida, antes, depois in regressoes:
+            print(f"❌ regressão {escala}/{caso} {medida}: {antes:.1f} -> {depois:.1f}")
+        if regressoes:
+            raise SystemExit(1)
+        print("✔️ Sem regressões em relação à base.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# benchmarks/carga_api.py
+"""Teste de carga local da API (api.py): requisições/s e latência p50/p95/p99 por rota.
+
+Sobe a API num processo separado (para não disputar o GIL com os clientes) e dispara conexões
+keep-alive concorrentes contra /perguntar, /kpis e /lote.
+
+Uso:
+    python benchmarks/carga_api.py --clientes 16 --segundos 10
+    python benchmarks/carga_api.py --url http://127.0.0.1:8000   # API já rodando
+"""
+import argparse
+import http.client
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PERGUNTAS = [
+    "qual o ticket médio?",
+    "top produtos",
+    "formas de pagamento",
+    "frete grátis",
+    "status dos pedidos",
+    "tipo de cliente",
+    "desconto médio",
+    "ticket médio por tipo de cliente",
+    "faturamento por forma de pagamento",
+    "quantidade por produto",
+]
+
+
+def _subir_api(porta: int, pasta: str, backend: str):
+    comando = [sys.executable, os.path.join(RAIZ, "api.py"), "--porta", str(porta), "--pasta", pasta]
+    if backend:
+        comando += ["--backend", backend]
+    processo = subprocess.Popen(comando, cwd=RAIZ, stdout=subprocess.PIPE, text=True)
+    linha = processo.stdout.readline()  # "API ouvindo em ..." só depois da carga dos dados
+    if not linha:
+        raise SystemExit("a API não subiu")
+    return processo, linha.split()[3]
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(int(len(ordenados) * p), len(ordenados) - 1)]
+
+
+def _cliente(url, rota, fim, latencias, erros, tamanho_lote):
+    alvo = urllib.parse.urlsplit(url)
+    conexao = http.client.HTTPConnection(alvo.hostname, alvo.port, timeout=30)
+    i = 0
+    while time.perf_counter() < fim:
+        if rota == "/kpis":
+            metodo, corpo = "GET", None
+        elif rota == "/lote":
+            metodo, corpo = "POST", {"perguntas": [PERGUNTAS[(i + k) % len(PERGUNTAS)] for k in range(tamanho_lote)]}
+        else:
+            metodo, corpo = "POST", {"pergunta": PERGUNTAS[i % len(PERGUNTAS)]}
+        i += 1
+        inicio = time.perf_counter()
+        try:
+            corpo = json.dumps(corpo).encode("utf-8") if corpo else None
+            conexao.request(metodo, rota, body=corpo, headers={"Content-Type": "application/json"})
+            resposta = conexao.getresponse()
+            resposta.read()
+            if resposta.status != 200:
+                erros.append(resposta.status)
+                continue
+        except (OSError, http.client.HTTPException) as e:
+            erros.append(str(e))
+            conexao.close()
+            conexao = http.client.HTTPConnection(alvo.hostname, alvo.port, timeout=30)
+            continue
+        latencias.append(time.perf_counter() - inicio)
+    conexao.close()
+
+
+def medir(url, rota, clientes, segundos, tamanho_lote=50):
+    latencias, erros = [], []
+    fim = time.perf_counter() + segundos
+    threads = [
+        threading.Thread(target=_cliente, args=(url, rota, fim, latencias, erros, tamanho_lote))
+        for _ in range(clientes)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    n = len(latencias)
+    if not n:
+        print(f"{rota:<11} sem respostas ({len(erros)} erros)")
+        return
+    extra = f" ({n * tamanho_lote / segundos:,.0f} perguntas/s)" if rota == "/lote" else ""
+    print(
+        f"{rota:<11} {n / segundos:8,.0f} req/s{extra} | p50 {statistics.median(latencias) * 1000:6.1f} ms"
+        f" | p95 {_percentil(latencias, 0.95) * 1000:6.1f} ms | p99 {_percentil(latencias, 0.99) * 1000:6.1f} ms"
+        f" | erros {len(erros)}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="API já em execução (senão sobe uma local)")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--pasta", default="data")
+    parser.add_argument("--backend", choices=["pandas", "duckdb"])
+    parser.add_argument("--clientes", type=int, default=16, help="conexões concorrentes")
+    parser.add_argument("--segundos", type=float, default=5.0, help="duração de cada rodada")
+    parser.add_argument("--tamanho-lote", type=int, default=50, help="perguntas por chamada em /lote")
+    args = parser.parse_args()
+
+    processo = None
+    url = args.url
+    if not url:
+        processo, url = _subir_api(args.porta, args.pasta, args.backend)
+    try:
+        print(f"API em {url} | {args.clientes} clientes | {args.segundos:.0f}s por rota")
+        for rota in ("/perguntar", "/kpis", "/lote"):
+            medir(url, rota, args.clientes, args.segundos, args.tamanho_lote)
+    finally:
+        if processo:
+            processo.terminate()
+            processo.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# cache_llm.py
+"""Cache persistente (SQLite) das respostas do modelo, com TTL e limite de entradas."""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+def normalizar_pergunta(pergunta: str) -> str:
+    return " ".join(pergunta.lower().split())
+
+
+def chave_llm(modelo: str, system_prompt: str, pergunta: str, payload: str, temperatura: float) -> str:
+    bruto = json.dumps(
+        [modelo, system_prompt, normalizar_pergunta(pergunta), payload, round(float(temperatura), 4)],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(bruto.encode("utf-8")).hexdigest()
+
+
+class CacheLLM:
+    """Uma conexão por processo, protegida por trava; despejo por TTL e por LRU ao passar de `max_entradas`."""
+
+    def __init__(self, caminho: str, ttl_segundos: float = 7 * 24 * 3600, max_entradas: int = 5000):
+        self.caminho = caminho
+        self.ttl_segundos = ttl_segundos
+        self.max_entradas = max_entradas
+        self.acertos = 0
+        self.falhas = 0
+        self._trava = threading.Lock()
+        if caminho != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute(
+            "CREATE TABLE IF NOT EXISTS respostas ("
+            " chave TEXT PRIMARY KEY, resposta TEXT NOT NULL, criado_em REAL NOT NULL, acessado_em REAL NOT NULL)"
+        )
+        self._conexao.execute("CREATE INDEX IF NOT EXISTS ix_respostas_acesso ON respostas (acessado_em)")
+        self._conexao.commit()
+
+    def obter(self, chave: str):
+        agora = time.time()
+        with self._trava:
+            linha = self._conexao.execute(
+                "SELECT resposta, criado_em FROM respostas WHERE chave = ?", (chave,)
+            ).fetchone()
+            if linha and agora - linha[1] <= self.ttl_segundos:
+                self._conexao.execute("UPDATE respostas SET acessado_em = ? WHERE chave = ?", (agora, chave))
+                self._conexao.commit()
+                self.acertos += 1
+                return linha[0]
+            if linha:
+                self._conexao.execute("DELETE FROM respostas WHERE chave = ?", (chave,))
+                self._conexao.commit()
+            self.falhas += 1
+            return None
+
+    def guardar(self, chave: str, resposta: str):
+        agora = time.time()
+        with self._trava:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO respostas (chave, resposta, criado_em, acessado_em) VALUES (?, ?, ?, ?)",
+                (chave, resposta, agora, agora),
+            )
+            self._conexao.execute("DELETE FROM respostas WHERE criado_em < ?", (agora - self.ttl_segundos,))
+            excesso = self._conexao.execute("SELECT COUNT(*) FROM respostas").fetchone()[0] - self.max_entradas
+            if excesso > 0:
+                self._conexao.execute(
+                    "DELETE FROM respostas WHERE chave IN "
+                    "(SELECT chave FROM respostas ORDER BY acessado_em ASC LIMIT ?)",
+                    (excesso,),
+                )
+            self._conexao.commit()
+
+    def limpar(self):
+        with self._trava:
+            self._conexao.execute("DELETE FROM respostas")
+            self._conexao.commit()
+
+    def estatisticas(self) -> dict:
+        with self._trava:
+            entradas = self._conexao.execute("SELECT COUNT(*) FROM respostas").fetchone()[0]
+        total = self.acertos + self.falhas
+        return {
+            "entradas": entradas,
+            "max_entradas": self.max_entradas,
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "taxa_acerto": self.acertos / total if total else 0.0,
+        }
@@ -0,0 +1,69 @@
+# cache_respostas.py
+"""Memoização LRU das respostas determinísticas, chaveada por (intenção, parâmetros, versão dos dados)."""
+import threading
+from collections import OrderedDict
+
+
+def chave_resposta(intencao: str, parametros: dict, versao: str):
+    return intencao, tuple(sorted(parametros.items())), versao
+
+
+class CacheRespostas:
+    """LRU limitado e seguro entre threads (sessões Streamlit rodam em threads do mesmo processo).
+
+    Os valores guardados são devolvidos sem cópia: quem recebe não deve alterá-los.
+    """
+
+    def __init__(self, capacidade: int = 256):
+        self.capacidade = capacidade
+        self._itens = OrderedDict()
+        self._trava = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.invalidacoes = 0
+
+    def obter(self, chave, padrao=None):
+        with self._trava:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return self._itens[chave]
+            self.falhas += 1
+            return padrao
+
+    def guardar(self, chave, valor):
+        with self._trava:
+            self._itens[chave] = valor
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.capacidade:
+                self._itens.popitem(last=False)
+
+    def obter_ou_calcular(self, chave, calcular):
+        ausente = object()
+        valor = self.obter(chave, ausente)
+        if valor is ausente:
+            valor = calcular()  # fora da trava: cálculos lentos não bloqueiam outras sessões
+            self.guardar(chave, valor)
+        return valor
+
+    def invalidar(self, versao: str = None):
+        """Descarta tudo (ou só as entradas de uma versão específica)."""
+        with self._trava:
+            if versao is None:
+                self._itens.clear()
+            else:
+                for chave in [c for c in self._itens if c[-1] == versao]:
+                    del self._itens[chave]
+            self.invalidacoes += 1
+
+    def estatisticas(self) -> dict:
+        with self._trava:
+            total = self.acertos + self.falhas
+            return {
+                "entradas": len(self._itens),
+                "capacidade": self.capacidade,
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "taxa_acerto": self.acertos / total if total else 0.0,
+                "invalidacoes": self.invalidacoes,
+            }
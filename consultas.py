@@ -0,0 +1,223 @@
+# consultas.py
+"""Respostas determinísticas e roteamento de perguntas, sobre a camada de fatos (sem Streamlit)."""
+from cache_respostas import CacheRespostas, chave_resposta
+from cubos import agregados_periodo, colunas_faltando, obter_cubos, recorte_periodo
+from dados import ao_trocar_versao
+from instrumentacao import etapa, intencao as medir_intencao
+from intencoes import interpretar
+from metricas import RESPOSTAS_AGREGADAS, obter_agregados, top_produtos as _top_produtos_agregado
+from motor import Consulta, agregar, apresentar, executar
+from periodos import Periodo
+
+# Respostas repetidas ("ticket médio", "top produtos"...) saem daqui enquanto a versão dos dados não mudar.
+CACHE_RESPOSTAS = CacheRespostas(capacidade=256)
+
+
+def _invalidar_respostas(versao_anterior, versao_nova):
+    if versao_anterior:
+        CACHE_RESPOSTAS.invalidar(versao_anterior)
+
+
+ao_trocar_versao(_invalidar_respostas)
+
+
+# ---------------- Cálculos determinísticos ----------------
+# As colunas is_faturado, frete_gratis e os valores monetários em float64 vêm prontos da ingestão (dados.py).
+def answer_ticket_medio(fatos):
+    r = executar(Consulta(("ticket_medio", "faturamento", "pedidos_faturados")), fatos).iloc[0]
+    return {
+        "titulo": "Ticket médio (pedidos faturados)",
+        "valor": r["Ticket médio"],
+        "detalhe": {
+            "soma_total": r["Faturamento"],
+            "num_pedidos_faturados": int(r["Pedidos faturados"]),
+        },
+    }
+
+
+def answer_desconto_medio(fatos):
+    r = executar(Consulta(("desconto_medio", "soma_descontos", "pedidos_faturados")), fatos).iloc[0]
+    return {
+        "titulo": "Desconto médio (pedidos faturados)",
+        "valor": r["Desconto médio"],
+        "detalhe": {
+            "soma_descontos": r["Soma de descontos"],
+            "num_pedidos_faturados": int(r["Pedidos faturados"]),
+        },
+    }
+
+
+def top_produtos(fatos, n=5):
+    top = executar(Consulta(("quantidade",), ("produto",), limite=n), fatos)
+    return top.rename(columns={"Quantidade vendida": "QuantidadeVendidaItem"})
+
+
+def formas_pagamento(fatos):
+    fp = executar(Consulta(("pedidos",), ("forma_pagamento",)), fatos)
+    fp.columns = ["Forma de Pagamento", "Total"]
+    return fp
+
+
+def status_pedidos(fatos):
+    status = executar(Consulta(("pedidos",), ("situacao",)), fatos)
+    status.columns = ["Situação", "Total"]
+    return status
+
+
+def tipo_cliente(fatos):
+    tipos = executar(Consulta(("pedidos",), ("tipo_cliente",)), fatos)
+    tipos.columns = ["Tipo de Cliente", "Total de Pedidos"]
+    return tipos
+
+
+def frete_gratis(fatos):
+    r = executar(Consulta(("pedidos",), filtros=(("frete_gratis", True),)), fatos).iloc[0]
+    return {"total_frete_gratis": int(r["Total de pedidos"])}
+
+
+def dataset_min_snapshot(fatos) -> dict:
+    """Resumo curto com números úteis para fallback em perguntas não mapeadas."""
+    out = {}
+    try:
+        r = executar(Consulta(("pedidos", "pedidos_faturados", "ticket_medio", "desconto_medio")), fatos).iloc[0]
+        if r.iloc[0]:
+            out.update(
+                dict(
+                    total_pedidos=int(r.iloc[0]),
+                    total_pedidos_faturados=int(r.iloc[1]),
+                    ticket_medio=r.iloc[2],
+                    desconto_medio=r.iloc[3],
+                )
+            )
+    except Exception:
+        pass
+    try:
+        top = executar(Consulta(("quantidade",), ("codigo_produto",), limite=5), fatos)
+        if not top.empty:
+            out["top_qtd_itens"] = list(top.iloc[:, 1])
+    except Exception:
+        pass
+    return out
+
+
+# ---------------- Router ----------------
+# A interpretação (texto -> intenção e parâmetros) fica em intencoes.py.
+RESPOSTAS_FIXAS = {
+    "ticket_medio": answer_ticket_medio,
+    "desconto_medio": answer_desconto_medio,
+    "top_produtos": lambda fatos: top_produtos(fatos, n=5),
+    "formas_pgto": formas_pagamento,
+    "frete_gratis": frete_gratis,
+    "status_pedidos": status_pedidos,
+    "tipo_cliente": tipo_cliente,
+}
+
+
+# descrição do "período" quando não há cubos (faltam a data ou as chaves item -> pedido): todo o histórico
+PERIODO_SEM_CUBOS = "todo o histórico (faltam nos dados as colunas {}; o período da pergunta foi ignorado)"
+
+
+def _anotar_periodo(resultado, descricao: str):
+    if isinstance(resultado, dict):
+        return {**resultado, "periodo": descricao}
+    resultado.attrs["periodo"] = descricao
+    return resultado
+
+
+def _consulta_recorte(parametros: dict) -> Consulta:
+    return Consulta(tuple(parametros["metricas"]), tuple(parametros["dimensoes"]), limite=parametros.get("limite"))
+
+
+def responder(intencao: str, parametros: dict, fatos, agregados=None, cubos=None):
+    """Com `agregados` (metricas.obter_agregados), as intenções fixas saem deles em vez do motor.
+
+    Perguntas com período (parametros["periodo"]) saem dos `cubos` (cubos.obter_cubos), somando as
+    células do intervalo; a descrição do período vai junto da resposta.
+    """
+    if "periodo" in parametros:
+        if cubos is None:
+            raise ValueError("Pergunta com período: informe os cubos (cubos.obter_cubos).")
+        periodo = Periodo.de_parametro(parametros["periodo"])
+        if intencao == "metricas_por_dimensao":
+            resultado = recorte_periodo(cubos, _consulta_recorte(parametros), periodo, fatos.produtos)
+        else:
+            sem_periodo = {k: v for k, v in parametros.items() if k != "periodo"}
+            resultado = responder(intencao, sem_periodo, fatos, agregados_periodo(cubos, periodo))
+        return _anotar_periodo(resultado, periodo.descricao())
+    if intencao == "metricas_por_dimensao":
+        return executar(_consulta_recorte(parametros), fatos)
+    if intencao == "top_produtos" and "n" in parametros:
+        if agregados is not None:
+            return _top_produtos_agregado(agregados, fatos, n=parametros["n"])
+        return top_produtos(fatos, n=parametros["n"])
+    if agregados is not None and intencao in RESPOSTAS_AGREGADAS:
+        return RESPOSTAS_AGREGADAS[intencao](agregados, fatos)
+    if intencao in RESPOSTAS_FIXAS:
+        return RESPOSTAS_FIXAS[intencao](fatos)
+    return {}
+
+
+def _responder_conjunto(intencao: str, parametros: dict, conjunto):
+    """responder() com a fonte de cada caso: cubos (com período), agregados (intenção fixa) ou o motor."""
+    if "periodo" in parametros:
+        cubos = obter_cubos(conjunto)
+        if cubos is None:  # sem cubos: todo o histórico, com o aviso no lugar do período
+            sem_periodo = {k: v for k, v in parametros.items() if k != "periodo"}
+            aviso = PERIODO_SEM_CUBOS.format(", ".join(colunas_faltando(conjunto.fatos)))
+            return _anotar_periodo(_responder_conjunto(intencao, sem_periodo, conjunto), aviso)
+        return responder(intencao, parametros, conjunto.fatos, cubos=cubos)
+    agregados = obter_agregados(conjunto) if intencao in RESPOSTAS_AGREGADAS else None
+    return responder(intencao, parametros, conjunto.fatos, agregados)
+
+
+def route_question(pergunta: str, conjunto, usar_cache=True):
+    with etapa("interpretar"):
+        intencao, parametros = interpretar(pergunta)
+
+    def calcular():
+        # só roda em falta no cache: a etapa mede o custo real de responder
+        with etapa(f"resposta:{intencao}"):
+            return _responder_conjunto(intencao, parametros, conjunto)
+
+    with medir_intencao(intencao):
+        if not usar_cache or intencao == "nao_mapeado":
+            return intencao, calcular()
+        chave = chave_resposta(intencao, parametros, conjunto.versao)
+        return intencao, CACHE_RESPOSTAS.obter_ou_calcular(chave, calcular)
+
+
+def route_questions(perguntas, conjunto, usar_cache=True):
+    """Várias perguntas numa chamada -> [(intenção, resultado)] na mesma ordem.
+
+    Interpretações repetidas são calculadas uma vez; recortes "métricas por dimensão" com as mesmas
+    dimensões viram uma única consulta ao motor (uma varredura) com a união das métricas, as
+    intenções fixas saem todas dos mesmos agregados e as perguntas com período, dos cubos.
+    """
+    with etapa("interpretar_lote"):
+        interpretadas = [interpretar(p) for p in perguntas]
+    resultados, recortes, calculadas = {}, {}, []
+    for intencao, parametros in interpretadas:
+        chave = chave_resposta(intencao, parametros, conjunto.versao)
+        if chave in resultados or intencao == "nao_mapeado":
+            resultados.setdefault(chave, {})
+            continue
+        guardado = CACHE_RESPOSTAS.obter(chave) if usar_cache else None
+        if guardado is not None:
+            resultados[chave] = guardado
+        elif intencao == "metricas_por_dimensao" and "periodo" not in parametros:
+            recortes.setdefault(tuple(parametros["dimensoes"]), {})[chave] = _consulta_recorte(parametros)
+        else:
+            resultados[chave] = _responder_conjunto(intencao, parametros, conjunto)
+            calculadas.append(chave)
+
+    for dimensoes, pendentes in recortes.items():
+        metricas = tuple(dict.fromkeys(m for consulta in pendentes.values() for m in consulta.metricas))
+        agregado = agregar(Consulta(metricas, dimensoes), conjunto.fatos)
+        for chave, consulta in pendentes.items():
+            resultados[chave] = apresentar(agregado, consulta)
+            calculadas.append(chave)
+
+    if usar_cache:
+        for chave in calculadas:
+            CACHE_RESPOSTAS.guardar(chave, resultados[chave])
+    return [(i, resultados[chave_resposta(i, p, conjunto.versao)]) for i, p in interpretadas]
@@ -0,0 +1,98 @@
+# contexto_llm.py
+"""Codificador compacto do resultado enviado ao modelo: tabela rotulada com orçamento fixo de tokens."""
+import math
+import numbers
+
+import pandas as pd
+
+TOKENS_POR_NUMERO = 3  # orçamento de contexto = slider "Quantos números..." × este fator
+MAX_CARACTERES_TEXTO = 60
+
+_codificador = None
+
+
+def estimar_tokens(texto: str) -> int:
+    """Contagem com tiktoken quando instalado; senão ~4 caracteres por token."""
+    global _codificador
+    if _codificador is None:
+        try:
+            import tiktoken
+
+            _codificador = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _codificador = False
+    if _codificador:
+        return len(_codificador.encode(texto))
+    return math.ceil(len(texto) / 4)
+
+
+def formatar_valor(v) -> str:
+    """Inteiros inteiros; >= 10 mil sem casas; >= 1 com 2 casas; abaixo disso 4 algarismos significativos."""
+    if v is None or (isinstance(v, float) and math.isnan(v)) or v is pd.NA:
+        return "-"
+    if isinstance(v, bool):
+        return "sim" if v else "não"
+    if isinstance(v, numbers.Integral):
+        return str(int(v))
+    if isinstance(v, numbers.Real):
+        v = float(v)
+        if v.is_integer() and abs(v) < 1e15:
+            return str(int(v))
+        if abs(v) >= 10_000:
+            return f"{v:.0f}"
+        if abs(v) >= 1:
+            return f"{v:.2f}"
+        return f"{v:.4g}"
+    texto = str(v).replace("\n", " ").replace("|", "/")
+    return texto if len(texto) <= MAX_CARACTERES_TEXTO else texto[: MAX_CARACTERES_TEXTO - 1] + "…"
+
+
+def _linhas_dict(d: dict, prefixo=""):
+    for chave, valor in d.items():
+        rotulo = f"{prefixo}{chave}"
+        if isinstance(valor, dict):
+            yield from _linhas_dict(valor, prefixo=f"{rotulo}.")
+        elif isinstance(valor, (pd.DataFrame, pd.Series)):
+            yield f"{rotulo}:"
+            yield from _linhas(valor)
+        elif isinstance(valor, (list, tuple, set)):
+            yield f"{rotulo}: " + ", ".join(formatar_valor(v) for v in valor)
+        else:
+            yield f"{rotulo}: {formatar_valor(valor)}"
+
+
+def _linhas(resultado):
+    if isinstance(resultado, pd.DataFrame):
+        yield "|".join(str(c) for c in resultado.columns)
+        for linha in resultado.itertuples(index=False, name=None):
+            yield "|".join(formatar_valor(v) for v in linha)
+    elif isinstance(resultado, pd.Series):
+        yield f"{resultado.index.name or 'chave'}|{resultado.name or 'valor'}"
+        for chave, valor in resultado.items():
+            yield f"{formatar_valor(chave)}|{formatar_valor(valor)}"
+    elif isinstance(resultado, dict):
+        yield from _linhas_dict(resultado)
+    elif isinstance(resultado, (list, tuple, set)):
+        yield ", ".join(formatar_valor(v) for v in resultado)
+    else:
+        yield formatar_valor(resultado)
+
+
+def _total_linhas(resultado) -> int:
+    if isinstance(resultado, (pd.DataFrame, pd.Series)):
+        return len(resultado) + 1
+    return sum(1 for _ in _linhas(resultado))
+
+
+def codificar_contexto(resultado, max_tokens: int) -> str:
+    """Tabela compacta (`coluna|coluna` / `chave: valor`) truncada para caber em `max_tokens`."""
+    saida, usados = [], 0
+    for i, linha in enumerate(_linhas(resultado)):
+        custo = estimar_tokens(linha) + 1  # + quebra de linha
+        if usados + custo > max_tokens:
+            restantes = _total_linhas(resultado) - i
+            saida.append(f"... (+{restantes} linhas omitidas pelo limite de contexto)")
+            break
+        saida.append(linha)
+        usados += custo
+    return "\n".join(saida)
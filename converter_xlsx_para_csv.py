@@ -1,31 +1,244 @@
-import pandas as pd
-import os
+"""Converte as planilhas da SkyOne (.xlsx) para CSV ou Parquet na pasta de dados do app.
 
-# Caminho de origem dos arquivos .xlsx (ajustado com base na sua imagem)
-origem = r"C:\Delta.AiTO\POC&MVP\Base de Dados para Integração Jet x SkyOne"
+Cada planilha é lida em modo somente leitura, linha a linha, e gravada em lotes, sem carregar a
+planilha inteira em memória. As planilhas são convertidas em paralelo (um processo por arquivo) e
+arquivos cuja origem não mudou desde a última execução são pulados.
 
-# Caminho de destino onde os arquivos .csv serão salvos (pasta do seu projeto)
-destino = "data"
+Uso:
+    python converter_xlsx_para_csv.py --origem "C:\\Delta.AiTO\\POC&MVP\\Base de Dados para Integração Jet x SkyOne"
+    python converter_xlsx_para_csv.py --origem ./planilhas --destino data --formato parquet --processos 4
+"""
+import argparse
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-# Dicionário com mapeamento dos arquivos a converter
+# Dicionário com mapeamento dos arquivos a converter (nome de saída sem extensão)
 arquivos = {
-    "3_Cadastro de Clientes_Client.xlsx": "clients.csv",
-    "4_Cadastro de Cabeçalho de Pedidos_OrderHeader.xlsx": "orders.csv",
-    "5_Cadastro de Itens dos Pedidos_OrderItem.xlsx": "items.csv",
-    "6_Cadastro de Produtos_Product.xlsx": "products.csv"
+    "3_Cadastro de Clientes_Client.xlsx": "clients",
+    "4_Cadastro de Cabeçalho de Pedidos_OrderHeader.xlsx": "orders",
+    "5_Cadastro de Itens dos Pedidos_OrderItem.xlsx": "items",
+    "6_Cadastro de Produtos_Product.xlsx": "products",
 }
 
-# Garantir que a pasta destino existe
-os.makedirs(destino, exist_ok=True)
+MANIFESTO = ".conversao.json"
+LINHAS_POR_LOTE = 50_000
+
+
+def _linhas_planilha(caminho: str):
+    """Cabeçalho + linhas da primeira aba, em modo streaming (openpyxl read_only)."""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        linhas = wb.worksheets[0].iter_rows(values_only=True)
+        cabecalho = next(linhas, None)
+        if cabecalho is None:
+            return
+        largura = len(cabecalho)
+        while largura and cabecalho[largura - 1] is None:
+            largura -= 1
+        yield [str(c) for c in cabecalho[:largura]]
+        for linha in linhas:
+            if linha is None or all(v is None for v in linha):
+                continue
+            yield list(linha[:largura]) + [None] * (largura - len(linha))
+    finally:
+        wb.close()
+
+
+def _lotes(linhas, tamanho: int):
+    lote = []
+    for linha in linhas:
+        lote.append(linha)
+        if len(lote) >= tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _gravar_csv(linhas, cabecalho, saida: str, tamanho_lote: int) -> int:
+    total = 0
+    with open(saida, "w", newline="", encoding="utf-8") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(cabecalho)
+        for lote in _lotes(linhas, tamanho_lote):
+            escritor.writerows(lote)
+            total += len(lote)
+    return total
 
-# Loop para converter cada arquivo
-for nome_excel, nome_csv in arquivos.items():
-    caminho_entrada = os.path.join(origem, nome_excel)
-    caminho_saida = os.path.join(destino, nome_csv)
 
+class _TipoConflitante(Exception):
+    """Um lote não coube no tipo que a coluna recebeu dos lotes anteriores."""
+
+    def __init__(self, coluna: str, tipo):
+        super().__init__(f"{coluna}: {tipo}")
+        self.coluna, self.tipo = coluna, tipo
+
+
+def _como_texto(valores) -> list:
+    return [None if v is None else str(v) for v in valores]  # mesmo texto que o csv.writer grava
+
+
+def _array_lote(valores, tipo):
+    """Array Arrow de uma coluna do lote: (array, tipo que ela pede; None se `tipo` serve).
+
+    Tipos misturados no lote viram texto; inteiros com decimais, float64. A conversão direta de
+    pyarrow truncaria 2.5 numa coluna int64, por isso o tipo do lote é comparado antes.
+    """
+    import pyarrow as pa
+
+    if tipo is not None and pa.types.is_string(tipo):
+        return pa.array(_como_texto(valores), type=tipo), None
     try:
-        df = pd.read_excel(caminho_entrada)
-        df.to_csv(caminho_saida, index=False, encoding='utf-8')
-        print(f"✔️ Convertido: {nome_excel} -> {nome_csv}")
-    except Exception as e:
-        print(f"❌ Erro ao converter {nome_excel}: {e}")
+        array = pa.array(valores, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        array = pa.array(_como_texto(valores), type=pa.string())
+    if tipo is None:
+        # coluna toda vazia no primeiro lote não define tipo: assume texto
+        return (array.cast(pa.string()) if pa.types.is_null(array.type) else array), None
+    if array.type == tipo or pa.types.is_null(array.type):
+        return array.cast(tipo), None
+    numericos = all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in (tipo, array.type))
+    if numericos and pa.types.is_floating(tipo):
+        return array.cast(tipo), None
+    return None, pa.float64() if numericos else pa.string()
+
+
+def _gravar_parquet(linhas, cabecalho, saida: str, tamanho_lote: int, tipos: dict = None) -> int:
+    """Grava em Parquet; o esquema sai do primeiro lote, com `tipos` ({coluna: tipo Arrow}) por cima.
+
+    Um lote posterior que não cabe no esquema levanta _TipoConflitante com o tipo que comporta os dois.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    total, escritor, esquema = 0, None, None
+    try:
+        for lote in _lotes(linhas, tamanho_lote):
+            colunas = list(zip(*lote))
+            tipos_atuais = [tipos.get(n) if tipos else None for n in cabecalho] if esquema is None else esquema.types
+            arrays = []
+            for nome, valores, tipo in zip(cabecalho, colunas, tipos_atuais):
+                array, alargado = _array_lote(valores, tipo)
+                if alargado is not None:
+                    raise _TipoConflitante(nome, alargado)
+                arrays.append(array)
+            if esquema is None:
+                esquema = pa.schema(pa.field(nome, a.type) for nome, a in zip(cabecalho, arrays))
+                escritor = pq.ParquetWriter(saida, esquema, compression="zstd")
+            escritor.write_table(pa.Table.from_arrays(arrays, schema=esquema))
+            total += len(lote)
+    finally:
+        if escritor is not None:
+            escritor.close()
+    return total
+
+
+def converter_arquivo(entrada: str, saida: str, formato: str, tamanho_lote: int = LINHAS_POR_LOTE) -> dict:
+    """Converte uma planilha; roda no processo filho. Grava em arquivo temporário e troca no final.
+
+    No Parquet, se um lote não couber no tipo que a coluna recebeu antes (texto depois de números,
+    decimais depois de inteiros), a planilha é regravada com a coluna alargada (float64 ou texto).
+    """
+    inicio = time.perf_counter()
+    tmp = saida + ".tmp"
+    tipos = {}
+    try:
+        while True:
+            linhas = _linhas_planilha(entrada)
+            cabecalho = next(linhas, None) or []
+            try:
+                if formato == "parquet":
+                    total = _gravar_parquet(linhas, cabecalho, tmp, tamanho_lote, tipos)
+                else:
+                    total = _gravar_csv(linhas, cabecalho, tmp, tamanho_lote)
+                break
+            except _TipoConflitante as e:
+                tipos[e.coluna] = e.tipo
+            finally:
+                linhas.close()
+        os.replace(tmp, saida)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    segundos = time.perf_counter() - inicio
+    tamanho_mb = os.path.getsize(entrada) / 2**20
+    return {
+        "linhas": total,
+        "segundos": segundos,
+        "linhas_por_s": total / segundos if segundos else 0.0,
+        "mb_por_s": tamanho_mb / segundos if segundos else 0.0,
+    }
+
+
+def _ler_manifesto(destino: str) -> dict:
+    try:
+        with open(os.path.join(destino, MANIFESTO), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _assinatura(caminho: str, formato: str) -> dict:
+    st = os.stat(caminho)
+    return {"mtime_ns": st.st_mtime_ns, "tamanho": st.st_size, "formato": formato}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--origem", default=os.getenv("SKYONE_ORIGEM"), help="pasta com os .xlsx (ou env SKYONE_ORIGEM)")
+    parser.add_argument("--destino", default="data", help="pasta de saída (padrão: data)")
+    parser.add_argument("--formato", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--processos", type=int, default=min(len(arquivos), os.cpu_count() or 1))
+    parser.add_argument("--linhas-por-lote", type=int, default=LINHAS_POR_LOTE)
+    parser.add_argument("--forcar", action="store_true", help="converte mesmo se a origem não mudou")
+    args = parser.parse_args()
+    if not args.origem:
+        parser.error("informe --origem ou defina SKYONE_ORIGEM")
+
+    # Garantir que a pasta destino existe
+    os.makedirs(args.destino, exist_ok=True)
+    manifesto = _ler_manifesto(args.destino)
+
+    tarefas = {}
+    for nome_excel, nome_saida in arquivos.items():
+        entrada = os.path.join(args.origem, nome_excel)
+        saida = os.path.join(args.destino, f"{nome_saida}.{args.formato}")
+        if not os.path.exists(entrada):
+            print(f"❌ Não encontrado: {entrada}")
+            continue
+        assinatura = _assinatura(entrada, args.formato)
+        if not args.forcar and manifesto.get(nome_excel) == assinatura and os.path.exists(saida):
+            print(f"⏭️  Sem mudanças: {nome_excel}")
+            continue
+        tarefas[nome_excel] = (entrada, saida, assinatura)
+
+    with ProcessPoolExecutor(max_workers=max(args.processos, 1)) as pool:
+        futuros = {
+            pool.submit(converter_arquivo, entrada, saida, args.formato, args.linhas_por_lote): nome_excel
+            for nome_excel, (entrada, saida, _) in tarefas.items()
+        }
+        for futuro in as_completed(futuros):
+            nome_excel = futuros[futuro]
+            entrada, saida, assinatura = tarefas[nome_excel]
+            try:
+                r = futuro.result()
+            except Exception as e:
+                print(f"❌ Erro ao converter {nome_excel}: {e}")
+                continue
+            manifesto[nome_excel] = assinatura
+            print(
+                f"✔️ Convertido: {nome_excel} -> {os.path.basename(saida)} | {r['linhas']:,} linhas em "
+                f"{r['segundos']:.1f}s ({r['linhas_por_s']:,.0f} linhas/s, {r['mb_por_s']:.1f} MB/s)"
+            )
+
+    with open(os.path.join(args.destino, MANIFESTO), "w", encoding="utf-8") as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
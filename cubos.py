@@ -0,0 +1,481 @@
+# cubos.py
+"""Cubos de período: pedidos e itens pré-somados por dia e por mês, montados na carga.
+
+O cubo diário de pedidos tem uma célula por (dia, forma de pagamento, situação, tipo de cliente),
+com contagens, totais e descontos dos faturados e frete grátis; o de itens tem uma célula por
+(dia, produto) com a quantidade vendida. Os cubos mensais saem dos diários. Uma pergunta com
+período ("ticket médio do último trimestre") soma as células dos meses inteiros do intervalo mais
+as dos dias das pontas. O custo depende do número de células no intervalo, não do número de pedidos.
+
+A data vem de COLUNA_DATA (texto ISO ou dd/mm/aaaa). Pedidos sem data válida ficam fora dos cubos
+e entram só nas respostas sobre todo o histórico; a contagem fica em `Cubos.pedidos_sem_data`. Sem a
+coluna nos pedidos, ou sem as chaves que ligam itens a pedidos (COLUNAS_CUBOS), não há cubos
+(obter_cubos devolve None). Os cubos ficam memorizados por versão dos dados, como os agregados de
+metricas.py.
+
+Uso (mesmos números que filtrar os pedidos, para alguns períodos):
+    python cubos.py --pasta data
+"""
+import argparse
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from dados import PASTA_DADOS, obter_conjunto
+from incremental import Agregados, comparar_agregados
+from instrumentacao import etapa
+from motor import DIMENSOES, METRICAS, Consulta, apresentar
+from periodos import Periodo, somar_meses
+
+COLUNA_DATA = "DataPedido"
+# colunas que os cubos leem além das dimensões: a data e a junção item -> pedido (dia de cada item)
+COLUNAS_CUBOS = {
+    "pedidos": (COLUNA_DATA, "CodigoPedido"),
+    "itens": ("CodigoPedidoItem", "CodigoProdutoVendido", "QuantidadeVendidaItem"),
+}
+DIMENSOES_PEDIDOS = ("FormaPagamento", "SituacaoPedido", "TipoCliente")
+# somas por célula; os nomes são as chaves das métricas do motor (exceto frete_gratis)
+MEDIDAS_PEDIDOS = (
+    "pedidos", "pedidos_faturados", "faturados_com_total", "faturamento",
+    "faturados_com_desconto", "soma_descontos", "frete_gratis",
+)
+# métricas do motor que são razão de duas medidas
+RAZOES = {"ticket_medio": ("faturamento", "faturados_com_total"), "desconto_medio": ("soma_descontos", "faturados_com_desconto")}
+
+LIMITE_BINCOUNT = 1 << 22  # combinações de chaves somadas direto por posição; acima disso, por np.unique
+
+_cubos = {}
+_trava_cubos = threading.Lock()
+
+
+@dataclass(frozen=True)
+class Cubos:
+    versao: str
+    pedidos_dia: pd.DataFrame = field(repr=False)  # data, DIMENSOES_PEDIDOS, MEDIDAS_PEDIDOS; ordenado pela data
+    itens_dia: pd.DataFrame = field(repr=False)  # data, CodigoProdutoVendido, quantidade
+    pedidos_mes: pd.DataFrame = field(repr=False)  # idem, com data = primeiro dia do mês
+    itens_mes: pd.DataFrame = field(repr=False)
+    pedidos_sem_data: int = 0
+    segundos_construcao: float = 0.0
+
+    @property
+    def primeiro_dia(self):
+        return self.pedidos_dia["data"].iloc[0].date() if len(self.pedidos_dia) else None
+
+    @property
+    def ultimo_dia(self):
+        return self.pedidos_dia["data"].iloc[-1].date() if len(self.pedidos_dia) else None
+
+    _colunas: dict = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def coluna(self, cubo: str, coluna: str) -> np.ndarray:
+        """Coluna de um cubo ("pedidos_dia", "itens_mes"...) como ndarray (códigos, se category), guardada."""
+        chave = (cubo, coluna)
+        if chave not in self._colunas:
+            serie = getattr(self, cubo)[coluna]
+            if isinstance(serie.dtype, pd.CategoricalDtype):
+                self._colunas[chave] = serie.cat.codes.to_numpy()
+            else:
+                self._colunas[chave] = serie.to_numpy()
+        return self._colunas[chave]
+
+    def categorias(self, tabela: str, coluna: str) -> list:
+        """Rótulos (tipos nativos) dos códigos da coluna category de `tabela`, guardados."""
+        chave = (tabela, coluna)
+        if chave not in self._colunas:
+            self._colunas[chave] = getattr(self, f"{tabela}_dia")[coluna].cat.categories.tolist()
+        return self._colunas[chave]
+
+    def intervalos(self, tabela: str, inicio: date, fim: date) -> list:
+        """[(cubo, de, até)] de `tabela` ("pedidos" ou "itens") que cobrem [inicio, fim].
+
+        Os meses inteiros do intervalo vêm do cubo mensal e os dias das pontas, do diário.
+        """
+        primeiro_mes = inicio if inicio.day == 1 else somar_meses(inicio.replace(day=1), 1)
+        depois_do_ultimo = somar_meses(fim.replace(day=1), 1)
+        if fim + timedelta(days=1) != depois_do_ultimo:
+            depois_do_ultimo = fim.replace(day=1)  # o mês de `fim` está incompleto: vai por dias
+        if primeiro_mes >= depois_do_ultimo:
+            partes = [(f"{tabela}_dia", inicio, fim)]
+        else:
+            partes = [
+                (f"{tabela}_dia", inicio, primeiro_mes - timedelta(days=1)),
+                (f"{tabela}_mes", primeiro_mes, depois_do_ultimo - timedelta(days=1)),
+                (f"{tabela}_dia", depois_do_ultimo, fim),
+            ]
+        intervalos = []
+        for cubo, de, ate in partes:
+            if de > ate:
+                continue
+            datas = self.coluna(cubo, "data")
+            de = np.searchsorted(datas, np.datetime64(de, "ns"), side="left")
+            ate = np.searchsorted(datas, np.datetime64(ate, "ns"), side="right")
+            if ate > de:
+                intervalos.append((cubo, de, ate))
+        return intervalos
+
+    def celulas(self, tabela: str, inicio: date, fim: date) -> pd.DataFrame:
+        """As células de `intervalos` numa tabela só."""
+        partes = [getattr(self, cubo).iloc[de:ate] for cubo, de, ate in self.intervalos(tabela, inicio, fim)]
+        if not partes:
+            return getattr(self, f"{tabela}_dia").iloc[:0]
+        return partes[0] if len(partes) == 1 else pd.concat(partes, ignore_index=True)
+
+
+# ------------------------------------------------------------------
+# Construção
+# ------------------------------------------------------------------
+def converter_datas(valores) -> pd.DatetimeIndex:
+    """Texto (ISO ou dd/mm/aaaa) ou datas -> dias (datetime64, hora zerada); inválidas viram NaT."""
+    datas = pd.to_datetime(pd.Index(valores), errors="coerce", format="ISO8601")
+    if datas.isna().all():
+        datas = pd.to_datetime(pd.Index(valores), errors="coerce", format="%d/%m/%Y")
+    return pd.DatetimeIndex(datas).normalize().as_unit("ns")
+
+
+def _dias(serie: pd.Series) -> np.ndarray:
+    """Dia de cada linha (datetime64, NaT se inválido)."""
+    codigos, dias = _codigos_dia(serie)
+    return np.where(codigos >= 0, dias[np.maximum(codigos, 0)], np.datetime64("NaT", "ns"))
+
+
+def _codigos_dia(serie: pd.Series):
+    """(código por linha, dias): o código é a posição do dia em `dias` (ordenados, sem repetição); -1 sem data."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        # converte só as categorias (centenas de dias), não cada linha
+        brutos, valores = serie.cat.codes.to_numpy(), converter_datas(serie.cat.categories).to_numpy()
+    else:
+        brutos, unicos = pd.factorize(converter_datas(serie))
+        valores = pd.DatetimeIndex(unicos).to_numpy()
+    dias, posicao = np.unique(valores, return_inverse=True)  # NaT vai para o fim
+    validos = int((~np.isnat(dias)).sum())
+    posicao = np.where(posicao < validos, posicao, -1)
+    codigos = np.where(brutos >= 0, posicao[np.maximum(brutos, 0)], -1) if len(posicao) else np.full(len(brutos), -1)
+    return codigos, dias[:validos]
+
+
+def _codificar(serie: pd.Series):
+    """(códigos, tipo category) de uma coluna de agrupamento; código -1 = vazio."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.cat.codes.to_numpy(), serie.dtype
+    codigos, unicos = pd.factorize(serie, sort=True)  # ordenadas, como as chaves do groupby do motor
+    return codigos, pd.CategoricalDtype(unicos)
+
+
+def _rotular(codigos: np.ndarray, rotulos):
+    if isinstance(rotulos, pd.CategoricalDtype):
+        return pd.Categorical.from_codes(codigos, dtype=rotulos)
+    return rotulos[codigos]  # dias (a chave "data" nunca é vazia)
+
+
+def _somar_por_codigos(chaves: dict, medidas: dict) -> pd.DataFrame:
+    """Soma `medidas` por combinação de `chaves` ({coluna: (códigos, rótulos)}), em ordem de chave.
+
+    Os códigos das chaves viram um inteiro só e as somas saem de np.bincount, sem o groupby do pandas
+    (que fatoraria cada chave de novo). Código -1 (vazio) é uma célula própria, como dropna=False.
+    """
+    tamanhos = [len(r.categories) + 1 if isinstance(r, pd.CategoricalDtype) else len(r) + 1 for _, r in chaves.values()]
+    combinado = None
+    for (codigos, _), tamanho in zip(chaves.values(), tamanhos):
+        deslocado = codigos.astype(np.int64) + 1
+        combinado = deslocado if combinado is None else combinado * tamanho + deslocado
+    celulas = math.prod(tamanhos)
+    if celulas <= LIMITE_BINCOUNT:
+        presentes = np.flatnonzero(np.bincount(combinado, minlength=celulas))
+        def somar(valores):
+            return np.bincount(combinado, weights=valores, minlength=celulas)[presentes]
+    else:
+        presentes, inverso = np.unique(combinado, return_inverse=True)
+        def somar(valores):
+            return np.bincount(inverso, weights=valores, minlength=len(presentes))
+
+    colunas, resto = {}, presentes
+    for (coluna, (_, rotulos)), tamanho in reversed(list(zip(chaves.items(), tamanhos))):
+        resto, codigo = np.divmod(resto, tamanho)
+        colunas[coluna] = _rotular(codigo - 1, rotulos)
+    cubo = pd.DataFrame({coluna: colunas[coluna] for coluna in chaves})
+    for nome, valores in medidas.items():
+        soma = somar(valores)
+        # bincount soma em float64: contagens voltam a inteiro (exatas até 2**53)
+        cubo[nome] = np.rint(soma).astype(np.int64) if valores.dtype.kind in "biu" else soma
+    return cubo
+
+
+def _somar_celulas(frame: pd.DataFrame, chaves) -> pd.DataFrame:
+    # dropna=False: célula de forma/situação/tipo vazia ainda conta no total, como em Agregados
+    return frame.groupby(list(chaves), observed=True, dropna=False, sort=True).sum().reset_index()
+
+
+def _filtrar(valores: np.ndarray, mascara: np.ndarray) -> np.ndarray:
+    return valores if mascara.all() else valores[mascara]  # caso comum: nada a tirar, sem cópia
+
+
+def _valores_soma(serie: pd.Series) -> np.ndarray:
+    """Inteiros continuam inteiros (como no motor); vazios somam 0."""
+    if pd.api.types.is_integer_dtype(serie) and not serie.hasnans:
+        return serie.to_numpy(dtype=np.int64)
+    return serie.to_numpy(dtype="float64", na_value=0.0)
+
+
+def _cubos_pandas(fatos, coluna_data: str):
+    pedidos = fatos.pedidos
+    codigos, dias = _codigos_dia(pedidos[coluna_data])
+    com_data = codigos >= 0
+    faturado = _filtrar(pedidos["is_faturado"].to_numpy(dtype=bool), com_data)
+    total = _filtrar(pedidos["TotalPedido"].to_numpy(dtype="float64"), com_data)
+    desconto = _filtrar(pedidos["ValorDesconto"].to_numpy(dtype="float64"), com_data)
+    total_faturado = faturado & ~np.isnan(total)
+    desconto_faturado = faturado & ~np.isnan(desconto)
+    chaves = {"data": (_filtrar(codigos, com_data), dias)}
+    for coluna in DIMENSOES_PEDIDOS:
+        codigos_coluna, rotulos = _codificar(pedidos[coluna])
+        chaves[coluna] = (_filtrar(codigos_coluna, com_data), rotulos)
+    pedidos_dia = _somar_por_codigos(
+        chaves,
+        {
+            "pedidos": np.ones(len(faturado), dtype=np.int64),
+            "pedidos_faturados": faturado,
+            "faturados_com_total": total_faturado,
+            "faturamento": np.where(total_faturado, total, 0.0),
+            "faturados_com_desconto": desconto_faturado,
+            "soma_descontos": np.where(desconto_faturado, desconto, 0.0),
+            "frete_gratis": _filtrar(pedidos["frete_gratis"].to_numpy(dtype=bool), com_data),
+        },
+    )
+
+    # dia de cada item pelo pedido (o primeiro, se o código do pedido se repetir)
+    por_pedido = pd.Index(pedidos["CodigoPedido"].to_numpy())
+    primeiro = ~por_pedido.duplicated()
+    posicoes = por_pedido[primeiro].get_indexer(fatos.itens["CodigoPedidoItem"].to_numpy())
+    codigos_itens = np.where(posicoes >= 0, codigos[primeiro][np.maximum(posicoes, 0)], -1)
+    codigos_produto, produtos = _codificar(fatos.itens["CodigoProdutoVendido"])
+    validos = (codigos_itens >= 0) & (codigos_produto >= 0)
+    itens_dia = _somar_por_codigos(
+        {"data": (_filtrar(codigos_itens, validos), dias), "CodigoProdutoVendido": (_filtrar(codigos_produto, validos), produtos)},
+        {"quantidade": _filtrar(_valores_soma(fatos.itens["QuantidadeVendidaItem"]), validos)},
+    )
+    return pedidos_dia, itens_dia, int((~com_data).sum())
+
+
+def _por_mes(cubo_dia: pd.DataFrame, chaves) -> pd.DataFrame:
+    mensal = cubo_dia.assign(data=cubo_dia["data"].to_numpy().astype("datetime64[M]").astype("datetime64[ns]"))
+    return _somar_celulas(mensal, ("data",) + tuple(chaves))
+
+
+def construir_cubos(fatos, versao: str = None, coluna_data: str = COLUNA_DATA) -> Cubos:
+    """Cubos diários e mensais. Fora da memória (DuckDB), os diários saem de `fatos.cubos_diarios`."""
+    inicio = time.perf_counter()
+    montar_no_backend = getattr(fatos, "cubos_diarios", None)
+    if montar_no_backend:
+        pedidos_dia, itens_dia, sem_data = montar_no_backend(coluna_data, DIMENSOES_PEDIDOS)
+        # chaves como category: as somas por período contam pelos códigos (ver somar_periodo)
+        for cubo, colunas in ((pedidos_dia, DIMENSOES_PEDIDOS), (itens_dia, ("CodigoProdutoVendido",))):
+            for coluna in colunas:
+                cubo[coluna] = cubo[coluna].astype("category")
+    else:
+        pedidos_dia, itens_dia, sem_data = _cubos_pandas(fatos, coluna_data)
+    return Cubos(
+        versao=versao,
+        pedidos_dia=pedidos_dia,
+        itens_dia=itens_dia,
+        pedidos_mes=_por_mes(pedidos_dia, DIMENSOES_PEDIDOS),
+        itens_mes=_por_mes(itens_dia, ("CodigoProdutoVendido",)),
+        pedidos_sem_data=sem_data,
+        segundos_construcao=time.perf_counter() - inicio,
+    )
+
+
+def colunas_faltando(fatos) -> list:
+    """Colunas de COLUNAS_CUBOS ausentes nos dados ("tabela.Coluna"); no DuckDB confere só o esquema dos arquivos."""
+    datasets = getattr(fatos, "datasets", None)
+    faltando = []
+    for tabela, colunas in COLUNAS_CUBOS.items():
+        existentes = datasets[tabela].schema.names if datasets else getattr(fatos, tabela).columns
+        faltando += [f"{tabela}.{c}" for c in colunas if c not in existentes]
+    return faltando
+
+
+def obter_cubos(conjunto):
+    """Cubos da versão do conjunto, montados uma vez por versão; None se faltam colunas de COLUNAS_CUBOS."""
+    with _trava_cubos:
+        versao, atual = _cubos.get(conjunto.pasta, (None, None))
+        if versao is None or versao != conjunto.versao:
+            atual = None
+            if not colunas_faltando(conjunto.fatos):
+                with etapa("cubos:construcao"):
+                    atual = construir_cubos(conjunto.fatos, conjunto.versao)
+            _cubos[conjunto.pasta] = (conjunto.versao, atual)
+        return atual
+
+
+# ------------------------------------------------------------------
+# Respostas de um período (somas de células)
+# ------------------------------------------------------------------
+def _somas_por(cubos: Cubos, tabela: str, periodo: Periodo, medidas, por: str):
+    """(rótulos, {medida: somas}) das categorias de `por` com células no período (como observed=True)."""
+    rotulos = cubos.categorias(tabela, por)
+    celulas = np.zeros(len(rotulos), dtype=np.int64)
+    somas = {m: np.zeros(len(rotulos)) for m in medidas}
+    for cubo, de, ate in cubos.intervalos(tabela, periodo.inicio, periodo.fim):
+        codigos = cubos.coluna(cubo, por)[de:ate]
+        validos = codigos >= 0 if (codigos < 0).any() else slice(None)
+        codigos = codigos[validos]
+        celulas += np.bincount(codigos, minlength=len(rotulos))
+        for m in medidas:
+            somas[m] += np.bincount(codigos, weights=cubos.coluna(cubo, m)[de:ate][validos], minlength=len(rotulos))
+    presentes = np.flatnonzero(celulas)
+    return [rotulos[i] for i in presentes], {m: v[presentes] for m, v in somas.items()}
+
+
+def somar_periodo(cubos: Cubos, tabela: str, periodo: Periodo, medidas, por: str = None):
+    """Somas de `medidas` no período: {medida: soma}, ou DataFrame por categoria de `por`.
+
+    Cada intervalo soma direto nas colunas numpy do cubo (por `por`, com np.bincount sobre os
+    códigos da coluna category), sem juntar fatias nem agrupar no pandas.
+    """
+    if por is None:
+        intervalos = cubos.intervalos(tabela, periodo.inicio, periodo.fim)
+        return {m: sum(cubos.coluna(c, m)[de:ate].sum() for c, de, ate in intervalos) for m in medidas}
+    rotulos, somas = _somas_por(cubos, tabela, periodo, medidas, por)
+    colunas = {}
+    for m, valores in somas.items():
+        inteira = cubos.coluna(f"{tabela}_dia", m).dtype.kind in "iu"
+        colunas[m] = np.rint(valores).astype(np.int64) if inteira else valores  # bincount soma em float64
+    tipo = getattr(cubos, f"{tabela}_dia")[por].cat.categories.dtype
+    return pd.DataFrame(colunas, index=pd.Index(rotulos, dtype=tipo, name=por))
+
+
+def _contagens(cubos: Cubos, periodo: Periodo, coluna: str) -> dict:
+    rotulos, somas = _somas_por(cubos, "pedidos", periodo, ("pedidos",), coluna)
+    return {str(r): int(round(q)) for r, q in zip(rotulos, somas["pedidos"]) if q}
+
+
+def agregados_periodo(cubos: Cubos, periodo: Periodo) -> Agregados:
+    """Os mesmos agregados de metricas.obter_agregados, restritos ao período."""
+    somas = somar_periodo(cubos, "pedidos", periodo, MEDIDAS_PEDIDOS)
+    produtos, quantidades = _somas_por(cubos, "itens", periodo, ("quantidade",), "CodigoProdutoVendido")
+    quantidades = quantidades["quantidade"]
+    if cubos.coluna("itens_dia", "quantidade").dtype.kind in "iu":
+        quantidades = np.rint(quantidades).astype(np.int64)  # bincount soma em float64
+    return Agregados(
+        versao=cubos.versao,
+        total_pedidos=int(somas["pedidos"]),
+        pedidos_faturados=int(somas["pedidos_faturados"]),
+        faturados_com_total=int(somas["faturados_com_total"]),
+        soma_total_faturado=float(somas["faturamento"]),
+        faturados_com_desconto=int(somas["faturados_com_desconto"]),
+        soma_desconto_faturado=float(somas["soma_descontos"]),
+        frete_gratis=int(somas["frete_gratis"]),
+        por_forma_pagamento=_contagens(cubos, periodo, "FormaPagamento"),
+        por_situacao=_contagens(cubos, periodo, "SituacaoPedido"),
+        por_tipo_cliente=_contagens(cubos, periodo, "TipoCliente"),
+        quantidade_por_produto=dict(zip(produtos, quantidades.tolist())),
+    )
+
+
+def _agregar_periodo(cubos: Cubos, periodo: Periodo, tabela: str, chaves_metricas, dimensoes, produtos) -> pd.DataFrame:
+    """Mesmo formato de motor._agregar_tabela (métricas por chave, indexadas pelas dimensões)."""
+    grupos = []
+    for d in dimensoes:
+        if tabela not in DIMENSOES[d].colunas:
+            raise ValueError(f"Dimensão '{d}' não existe na tabela de {tabela}.")
+        grupos.append(DIMENSOES[d].colunas[tabela])
+    medidas = list(MEDIDAS_PEDIDOS) if tabela == "pedidos" else ["quantidade"]
+    if len(grupos) == 1:
+        somas = somar_periodo(cubos, tabela, periodo, medidas, por=grupos[0])
+    elif grupos:
+        celulas = cubos.celulas(tabela, periodo.inicio, periodo.fim)
+        somas = celulas.groupby(grupos, observed=True)[medidas].sum()
+    else:
+        somas = pd.DataFrame([somar_periodo(cubos, tabela, periodo, medidas)])
+    if grupos:
+        somas.index.names = list(dimensoes)
+
+    resultado = pd.DataFrame(index=somas.index)
+    for chave in chaves_metricas:
+        if chave in RAZOES:
+            soma, contagem = RAZOES[chave]
+            resultado[chave] = somas[soma] / somas[contagem].where(somas[contagem] > 0)
+        else:
+            resultado[chave] = somas[chave]
+    for d in dimensoes:
+        descricao = DIMENSOES[d].descricao
+        if descricao:
+            codigos = somas.index.get_level_values(d)
+            nomes = produtos[descricao] if descricao in produtos.columns else pd.Series(dtype=object)
+            resultado[f"{d}__descricao"] = codigos.map(nomes).to_numpy()
+    return resultado
+
+
+def recorte_periodo(cubos: Cubos, consulta: Consulta, periodo: Periodo, produtos: pd.DataFrame) -> pd.DataFrame:
+    """motor.executar restrito ao período, somando células (sem filtros: os cubos não guardam as colunas)."""
+    if consulta.filtros:
+        raise ValueError("Consultas com filtros não são respondidas pelos cubos.")
+    por_tabela = {}
+    for chave in consulta.metricas:
+        por_tabela.setdefault(METRICAS[chave].tabela, []).append(chave)
+    partes = []
+    with etapa("cubos:recorte"):
+        for tabela, chaves in por_tabela.items():
+            partes.append(_agregar_periodo(cubos, periodo, tabela, chaves, consulta.dimensoes, produtos))
+    agregado = partes[0] if len(partes) == 1 else pd.concat(partes, axis=1, join="outer")
+    return apresentar(agregado, consulta)
+
+
+# ------------------------------------------------------------------
+# Conferência contra os pedidos filtrados
+# ------------------------------------------------------------------
+def agregados_filtrando(fatos, periodo: Periodo, coluna_data: str = COLUNA_DATA) -> Agregados:
+    """Referência (e o custo que os cubos evitam): filtra pedidos e itens do período e soma."""
+    dias = _dias(fatos.pedidos[coluna_data])
+    no_periodo = (dias >= np.datetime64(periodo.inicio, "ns")) & (dias <= np.datetime64(periodo.fim, "ns"))
+    pedidos = fatos.pedidos[no_periodo]
+    itens = fatos.itens[fatos.itens["CodigoPedidoItem"].isin(pedidos["CodigoPedido"]).to_numpy()]
+    agregados = Agregados()
+    agregados.somar_pedidos(pedidos, pedidos["TipoCliente"])
+    agregados.somar_itens(itens)
+    return agregados
+
+
+def periodos_de_conferencia(cubos: Cubos) -> dict:
+    """Histórico inteiro, um mês, um trimestre, um intervalo que cruza meses e a última semana."""
+    primeiro, ultimo = cubos.primeiro_dia, cubos.ultimo_dia
+    meio = primeiro + (ultimo - primeiro) / 2
+    return {
+        "todo o histórico": Periodo(primeiro, ultimo),
+        "um mês": Periodo(meio.replace(day=1), somar_meses(meio.replace(day=1), 1) - timedelta(days=1)),
+        "um trimestre": Periodo(primeiro, somar_meses(primeiro.replace(day=1), 3) - timedelta(days=1)),
+        "cruzando meses": Periodo(meio - timedelta(days=45), meio + timedelta(days=20)),
+        "última semana": Periodo(ultimo - timedelta(days=6), ultimo),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pasta", default=PASTA_DADOS)
+    parser.add_argument("--backend", choices=["pandas", "duckdb"], help="backend que monta os cubos")
+    args = parser.parse_args()
+
+    conjunto = obter_conjunto(args.pasta, args.backend)
+    cubos = obter_cubos(conjunto)
+    if cubos is None:
+        raise SystemExit(f"Faltam colunas nos dados ({', '.join(colunas_faltando(conjunto.fatos))}): sem cubos de período.")
+    referencia = obter_conjunto(args.pasta, "pandas").fatos
+    print(
+        f"Cubos em {cubos.segundos_construcao * 1000:.0f} ms: {len(cubos.pedidos_dia):,} células diárias de pedidos, "
+        f"{len(cubos.itens_dia):,} de itens ({cubos.primeiro_dia} a {cubos.ultimo_dia}; "
+        f"{cubos.pedidos_sem_data} pedidos sem data)"
+    )
+    falhas = 0
+    for nome, periodo in periodos_de_conferencia(cubos).items():
+        divergencias = comparar_agregados(agregados_periodo(cubos, periodo), agregados_filtrando(referencia, periodo))
+        falhas += bool(divergencias)
+        print(f"{'❌' if divergencias else '✔️'} {nome} ({periodo.descricao()})")
+        for campo, (cubo, filtro) in divergencias.items():
+            print(f"    {campo}: cubos={cubo} | filtro={filtro}")
+    raise SystemExit(1 if falhas else 0)
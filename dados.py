@@ -0,0 +1,441 @@
+# dados.py
+"""Camada de carregamento dos CSVs com cache colunar em disco (Arrow IPC / Feather v2)."""
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from fatos import Fatos, construir_fatos
+from instrumentacao import etapa
+
+PASTA_DADOS = "data"
+PASTA_CACHE = ".cache"
+# Backend de execução das consultas: "pandas" (tudo em memória, padrão) ou "duckdb" (motor_duckdb.py,
+# pedidos e itens consultados direto dos arquivos Arrow, sem carregar na memória).
+BACKEND = os.getenv("SKYONE_BACKEND", "pandas")
+PASTA_LOTES = "lotes"  # lotes anexados em modo incremental (incremental.py): data/lotes/<tabela>/lote-NNNNNN.arrow
+
+# Incrementar quando o conteúdo gravado no cache mudar (esquema, colunas derivadas...).
+VERSAO_CACHE = 5
+
+ARQUIVOS = {
+    "clientes": "clients.csv",
+    "pedidos": "orders.csv",
+    "itens": "items.csv",
+    "produtos": "products.csv",
+}
+
+# Esquema explícito das colunas que o app usa. Colunas fora daqui seguem a inferência do pandas;
+# se uma coluna declarada não couber no tipo (ex.: código alfanumérico), o tipo inferido é mantido.
+ESQUEMAS = {
+    "clientes": {
+        "CodigoCliente": "Int64",
+        "TipoCliente": "string",
+    },
+    "pedidos": {
+        "CodigoClientePedido": "Int64",
+        "SituacaoPedido": "string",
+        "TotalPedido": "float64",
+        "ValorDesconto": "float64",
+        "FreteGratis": "string",
+        "FormaPagamento": "string",
+    },
+    "itens": {
+        "CodigoProdutoVendido": "Int64",
+        "QuantidadeVendidaItem": "float64",
+    },
+    "produtos": {
+        "CodigoProduto": "Int64",
+        "Produto": "string",
+    },
+}
+
+# Política de tipos aplicada depois da ingestão: texto com poucos valores distintos vira category,
+# inteiros são reduzidos ao menor tipo que os comporta (nullable quando há vazios).
+CATEGORICAS = {
+    "clientes": ["TipoCliente"],
+    "pedidos": ["SituacaoPedido", "FormaPagamento", "FreteGratis"],
+    "itens": [],
+    "produtos": ["Produto"],
+}
+LIMITE_CARDINALIDADE = 0.5  # demais colunas de texto viram category se distintos/linhas ficar abaixo disso
+
+VALORES_VERDADEIROS = ["sim", "s", "true", "1"]
+COLUNAS_MONETARIAS = ["TotalPedido", "ValorDesconto"]
+COLUNAS_DERIVADAS = {"pedidos": ["is_faturado", "frete_gratis"]}  # criadas por preparar_pedidos
+# marca (bool) das células monetárias que preparar_pedidos trocou por 0.0; só existe se houver alguma
+SUFIXO_INVALIDO = "__invalido"
+
+
+# ------------------------------------------------------------------
+# Invalidação (mtime + hash)
+# ------------------------------------------------------------------
+def _sha256(caminho: str, bloco=1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for parte in iter(lambda: f.read(bloco), b""):
+            h.update(parte)
+    return h.hexdigest()
+
+
+def _origens(tabela: str, pasta: str):
+    """(origem usada, origem ignorada ou None): com CSV e Parquet na pasta, vale o mais recente."""
+    # o conversor grava um ou outro (converter_xlsx_para_csv.py --formato), sem apagar o anterior
+    csv = os.path.join(pasta, ARQUIVOS[tabela])
+    parquet = os.path.splitext(csv)[0] + ".parquet"
+    if not os.path.exists(parquet):
+        return csv, None
+    if not os.path.exists(csv):
+        return parquet, None
+    if os.stat(parquet).st_mtime_ns >= os.stat(csv).st_mtime_ns:
+        return parquet, csv
+    return csv, parquet
+
+
+def _caminhos(tabela: str, pasta: str):
+    origem = _origens(tabela, pasta)[0]
+    cache = os.path.join(pasta, PASTA_CACHE)
+    return origem, os.path.join(cache, f"{tabela}.arrow"), os.path.join(cache, f"{tabela}.json")
+
+
+def _ler_manifesto(caminho: str):
+    try:
+        with open(caminho, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _gravar_json(caminho: str, conteudo: dict):
+    tmp = caminho + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(conteudo, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, caminho)
+
+
+def cache_valido(tabela: str, pasta: str = PASTA_DADOS) -> bool:
+    """True se o arquivo colunar corresponde ao CSV atual (mesmo mtime/tamanho ou mesmo hash)."""
+    origem, arrow, manifesto_path = _caminhos(tabela, pasta)
+    manifesto = _ler_manifesto(manifesto_path)
+    if not manifesto or not os.path.exists(arrow):
+        return False
+    if manifesto.get("versao_cache") != VERSAO_CACHE:
+        return False
+    if os.path.basename(manifesto.get("origem", "")) != os.path.basename(origem):
+        return False  # reconvertido no outro formato
+    st_origem = os.stat(origem)
+    if st_origem.st_mtime_ns == manifesto["mtime_ns"] and st_origem.st_size == manifesto["tamanho"]:
+        return True
+    # mtime mudou (cópia, touch, deploy): só reconstrói se o conteúdo mudou de fato.
+    if st_origem.st_size != manifesto["tamanho"] or _sha256(origem) != manifesto["sha256"]:
+        return False
+    manifesto["mtime_ns"] = st_origem.st_mtime_ns
+    _gravar_json(manifesto_path, manifesto)
+    return True
+
+
+# ------------------------------------------------------------------
+# Construção e leitura
+# ------------------------------------------------------------------
+def _aplicar_esquema(df: pd.DataFrame, esquema: dict):
+    avisos = []
+    for coluna, tipo in esquema.items():
+        if coluna not in df.columns:
+            continue
+        try:
+            df[coluna] = df[coluna].astype(tipo)
+        except (TypeError, ValueError) as e:
+            avisos.append(f"{coluna}: mantido {df[coluna].dtype} ({e})")
+    return df, avisos
+
+
+def preparar_pedidos(pedidos: pd.DataFrame):
+    """Normaliza pedidos uma única vez: flags booleanas e colunas monetárias em float64.
+
+    Valores monetários não numéricos viram 0.0 (mesma regra do antigo safe_float), são contados e
+    marcados em <coluna>__invalido (a exportação os deixa vazios); células vazias continuam NaN.
+    """
+    invalidos = {}
+    for coluna in COLUNAS_MONETARIAS:
+        if coluna not in pedidos.columns:
+            continue
+        original = pedidos[coluna]
+        convertido = pd.to_numeric(original, errors="coerce").astype("float64")
+        ruins = convertido.isna() & original.notna()
+        invalidos[coluna] = int(ruins.sum())
+        pedidos[coluna] = convertido.mask(ruins, 0.0)
+        if invalidos[coluna]:
+            pedidos[coluna + SUFIXO_INVALIDO] = ruins.to_numpy()
+
+    if "SituacaoPedido" in pedidos.columns:
+        pedidos["is_faturado"] = pedidos["SituacaoPedido"].astype(str).str.lower().eq("faturado").astype(bool)
+    if "FreteGratis" in pedidos.columns:
+        pedidos["frete_gratis"] = pedidos["FreteGratis"].astype(str).str.lower().isin(VALORES_VERDADEIROS).astype(bool)
+    return pedidos, invalidos
+
+
+def colunas_derivadas(tabela: str, colunas) -> list:
+    """As `colunas` criadas na ingestão (não vêm da origem): flags de pedidos e marcas de valor inválido."""
+    return [c for c in colunas if c in COLUNAS_DERIVADAS.get(tabela, []) or c.endswith(SUFIXO_INVALIDO)]
+
+
+def _e_texto(serie: pd.Series) -> bool:
+    return pd.api.types.is_object_dtype(serie) or pd.api.types.is_string_dtype(serie)
+
+
+def otimizar_tipos(df: pd.DataFrame, tabela: str) -> pd.DataFrame:
+    """Aplica a política de tipos: category para texto repetitivo, inteiros reduzidos, floats inteiros viram int."""
+    categoricas = set(CATEGORICAS.get(tabela, []))
+    linhas = max(df.shape[0], 1)
+    for coluna in df.columns:
+        serie = df[coluna]
+        if isinstance(serie.dtype, pd.CategoricalDtype) or pd.api.types.is_bool_dtype(serie):
+            continue
+        if _e_texto(serie):
+            if coluna in categoricas or serie.nunique(dropna=True) / linhas < LIMITE_CARDINALIDADE:
+                df[coluna] = serie.astype("category")
+            elif pd.api.types.is_object_dtype(serie) and serie.dropna().map(type).eq(str).all():
+                df[coluna] = serie.astype("string[pyarrow]")
+        elif pd.api.types.is_integer_dtype(serie):
+            df[coluna] = pd.to_numeric(serie, downcast="integer")
+        elif pd.api.types.is_float_dtype(serie) and coluna not in COLUNAS_MONETARIAS:
+            valores = serie.dropna()
+            if len(valores) and (valores % 1 == 0).all():
+                inteiro = serie.astype("Int64") if serie.hasnans else serie.astype("int64")
+                df[coluna] = pd.to_numeric(inteiro, downcast="integer")
+    return df
+
+
+# Etapas de ingestão aplicadas antes de gravar o cache (o resultado já sai pronto para as consultas).
+PREPARADORES = {
+    "pedidos": preparar_pedidos,
+}
+
+
+def normalizar_tabela(df: pd.DataFrame, tabela: str):
+    """Esquema + preparação + política de tipos; devolve (df, avisos de esquema, valores inválidos)."""
+    df, avisos = _aplicar_esquema(df, ESQUEMAS.get(tabela, {}))
+    invalidos = {}
+    if tabela in PREPARADORES:
+        df, invalidos = PREPARADORES[tabela](df)
+    return otimizar_tipos(df, tabela), avisos, invalidos
+
+
+def gravar_arrow(df: pd.DataFrame, caminho: str):
+    tmp = caminho + ".tmp"
+    # Sem compressão: o arquivo pode ser mapeado em memória sem descompactar.
+    feather.write_feather(pa.Table.from_pandas(df, preserve_index=False), tmp, compression="uncompressed")
+    os.replace(tmp, caminho)
+
+
+def construir_cache(tabela: str, pasta: str = PASTA_DADOS) -> dict:
+    """Lê o CSV (ou Parquet) uma única vez, aplica o esquema e grava o arquivo colunar + manifesto."""
+    origem, arrow, manifesto_path = _caminhos(tabela, pasta)
+    ignorada = _origens(tabela, pasta)[1]
+    os.makedirs(os.path.dirname(arrow), exist_ok=True)
+    inicio = time.perf_counter()
+    st_origem = os.stat(origem)
+    if origem.endswith(".parquet"):
+        df = pd.read_parquet(origem)
+    else:
+        df = pd.read_csv(origem, encoding="utf-8")
+    memoria_antes = int(df.memory_usage(deep=True).sum())
+    df, avisos, invalidos = normalizar_tabela(df, tabela)
+    gravar_arrow(df, arrow)
+
+    manifesto = {
+        "versao_cache": VERSAO_CACHE,
+        "origem": origem,
+        "origem_ignorada": ignorada,  # o outro formato na pasta, mais antigo
+        "mtime_ns": st_origem.st_mtime_ns,
+        "tamanho": st_origem.st_size,
+        "sha256": _sha256(origem),
+        "linhas": int(df.shape[0]),
+        "esquema": {c: str(t) for c, t in df.dtypes.items()},
+        "avisos_esquema": avisos,
+        "valores_invalidos": invalidos,
+        "memoria_bytes": {"antes": memoria_antes, "depois": int(df.memory_usage(deep=True).sum())},
+        "segundos_construcao": round(time.perf_counter() - inicio, 4),
+    }
+    _gravar_json(manifesto_path, manifesto)
+    return manifesto
+
+
+def _ler_arrow(caminho: str) -> pd.DataFrame:
+    # split_blocks: colunas numéricas sem nulos viram views somente leitura do arquivo mapeado (sem cópia).
+    return feather.read_table(caminho, memory_map=True).to_pandas(split_blocks=True)
+
+
+def arquivos_lotes(tabela: str, pasta: str = PASTA_DADOS) -> list:
+    """Lotes anexados à tabela, na ordem de chegada."""
+    pasta_lotes = os.path.join(pasta, PASTA_LOTES, tabela)
+    if not os.path.isdir(pasta_lotes):
+        return []
+    return [os.path.join(pasta_lotes, n) for n in sorted(os.listdir(pasta_lotes)) if n.endswith(".arrow")]
+
+
+def _empilhar(partes) -> pd.DataFrame:
+    """Concatena base + lotes mantendo as colunas category (categorias unidas, na ordem de chegada)."""
+    base = partes[0]
+    for coluna in base.columns:
+        if not isinstance(base[coluna].dtype, pd.CategoricalDtype):
+            # lote pequeno pode ter virado category onde a base é texto: volta ao tipo da base
+            for parte in partes[1:]:
+                if coluna in parte.columns and isinstance(parte[coluna].dtype, pd.CategoricalDtype):
+                    parte[coluna] = parte[coluna].astype(base[coluna].dtype)
+            continue
+        categorias = pd.Index(base[coluna].cat.categories)
+        for parte in partes[1:]:
+            if coluna not in parte.columns:
+                continue
+            serie = parte[coluna]
+            valores = serie.cat.categories if isinstance(serie.dtype, pd.CategoricalDtype) else serie.dropna().unique()
+            categorias = categorias.append(pd.Index(valores).difference(categorias))
+        tipo = pd.CategoricalDtype(categorias)
+        for parte in partes:
+            if coluna in parte.columns:
+                parte[coluna] = parte[coluna].astype(tipo)
+    return pd.concat(partes, ignore_index=True)
+
+
+def arquivos_tabela(tabela: str, pasta: str = PASTA_DADOS) -> list:
+    """Arquivos Arrow que compõem a tabela: o cache da base (reconstruído se o CSV mudou) e os lotes."""
+    if not cache_valido(tabela, pasta):
+        construir_cache(tabela, pasta)
+    return [_caminhos(tabela, pasta)[1]] + arquivos_lotes(tabela, pasta)
+
+
+def ler_tabela(tabela: str, pasta: str = PASTA_DADOS) -> pd.DataFrame:
+    """Retorna a tabela a partir do cache colunar + lotes anexados."""
+    arquivos = arquivos_tabela(tabela, pasta)
+    if len(arquivos) == 1:
+        return _ler_arrow(arquivos[0])
+    return _empilhar([_ler_arrow(c) for c in arquivos])
+
+
+def carregar_tabelas(pasta: str = PASTA_DADOS):
+    """Carrega clientes, pedidos, itens e produtos (nesta ordem)."""
+    return tuple(ler_tabela(t, pasta) for t in ARQUIVOS)
+
+
+# ------------------------------------------------------------------
+# Conjunto compartilhado (um por processo, somente leitura)
+# ------------------------------------------------------------------
+@dataclass(frozen=True)
+class ConjuntoDados:
+    """As quatro tabelas carregadas, a camada de fatos e o carimbo de versão. Não deve ser alterado por quem o recebe.
+
+    No backend duckdb, pedidos e itens ficam None (consultados do disco por `fatos`); use `amostra`/`tabela`.
+    """
+
+    versao: str
+    clientes: pd.DataFrame = field(repr=False)
+    pedidos: pd.DataFrame = field(repr=False)
+    itens: pd.DataFrame = field(repr=False)
+    produtos: pd.DataFrame = field(repr=False)
+    fatos: Fatos = field(default=None, repr=False)
+    carregado_em: float = 0.0
+    pasta: str = PASTA_DADOS
+
+    def tabelas(self):
+        return self.clientes, self.pedidos, self.itens, self.produtos
+
+    def tabela(self, nome: str) -> pd.DataFrame:
+        """Tabela inteira em memória (materializada do disco no backend duckdb)."""
+        df = getattr(self, nome)
+        return df if df is not None else self.fatos.materializar(nome)
+
+    def amostra(self, nome: str, n: int = 5) -> pd.DataFrame:
+        df = getattr(self, nome)
+        return df.head(n) if df is not None else self.fatos.amostra(nome, n)
+
+
+_conjuntos = {}
+_trava_conjuntos = threading.Lock()
+_ouvintes_troca = []
+
+
+def ao_trocar_versao(callback):
+    """Registra callback(versao_antiga, versao_nova) chamado quando obter_conjunto troca o conjunto."""
+    _ouvintes_troca.append(callback)
+
+
+def versao_dados(pasta: str = PASTA_DADOS) -> str:
+    """Carimbo curto derivado do hash de cada CSV e dos lotes anexados; reconstrói caches desatualizados antes."""
+    h = hashlib.sha256(str(VERSAO_CACHE).encode())
+    for tabela in ARQUIVOS:
+        if not cache_valido(tabela, pasta):
+            construir_cache(tabela, pasta)
+        h.update(_ler_manifesto(_caminhos(tabela, pasta)[2])["sha256"].encode())
+        # lotes são imutáveis depois de gravados: nome + tamanho bastam
+        for lote in arquivos_lotes(tabela, pasta):
+            h.update(f"{tabela}/{os.path.basename(lote)}:{os.path.getsize(lote)}".encode())
+    return h.hexdigest()[:12]
+
+
+def obter_conjunto(pasta: str = PASTA_DADOS, backend: str = None) -> ConjuntoDados:
+    """Devolve o conjunto do processo, trocando-o de forma atômica quando a versão dos dados muda.
+
+    Todas as sessões recebem o mesmo objeto (sem cópia); quem ainda segura a versão anterior
+    continua consistente até o próximo rerun. `backend` sobrepõe a configuração SKYONE_BACKEND.
+    """
+    backend = backend or BACKEND
+    with _trava_conjuntos:
+        with etapa("versao_dados"):
+            versao = versao_dados(pasta)
+        atual = _conjuntos.get((pasta, backend))
+        if atual is None or atual.versao != versao:
+            anterior = atual.versao if atual else None
+            if backend not in ("pandas", "duckdb"):
+                raise ValueError(f"Backend desconhecido: {backend!r} (use 'pandas' ou 'duckdb').")
+            with etapa(f"carga:{backend}"):
+                if backend == "duckdb":
+                    from motor_duckdb import FatosDuckDB
+
+                    # só as dimensões (pequenas) vão para a memória
+                    clientes, produtos = ler_tabela("clientes", pasta), ler_tabela("produtos", pasta)
+                    tabelas = (clientes, None, None, produtos)
+                    fatos = FatosDuckDB(pasta, clientes, produtos)
+                else:
+                    tabelas = carregar_tabelas(pasta)
+                    fatos = construir_fatos(*tabelas)
+            atual = ConjuntoDados(versao, *tabelas, fatos=fatos, carregado_em=time.time(), pasta=pasta)
+            _conjuntos[(pasta, backend)] = atual
+            for callback in _ouvintes_troca:
+                callback(anterior, versao)
+        return atual
+
+
+def relatorio_ingestao(pasta: str = PASTA_DADOS) -> dict:
+    """Manifesto de cada tabela (linhas, esquema final, avisos e valores inválidos convertidos)."""
+    return {t: _ler_manifesto(_caminhos(t, pasta)[2]) or {} for t in ARQUIVOS}
+
+
+def relatorio_memoria(pasta: str = PASTA_DADOS) -> pd.DataFrame:
+    """memory_usage(deep=True) de cada tabela como lida do CSV (antes) e com a política de tipos (depois)."""
+    linhas = []
+    for tabela, manifesto in relatorio_ingestao(pasta).items():
+        memoria = manifesto.get("memoria_bytes", {})
+        antes, depois = memoria.get("antes", 0), memoria.get("depois", 0)
+        linhas.append(
+            {
+                "Tabela": tabela,
+                "Antes (MB)": round(antes / 2**20, 2),
+                "Depois (MB)": round(depois / 2**20, 2),
+                "Redução (%)": round((1 - depois / antes) * 100, 1) if antes else 0.0,
+            }
+        )
+    return pd.DataFrame(linhas)
+
+
+def limpar_cache(pasta: str = PASTA_DADOS):
+    for tabela in ARQUIVOS:
+        for caminho in _caminhos(tabela, pasta)[1:]:
+            if os.path.exists(caminho):
+                os.remove(caminho)
@@ -0,0 +1,235 @@
+# despacho_llm.py
+"""Despacho das chamadas ao modelo: pool de threads limitado, balde de tokens e chamadas coalescidas.
+
+Cada chamada tem uma chave (o hash do prompt, cache_llm.chave_llm). Se uma chamada com a mesma chave
+já está na fila ou em execução, quem chega depois acompanha a mesma (single-flight): uma requisição
+ao provedor, o texto entregue a todos, pedaço a pedaço. As novas entram numa fila atendida por no
+máximo `max_concorrentes` threads; antes de chamar o provedor cada uma tira um token do balde
+(`taxa` por segundo, rajadas de até `rajada`). A fila tem limite: cheia, a chamada é recusada na hora.
+
+Prazos: quem espera desiste depois de `timeout` segundos (TimeoutError) sem travar os demais; uma
+chamada que passou `timeout_fila` esperando vaga/token é descartada sem ir ao provedor, e uma em
+execução sem ninguém acompanhando é interrompida no próximo pedaço.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import instrumentacao
+
+JANELA_ESPERAS = 1000
+
+
+class BaldeTokens:
+    """Limite de taxa: `taxa` tokens por segundo, acumulando no máximo `capacidade`."""
+
+    def __init__(self, taxa: float, capacidade: float):
+        self.taxa = float(taxa)
+        self.capacidade = float(capacidade)
+        self._tokens = self.capacidade
+        self._atualizado = time.monotonic()
+        self._trava = threading.Lock()
+
+    def retirar(self, prazo: float = None) -> bool:
+        """Espera um token até o instante `prazo` (time.monotonic); False se o prazo passar antes."""
+        while True:
+            with self._trava:
+                agora = time.monotonic()
+                self._tokens = min(self.capacidade, self._tokens + (agora - self._atualizado) * self.taxa)
+                self._atualizado = agora
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                falta = (1 - self._tokens) / self.taxa
+            if prazo is not None and agora + falta > prazo:
+                return False
+            time.sleep(falta)
+
+
+class Chamada:
+    """Uma requisição ao provedor compartilhada por todos que pediram a mesma chave."""
+
+    def __init__(self, chave: str):
+        self.chave = chave
+        self.pedacos = []
+        self.concluida = False
+        self.erro = None
+        self.assinantes = 0
+        self.criada_em = time.monotonic()
+        self.iniciada_em = None  # saiu da fila e tirou o token
+        self.conectada_em = None  # o provedor respondeu os cabeçalhos
+        self._condicao = threading.Condition()
+
+    @property
+    def espera_fila(self):
+        return None if self.iniciada_em is None else self.iniciada_em - self.criada_em
+
+    def _publicar(self, pedaco=None, erro=None, fim=False):
+        with self._condicao:
+            if pedaco is not None:
+                self.pedacos.append(pedaco)
+            if erro is not None:
+                self.erro = erro
+            self.concluida = self.concluida or fim or erro is not None
+            self._condicao.notify_all()
+
+    def acompanhar(self, prazo: float):
+        """Gera os pedaços desde o primeiro, esperando os novos até o instante `prazo` (time.monotonic)."""
+        lidos = 0
+        while True:
+            with self._condicao:
+                while lidos == len(self.pedacos) and not self.concluida:
+                    restante = prazo - time.monotonic()
+                    if restante <= 0:
+                        raise TimeoutError("O modelo não respondeu a tempo.")
+                    self._condicao.wait(restante)
+                novos = self.pedacos[lidos:]
+                lidos = len(self.pedacos)
+                terminou, erro = self.concluida, self.erro
+            yield from novos
+            if terminou and lidos == len(self.pedacos):
+                if erro is not None:
+                    raise erro
+                return
+
+
+class DespachoLLM:
+    def __init__(
+        self,
+        max_concorrentes: int = 4,
+        taxa: float = 5.0,
+        rajada: float = 10,
+        max_fila: int = 32,
+        timeout_fila: float = 30.0,
+        timeout: float = 90.0,
+    ):
+        self.max_concorrentes = max_concorrentes
+        self.max_fila = max_fila
+        self.timeout_fila = timeout_fila
+        self.timeout = timeout
+        self.balde = BaldeTokens(taxa, rajada)
+        self._pool = ThreadPoolExecutor(max_workers=max_concorrentes, thread_name_prefix="llm")
+        self._em_voo = {}  # chave -> Chamada ainda não concluída
+        self._trava = threading.Lock()
+        self._na_fila = 0
+        self._em_execucao = 0
+        self._contadores = dict.fromkeys(
+            ("chamadas", "coalescidas", "recusadas", "tempo_esgotado", "descartadas", "interrompidas", "erros"), 0
+        )
+        self._esperas = deque(maxlen=JANELA_ESPERAS)
+
+    # ------------------------------------------------------------------
+    # Entrada
+    # ------------------------------------------------------------------
+    def acompanhar(self, chave: str, produtor, timeout: float = None):
+        """Gera o texto da chamada `chave` pedaço a pedaço; devolve (gerador, chamada).
+
+        `produtor()` devolve um iterável de pedaços de texto e só roda se não houver chamada igual em voo;
+        um `None` emitido por ele marca a conexão (cabeçalhos recebidos). Fila cheia: RuntimeError;
+        sem resposta em `timeout` (padrão do despacho): TimeoutError ao consumir o gerador.
+        """
+        with self._trava:
+            chamada = self._em_voo.get(chave)
+            nova = chamada is None
+            if nova:
+                if self._na_fila >= self.max_fila:
+                    self._contadores["recusadas"] += 1
+                    raise RuntimeError(f"Fila do modelo cheia ({self._na_fila} chamadas esperando); tente de novo.")
+                chamada = self._em_voo[chave] = Chamada(chave)
+                self._na_fila += 1
+                self._contadores["chamadas"] += 1
+            else:
+                self._contadores["coalescidas"] += 1
+            chamada.assinantes += 1  # antes do submit: a thread do pool descarta chamada sem assinantes
+            if nova:
+                self._pool.submit(self._executar, chamada, produtor)
+        prazo = time.monotonic() + (self.timeout if timeout is None else timeout)
+        return self._assinar(chamada, prazo), chamada
+
+    def executar(self, chave: str, produtor, timeout: float = None) -> str:
+        """Texto completo da chamada (bloqueia; mesmas regras de `acompanhar`)."""
+        fluxo, _ = self.acompanhar(chave, produtor, timeout)
+        return "".join(fluxo)
+
+    def _assinar(self, chamada: Chamada, prazo: float):
+        try:
+            yield from chamada.acompanhar(prazo)
+        except TimeoutError:
+            with self._trava:
+                self._contadores["tempo_esgotado"] += 1
+            raise
+        finally:
+            with self._trava:
+                chamada.assinantes -= 1
+
+    # ------------------------------------------------------------------
+    # Threads do pool
+    # ------------------------------------------------------------------
+    def _executar(self, chamada: Chamada, produtor):
+        prazo_fila = chamada.criada_em + self.timeout_fila
+        # quem pediu pode ter desistido enquanto a chamada esperava: aí ela nem chega ao provedor
+        liberada = chamada.assinantes > 0 and time.monotonic() <= prazo_fila and self.balde.retirar(prazo_fila)
+        with self._trava:
+            self._na_fila -= 1
+            if liberada:
+                self._em_execucao += 1
+        if not liberada:
+            self._encerrar(chamada, "descartadas", TimeoutError("Tempo de espera na fila do modelo esgotado."))
+            return
+        chamada.iniciada_em = time.monotonic()
+        self._registrar_espera(chamada.espera_fila)
+        fluxo = None
+        try:
+            fluxo = iter(produtor())
+            for pedaco in fluxo:
+                if pedaco is None:
+                    chamada.conectada_em = chamada.conectada_em or time.monotonic()
+                    continue
+                chamada._publicar(pedaco)
+                if chamada.assinantes == 0:  # todos desistiram: não paga o resto da geração
+                    self._encerrar(chamada, "interrompidas", TimeoutError("Chamada interrompida: ninguém esperando."))
+                    return
+        except Exception as e:
+            self._encerrar(chamada, "erros", e)
+            return
+        finally:
+            if fluxo is not None and hasattr(fluxo, "close"):
+                fluxo.close()
+            with self._trava:
+                self._em_execucao -= 1
+        self._encerrar(chamada)
+
+    def _encerrar(self, chamada: Chamada, contador: str = None, erro: Exception = None):
+        with self._trava:
+            if self._em_voo.get(chamada.chave) is chamada:
+                del self._em_voo[chamada.chave]
+            if contador:
+                self._contadores[contador] += 1
+        chamada._publicar(erro=erro, fim=True)
+
+    def _registrar_espera(self, segundos: float):
+        with self._trava:
+            self._esperas.append(segundos)
+        if instrumentacao.ativo:
+            instrumentacao.registrar("etapa", "llm:espera_fila", segundos)
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+    def estatisticas(self) -> dict:
+        with self._trava:
+            esperas = sorted(self._esperas)
+            saida = {
+                "na_fila": self._na_fila,
+                "em_execucao": self._em_execucao,
+                "max_concorrentes": self.max_concorrentes,
+                "max_fila": self.max_fila,
+                "taxa_por_segundo": self.balde.taxa,
+                **self._contadores,
+            }
+        pedidos = saida["chamadas"] + saida["coalescidas"]
+        saida["taxa_coalescencia"] = saida["coalescidas"] / pedidos if pedidos else 0.0
+        for rotulo, p in (("espera_p50_ms", 0.50), ("espera_p95_ms", 0.95)):
+            saida[rotulo] = esperas[min(int(len(esperas) * p), len(esperas) - 1)] * 1000 if esperas else 0.0
+        return saida
@@ -0,0 +1,84 @@
+# fatos.py
+"""Camada de fatos desnormalizada, montada uma vez por carga: pedidos e itens já enriquecidos + índices por chave."""
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+# Descritivos do produto levados para os itens (apenas os que existirem no CSV de produtos).
+COLUNAS_PRODUTO = ["Produto", "Categoria", "CategoriaProduto"]
+
+
+class IndiceChave:
+    """Índice ordenado (chave -> posições) sobre uma coluna; busca binária, sem dicionário por chave."""
+
+    def __init__(self, chaves: pd.Series):
+        validos = chaves.notna().to_numpy()
+        posicoes = np.flatnonzero(validos)
+        valores = chaves[validos].to_numpy()
+        ordem = np.argsort(valores, kind="stable")
+        self.ordem = posicoes[ordem]
+        self.chaves = valores[ordem]
+
+    def posicoes(self, chave) -> np.ndarray:
+        inicio = np.searchsorted(self.chaves, chave, side="left")
+        fim = np.searchsorted(self.chaves, chave, side="right")
+        return self.ordem[inicio:fim]
+
+    def __len__(self):
+        return len(self.chaves)
+
+
+@dataclass(frozen=True)
+class Fatos:
+    pedidos: pd.DataFrame = field(repr=False)  # pedidos + TipoCliente do cliente
+    itens: pd.DataFrame = field(repr=False)  # itens + descritivos do produto
+    clientes: pd.DataFrame = field(repr=False)  # um registro por CodigoCliente, indexado por ele
+    produtos: pd.DataFrame = field(repr=False)  # um registro por CodigoProduto, indexado por ele
+    idx_pedidos_cliente: IndiceChave = field(repr=False)
+    idx_itens_produto: IndiceChave = field(repr=False)
+    segundos_construcao: float = 0.0
+
+    def cliente(self, codigo):
+        return self.clientes.loc[codigo]
+
+    def produto(self, codigo):
+        return self.produtos.loc[codigo]
+
+    def pedidos_do_cliente(self, codigo) -> pd.DataFrame:
+        return self.pedidos.iloc[self.idx_pedidos_cliente.posicoes(codigo)]
+
+    def itens_do_produto(self, codigo) -> pd.DataFrame:
+        return self.itens.iloc[self.idx_itens_produto.posicoes(codigo)]
+
+
+def _enriquecer(base: pd.DataFrame, chave: str, dimensao: pd.DataFrame, colunas) -> pd.DataFrame:
+    # cópia rasa: as colunas originais continuam compartilhadas; só as novas ocupam memória
+    fato = base.copy(deep=False)
+    for coluna in colunas:
+        valores = base[chave].map(dimensao[coluna])
+        if isinstance(dimensao[coluna].dtype, pd.CategoricalDtype):
+            valores = valores.astype(dimensao[coluna].dtype)
+        fato[coluna] = valores
+    return fato
+
+
+def construir_fatos(clientes, pedidos, itens, produtos) -> Fatos:
+    inicio = time.perf_counter()
+    dim_clientes = clientes.drop_duplicates(subset="CodigoCliente").set_index("CodigoCliente")
+    dim_produtos = produtos.drop_duplicates(subset="CodigoProduto").set_index("CodigoProduto")
+
+    fato_pedidos = _enriquecer(pedidos, "CodigoClientePedido", dim_clientes, ["TipoCliente"])
+    colunas_produto = [c for c in COLUNAS_PRODUTO if c in dim_produtos.columns]
+    fato_itens = _enriquecer(itens, "CodigoProdutoVendido", dim_produtos, colunas_produto)
+
+    return Fatos(
+        pedidos=fato_pedidos,
+        itens=fato_itens,
+        clientes=dim_clientes,
+        produtos=dim_produtos,
+        idx_pedidos_cliente=IndiceChave(fato_pedidos["CodigoClientePedido"]),
+        idx_itens_produto=IndiceChave(fato_itens["CodigoProdutoVendido"]),
+        segundos_construcao=time.perf_counter() - inicio,
+    )
@@ -0,0 +1,172 @@
+# gerar_dados.py
+"""Gera CSVs sintéticos de clientes, pedidos, itens e produtos com as colunas que o app espera.
+
+As distribuições imitam a base real: poucos produtos concentram a maior parte das vendas (lei de
+potência), clientes com frequências desiguais, ~70% dos pedidos faturados, ticket log-normal e
+~3 itens por pedido. Pedidos e itens são gerados e gravados em blocos, então 10 milhões de pedidos
+(~30 milhões de itens) cabem em pouca memória. Mesma semente, mesmos arquivos.
+
+Uso:
+    python gerar_dados.py --escala 1m --destino /tmp/skyone-1m
+    python gerar_dados.py --pedidos 50000 --destino data_sintetica --semente 7
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from dados import ARQUIVOS
+
+ESCALAS = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+PEDIDOS_POR_BLOCO = 500_000
+MARCADOR = ".gerado.json"  # parâmetros da geração: permite reaproveitar a pasta em benchmarks
+
+SITUACOES = (["Faturado", "Pendente", "Cancelado"], [0.706, 0.193, 0.101])
+FORMAS_PAGAMENTO = (["Boleto", "Pix", "Cartão"], [0.341, 0.330, 0.329])
+TIPOS_CLIENTE = (["Jurídica", "Física"], [0.52, 0.48])
+EXPOENTE_PRODUTOS = 1.2  # concentração das vendas por produto (1/posição^expoente)
+EXPOENTE_CLIENTES = 0.5
+INICIO, DIAS = np.datetime64("2024-01-01"), 600
+
+
+def _pesos_potencia(n: int, expoente: float, rng) -> np.ndarray:
+    """Pesos 1/posição^expoente, embaralhados para o mais vendido não ser sempre o código 1."""
+    pesos = 1.0 / np.arange(1, n + 1) ** expoente
+    rng.shuffle(pesos)
+    return pesos / pesos.sum()
+
+
+def _pesos_dias(rng) -> np.ndarray:
+    """Crescimento ao longo do período, fim de semana mais fraco e um pico em novembro."""
+    dias = INICIO + np.arange(DIAS)
+    semana = (dias.astype("datetime64[D]").view("int64") - 4) % 7  # 0 = segunda
+    mes = dias.astype("datetime64[M]").astype(int) % 12 + 1
+    pesos = np.linspace(1.0, 1.6, DIAS) * np.where(semana >= 5, 0.7, 1.0) * np.where(mes == 11, 1.5, 1.0)
+    return pesos / pesos.sum()
+
+
+def gerar_clientes(n: int, rng) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "CodigoCliente": np.arange(1, n + 1),
+            "NomeCliente": [f"Cliente {i}" for i in range(n)],
+            "TipoCliente": rng.choice(TIPOS_CLIENTE[0], size=n, p=TIPOS_CLIENTE[1]),
+        }
+    )
+
+
+def gerar_produtos(n: int) -> pd.DataFrame:
+    return pd.DataFrame({"CodigoProduto": np.arange(1, n + 1), "Produto": [f"Produto {i}" for i in range(1, n + 1)]})
+
+
+def gerar_bloco(primeiro: int, n: int, pesos_clientes, pesos_produtos, pesos_dias, taxa_invalidos: float, rng):
+    """Pedidos [primeiro, primeiro + n) e seus itens."""
+    codigos = np.arange(primeiro, primeiro + n)
+    total = np.round(rng.lognormal(np.log(250), 0.6, size=n), 2)
+    desconto = np.round(np.minimum(rng.exponential(10.0, size=n), total), 2)
+    total_texto = total.astype(str).astype(object)
+    if taxa_invalidos:
+        # a base real traz alguns valores não numéricos (a ingestão converte para 0 e conta)
+        total_texto[rng.random(n) < taxa_invalidos] = "abc"
+    pedidos = pd.DataFrame(
+        {
+            "CodigoPedido": codigos,
+            "CodigoClientePedido": rng.choice(len(pesos_clientes), size=n, p=pesos_clientes) + 1,
+            "DataPedido": (INICIO + rng.choice(DIAS, size=n, p=pesos_dias)).astype(str),
+            "SituacaoPedido": rng.choice(SITUACOES[0], size=n, p=SITUACOES[1]),
+            "TotalPedido": total_texto,
+            "ValorDesconto": desconto,
+            "FreteGratis": np.where(rng.random(n) < 0.5, "Sim", "Não"),
+            "FormaPagamento": rng.choice(FORMAS_PAGAMENTO[0], size=n, p=FORMAS_PAGAMENTO[1]),
+        }
+    )
+    por_pedido = np.minimum(1 + rng.poisson(2.2, size=n), 13)
+    m = int(por_pedido.sum())
+    itens = pd.DataFrame(
+        {
+            "CodigoPedidoItem": np.repeat(codigos, por_pedido),
+            "CodigoProdutoVendido": rng.choice(len(pesos_produtos), size=m, p=pesos_produtos) + 1,
+            "QuantidadeVendidaItem": rng.integers(1, 5, size=m),
+        }
+    )
+    return pedidos, itens
+
+
+def gerar(pedidos: int, destino: str, clientes: int = None, produtos: int = None, semente: int = 42,
+          taxa_invalidos: float = 5e-5, verbose: bool = True) -> dict:
+    """Grava os quatro CSVs em `destino`; devolve os parâmetros e as contagens geradas."""
+    clientes = clientes or max(pedidos // 10, 100)
+    produtos = produtos or max(300, pedidos // 2000)
+    rng = np.random.default_rng(semente)
+    os.makedirs(destino, exist_ok=True)
+    inicio = time.perf_counter()
+
+    gerar_clientes(clientes, rng).to_csv(os.path.join(destino, ARQUIVOS["clientes"]), index=False)
+    gerar_produtos(produtos).to_csv(os.path.join(destino, ARQUIVOS["produtos"]), index=False)
+
+    pesos_clientes = _pesos_potencia(clientes, EXPOENTE_CLIENTES, rng)
+    pesos_produtos = _pesos_potencia(produtos, EXPOENTE_PRODUTOS, rng)
+    pesos_dias = _pesos_dias(rng)
+    caminho_pedidos = os.path.join(destino, ARQUIVOS["pedidos"])
+    caminho_itens = os.path.join(destino, ARQUIVOS["itens"])
+    total_itens = 0
+    for primeiro in range(1, pedidos + 1, PEDIDOS_POR_BLOCO):
+        n = min(PEDIDOS_POR_BLOCO, pedidos - primeiro + 1)
+        bloco_pedidos, bloco_itens = gerar_bloco(
+            primeiro, n, pesos_clientes, pesos_produtos, pesos_dias, taxa_invalidos, rng
+        )
+        cabecalho = primeiro == 1
+        bloco_pedidos.to_csv(caminho_pedidos, mode="w" if cabecalho else "a", header=cabecalho, index=False)
+        bloco_itens.to_csv(caminho_itens, mode="w" if cabecalho else "a", header=cabecalho, index=False)
+        total_itens += len(bloco_itens)
+        if verbose:
+            print(f"  {primeiro + n - 1:,}/{pedidos:,} pedidos", flush=True)
+
+    parametros = {
+        "pedidos": pedidos,
+        "clientes": clientes,
+        "produtos": produtos,
+        "itens": total_itens,
+        "semente": semente,
+        "taxa_invalidos": taxa_invalidos,
+        "segundos": round(time.perf_counter() - inicio, 1),
+    }
+    with open(os.path.join(destino, MARCADOR), "w", encoding="utf-8") as f:
+        json.dump(parametros, f, indent=2)
+    return parametros
+
+
+def gerado_com(destino: str) -> dict:
+    """Parâmetros da última geração em `destino` ({} se a pasta não veio deste script)."""
+    try:
+        with open(os.path.join(destino, MARCADOR), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    grupo = parser.add_mutually_exclusive_group(required=True)
+    grupo.add_argument("--escala", choices=list(ESCALAS), help="número de pedidos pré-definido")
+    grupo.add_argument("--pedidos", type=int)
+    parser.add_argument("--destino", required=True, help="pasta de saída (não use a pasta de dados real)")
+    parser.add_argument("--clientes", type=int, help="padrão: pedidos / 10")
+    parser.add_argument("--produtos", type=int, help="padrão: max(300, pedidos / 2000)")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--taxa-invalidos", type=float, default=5e-5, help="fração de TotalPedido não numérico")
+    args = parser.parse_args()
+
+    pedidos = ESCALAS[args.escala] if args.escala else args.pedidos
+    parametros = gerar(pedidos, args.destino, args.clientes, args.produtos, args.semente, args.taxa_invalidos)
+    print(
+        f"✔️ {parametros['pedidos']:,} pedidos, {parametros['itens']:,} itens, {parametros['clientes']:,} clientes e "
+        f"{parametros['produtos']:,} produtos em {args.destino} ({parametros['segundos']}s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# graficos.py
+"""Gráficos do app clássico: figura guardada por (intenção, parâmetros, versão), categorias limitadas.
+
+Cada intenção com gráfico tem uma especificação (tipo, colunas, título, paleta). A figura é montada
+uma vez por versão dos dados e reaproveitada por todas as sessões (CacheRespostas, descartado quando
+a versão muda). Acima de MAX_CATEGORIAS categorias, as menores viram uma fatia/barra "Outros", então
+o JSON enviado ao navegador não cresce com a cardinalidade da dimensão. Barras com mais de
+LIMIAR_WEBGL pontos (só quando o limite é desligado) viram um traço WebGL (Scattergl). Os tempos de
+montagem e de serialização ficam no resultado e na instrumentação.
+"""
+import time
+from dataclasses import dataclass, field, replace
+
+import pandas as pd
+
+from cache_respostas import CacheRespostas, chave_resposta
+from dados import ao_trocar_versao
+from instrumentacao import etapa
+
+MAX_CATEGORIAS = 12  # inclui a categoria "Outros"
+LIMIAR_WEBGL = 1000  # pontos num traço de barras a partir dos quais o desenho vai para a GPU
+ROTULO_OUTROS = "Outros"
+
+CACHE_GRAFICOS = CacheRespostas(capacidade=64)
+
+
+def _invalidar_graficos(versao_anterior, versao_nova):
+    if versao_anterior:
+        CACHE_GRAFICOS.invalidar(versao_anterior)
+
+
+ao_trocar_versao(_invalidar_graficos)
+
+
+@dataclass(frozen=True)
+class Especificacao:
+    tipo: str  # "barras" | "pizza"
+    rotulo: str  # coluna das categorias
+    valor: str  # coluna numérica
+    titulo: str
+    horizontal: bool = False
+    outros: bool = True  # False: a resposta já vem recortada (top N), o excedente não entra
+    paleta: tuple = None  # (módulo, nome) em plotly.express.colors, ex.: ("sequential", "RdBu")
+    escala_continua: str = None  # cor pela magnitude do valor (barras)
+    cor_por_categoria: bool = False
+    rotulos: dict = field(default_factory=dict)
+    altura: int = None
+
+
+ESPECIFICACOES = {
+    "top_produtos": Especificacao(
+        "barras", "Produto", "QuantidadeVendidaItem", "Top 5 Produtos Mais Vendidos", horizontal=True,
+        outros=False, escala_continua="blues", rotulos={"QuantidadeVendidaItem": "Qtd Vendida"}, altura=400,
+    ),
+    "formas_pgto": Especificacao(
+        "pizza", "Forma de Pagamento", "Total", "Distribuição das Formas de Pagamento", paleta=("sequential", "RdBu")
+    ),
+    "status_pedidos": Especificacao("pizza", "Situação", "Total", "Status dos Pedidos", paleta=("sequential", "Agsunset")),
+    "tipo_cliente": Especificacao(
+        "barras", "Tipo de Cliente", "Total de Pedidos", "Pedidos por Tipo de Cliente",
+        paleta=("qualitative", "Set2"), cor_por_categoria=True,
+    ),
+}
+
+
+@dataclass(frozen=True)
+class Grafico:
+    figura: object = field(repr=False)  # plotly.graph_objects.Figure; não alterar (compartilhada)
+    categorias: int  # na resposta
+    exibidas: int  # no gráfico (com "Outros")
+    webgl: bool
+    segundos_construcao: float
+    segundos_serializacao: float
+    bytes_json: int
+    do_cache: bool = False
+
+    def resumo(self, segundos_envio: float = None) -> str:
+        partes = [
+            f"montagem {self.segundos_construcao * 1000:.0f} ms",
+            f"JSON {self.segundos_serializacao * 1000:.0f} ms ({self.bytes_json / 1024:.1f} KB)",
+        ]
+        if segundos_envio is not None:
+            partes.append(f"envio {segundos_envio * 1000:.0f} ms")
+        if self.categorias != self.exibidas:
+            partes.append(f"{self.categorias:,} categorias → {self.exibidas}")
+        if self.webgl:
+            partes.append("WebGL")
+        if self.do_cache:
+            partes.append("cache")
+        return " · ".join(partes)
+
+
+def limitar_categorias(df: pd.DataFrame, rotulo: str, valor: str, maximo: int = MAX_CATEGORIAS) -> pd.DataFrame:
+    """As `maximo - 1` maiores categorias e a soma das demais numa linha "Outros"."""
+    if maximo is None or len(df) <= maximo:
+        return df
+    ordenado = df.sort_values(valor, ascending=False, kind="stable")
+    maiores, resto = ordenado.iloc[: maximo - 1], ordenado.iloc[maximo - 1 :]
+    outros = pd.DataFrame({rotulo: [ROTULO_OUTROS], valor: [resto[valor].sum()]})
+    return pd.concat([maiores[[rotulo, valor]], outros], ignore_index=True)
+
+
+def _paleta(esp: Especificacao):
+    import plotly.express as px
+
+    if not esp.paleta:
+        return None
+    modulo, nome = esp.paleta
+    return getattr(getattr(px.colors, modulo), nome)
+
+
+def _figura(esp: Especificacao, df: pd.DataFrame, webgl: bool):
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    if esp.tipo == "pizza":
+        fig = px.pie(df, names=esp.rotulo, values=esp.valor, title=esp.titulo, color_discrete_sequence=_paleta(esp))
+    elif webgl:
+        # sem barras na GPU: marcadores Scattergl, um por categoria
+        x, y = (df[esp.valor], df[esp.rotulo]) if esp.horizontal else (df[esp.rotulo], df[esp.valor])
+        fig = go.Figure(go.Scattergl(x=x, y=y, mode="markers", marker={"size": 4}))
+        fig.update_layout(title=esp.titulo)
+    else:
+        x, y = (esp.valor, esp.rotulo) if esp.horizontal else (esp.rotulo, esp.valor)
+        cor = esp.valor if esp.escala_continua else esp.rotulo if esp.cor_por_categoria else None
+        fig = px.bar(
+            df,
+            x=x,
+            y=y,
+            orientation="h" if esp.horizontal else "v",
+            color=cor,
+            color_continuous_scale=esp.escala_continua,
+            color_discrete_sequence=_paleta(esp),
+            labels=esp.rotulos,
+            title=esp.titulo,
+        )
+    fig.update_layout(template="plotly_dark")
+    if esp.altura:
+        fig.update_layout(height=esp.altura)
+    return fig
+
+
+def montar(esp: Especificacao, dados: pd.DataFrame, maximo: int = MAX_CATEGORIAS, nome: str = "grafico") -> Grafico:
+    """Figura sem cache: categorias limitadas, WebGL acima do limiar, tempos medidos."""
+    with etapa(f"grafico:{nome}"):
+        inicio = time.perf_counter()
+        exibido = limitar_categorias(dados, esp.rotulo, esp.valor, maximo if esp.outros else None)
+        webgl = esp.tipo == "barras" and len(exibido) > LIMIAR_WEBGL
+        figura = _figura(esp, exibido, webgl)
+        construcao = time.perf_counter() - inicio
+    with etapa(f"grafico:{nome}:json"):
+        inicio = time.perf_counter()
+        # o Streamlit serializa de novo a cada exibição; aqui só para medir custo e tamanho
+        tamanho = len(figura.to_json())
+        serializacao = time.perf_counter() - inicio
+    return Grafico(figura, len(dados), len(exibido), webgl, construcao, serializacao, tamanho)
+
+
+def grafico(intencao: str, dados: pd.DataFrame, versao: str, parametros: dict = None) -> Grafico:
+    """Gráfico da resposta de `intencao` na versão dos dados, montado uma vez e reaproveitado."""
+    chave = chave_resposta(intencao, parametros or {}, versao)
+    guardado = CACHE_GRAFICOS.obter(chave)
+    if guardado is not None:
+        return replace(guardado, do_cache=True)
+    novo = montar(ESPECIFICACOES[intencao], dados, nome=intencao)
+    CACHE_GRAFICOS.guardar(chave, novo)
+    return novo
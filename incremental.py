@@ -0,0 +1,346 @@
+# incremental.py
+"""Ingestão incremental (somente anexação) com agregados mantidos a partir do lote.
+
+Os pedidos só crescem: em vez de trocar os CSVs e recalcular tudo, novos lotes de clientes, pedidos
+e itens são gravados em data/lotes/<tabela>/ (já tipados, no formato do cache) e os agregados das
+respostas fixas (ticket médio, descontos, top produtos, contagens por forma de pagamento, situação
+e tipo de cliente) são atualizados somando apenas o lote. Quem lê os agregados é metricas.py.
+
+Uso:
+    python incremental.py anexar --clientes novos_clientes.csv --pedidos novos_pedidos.csv --itens novos_itens.csv
+    python incremental.py verificar
+    python incremental.py descartar-lotes   # quando uma exportação completa substituir os CSVs
+"""
+import argparse
+import json
+import math
+import numbers
+import os
+import shutil
+from dataclasses import asdict, dataclass, field
+
+import pandas as pd
+import pyarrow.feather as feather
+
+from motor import Consulta, executar
+from dados import (
+    PASTA_CACHE,
+    PASTA_DADOS,
+    PASTA_LOTES,
+    _caminhos,
+    _gravar_json,
+    _ler_manifesto,
+    arquivos_lotes,
+    arquivos_tabela,
+    cache_valido,
+    colunas_derivadas,
+    construir_cache,
+    gravar_arrow,
+    ler_tabela,
+    normalizar_tabela,
+    obter_conjunto,
+    versao_dados,
+)
+ARQUIVO_AGREGADOS = "agregados.json"
+TOLERANCIA = 1e-9  # diferença relativa aceita entre somas incrementais e o recálculo completo
+
+# Tabelas que aceitam lotes, na ordem em que são aplicadas (cliente antes do pedido que o referencia).
+TABELAS_INCREMENTAIS = ("clientes", "pedidos", "itens")
+
+
+def _nativo(valor):
+    return valor.item() if hasattr(valor, "item") else valor
+
+
+def _somar_contagens(destino: dict, serie: pd.Series):
+    for chave, qtd in serie.value_counts(dropna=True).items():
+        if qtd:
+            chave = str(chave)
+            destino[chave] = destino.get(chave, 0) + int(qtd)
+
+
+@dataclass
+class Agregados:
+    """Somas e contagens das respostas fixas; cada lote só soma a sua parte."""
+
+    versao: str = None  # versão dos dados (dados.versao_dados) que estes números representam
+    total_pedidos: int = 0
+    pedidos_faturados: int = 0
+    faturados_com_total: int = 0  # denominadores das médias: mean() ignora valores vazios
+    soma_total_faturado: float = 0.0
+    faturados_com_desconto: int = 0
+    soma_desconto_faturado: float = 0.0
+    frete_gratis: int = 0
+    por_forma_pagamento: dict = field(default_factory=dict)
+    por_situacao: dict = field(default_factory=dict)
+    por_tipo_cliente: dict = field(default_factory=dict)
+    quantidade_por_produto: dict = field(default_factory=dict)  # CodigoProdutoVendido -> quantidade (int se a coluna for inteira)
+
+    @property
+    def ticket_medio(self) -> float:
+        return self.soma_total_faturado / self.faturados_com_total if self.faturados_com_total else math.nan
+
+    @property
+    def desconto_medio(self) -> float:
+        return self.soma_desconto_faturado / self.faturados_com_desconto if self.faturados_com_desconto else math.nan
+
+    def somar_pedidos(self, pedidos: pd.DataFrame, tipo_cliente: pd.Series):
+        """`tipo_cliente`: TipoCliente de cada pedido (alinhado a `pedidos`)."""
+        faturado = pedidos["is_faturado"].to_numpy(dtype=bool)
+        total = pedidos["TotalPedido"][faturado]
+        desconto = pedidos["ValorDesconto"][faturado]
+        self.total_pedidos += len(pedidos)
+        self.pedidos_faturados += int(faturado.sum())
+        self.faturados_com_total += int(total.notna().sum())
+        self.soma_total_faturado += float(total.sum())
+        self.faturados_com_desconto += int(desconto.notna().sum())
+        self.soma_desconto_faturado += float(desconto.sum())
+        self.frete_gratis += int(pedidos["frete_gratis"].sum())
+        _somar_contagens(self.por_forma_pagamento, pedidos["FormaPagamento"])
+        _somar_contagens(self.por_situacao, pedidos["SituacaoPedido"])
+        _somar_contagens(self.por_tipo_cliente, tipo_cliente)
+
+    def somar_itens(self, itens: pd.DataFrame):
+        soma = itens.groupby("CodigoProdutoVendido", observed=True)["QuantidadeVendidaItem"].sum()
+        for codigo, qtd in soma.items():
+            codigo = _nativo(codigo)
+            self.quantidade_por_produto[codigo] = self.quantidade_por_produto.get(codigo, 0) + _nativo(qtd)
+
+    def para_json(self) -> dict:
+        dados = asdict(self)
+        # chaves de produto podem ser inteiros: vão como pares para não virarem texto no JSON
+        dados["quantidade_por_produto"] = [[c, q] for c, q in self.quantidade_por_produto.items()]
+        return dados
+
+    @classmethod
+    def de_json(cls, dados: dict) -> "Agregados":
+        dados = dict(dados)
+        dados["quantidade_por_produto"] = {c: q for c, q in dados.get("quantidade_por_produto", [])}
+        return cls(**dados)
+
+
+def _caminho_agregados(pasta: str) -> str:
+    return os.path.join(pasta, PASTA_CACHE, ARQUIVO_AGREGADOS)
+
+
+def _ler_agregados(pasta: str):
+    try:
+        with open(_caminho_agregados(pasta), encoding="utf-8") as f:
+            return Agregados.de_json(json.load(f))
+    except (OSError, ValueError, TypeError):
+        return None
+
+
+def _gravar_agregados(agregados: Agregados, pasta: str):
+    os.makedirs(os.path.join(pasta, PASTA_CACHE), exist_ok=True)
+    _gravar_json(_caminho_agregados(pasta), agregados.para_json())
+
+
+def recalcular_agregados(fatos, versao: str = None) -> Agregados:
+    """Recalcula tudo pelo motor, em qualquer backend (carga inicial ou agregados desatualizados)."""
+    metricas = ("pedidos", "pedidos_faturados", "faturados_com_total", "faturamento", "faturados_com_desconto")
+    r = executar(Consulta(metricas + ("soma_descontos",)), fatos).iloc[0]
+    frete = executar(Consulta(("pedidos",), filtros=(("frete_gratis", True),)), fatos).iloc[0, 0]
+
+    def contagens(dimensao):
+        df = executar(Consulta(("pedidos",), (dimensao,)), fatos)
+        return {str(k): int(v) for k, v in zip(df.iloc[:, 0], df.iloc[:, 1])}
+
+    quantidades = executar(Consulta(("quantidade",), ("codigo_produto",)), fatos)
+    return Agregados(
+        versao=versao,
+        total_pedidos=int(r.iloc[0]),
+        pedidos_faturados=int(r.iloc[1]),
+        faturados_com_total=int(r.iloc[2]),
+        soma_total_faturado=float(r.iloc[3]),
+        faturados_com_desconto=int(r.iloc[4]),
+        soma_desconto_faturado=float(r.iloc[5]),
+        frete_gratis=int(frete),
+        por_forma_pagamento=contagens("forma_pagamento"),
+        por_situacao=contagens("situacao"),
+        por_tipo_cliente=contagens("tipo_cliente"),
+        quantidade_por_produto={_nativo(c): _nativo(q) for c, q in zip(quantidades.iloc[:, 0], quantidades.iloc[:, 1])},
+    )
+
+
+def _colunas_base(tabela: str, pasta: str) -> list:
+    """Colunas de origem da tabela (sem as derivadas na ingestão), lidas do manifesto do cache."""
+    if not cache_valido(tabela, pasta):
+        construir_cache(tabela, pasta)
+    esquema = _ler_manifesto(_caminhos(tabela, pasta)[2])["esquema"]
+    derivadas = colunas_derivadas(tabela, esquema)
+    return [c for c in esquema if c not in derivadas]
+
+
+def gravar_lote(tabela: str, df: pd.DataFrame, pasta: str = PASTA_DADOS):
+    """Normaliza o lote como na ingestão completa e grava o próximo lote-NNNNNN.arrow. Devolve (df, caminho)."""
+    colunas = _colunas_base(tabela, pasta)
+    faltando = [c for c in colunas if c not in df.columns]
+    if faltando:
+        raise ValueError(f"Lote de {tabela} sem as colunas {faltando}.")
+    df, _, _ = normalizar_tabela(df[colunas].copy(), tabela)
+
+    pasta_lotes = os.path.join(pasta, PASTA_LOTES, tabela)
+    os.makedirs(pasta_lotes, exist_ok=True)
+    existentes = arquivos_lotes(tabela, pasta)
+    numero = int(os.path.basename(existentes[-1])[5:11]) + 1 if existentes else 1
+    caminho = os.path.join(pasta_lotes, f"lote-{numero:06d}.arrow")
+    gravar_arrow(df, caminho)
+    return df, caminho
+
+
+def _clientes_dos_pedidos(pasta: str) -> pd.Series:
+    """CodigoClientePedido de todos os pedidos (base + lotes), lendo só essa coluna."""
+    partes = [
+        feather.read_table(c, columns=["CodigoClientePedido"], memory_map=True).column(0).to_pandas()
+        for c in arquivos_tabela("pedidos", pasta)
+    ]
+    return pd.concat(partes, ignore_index=True)
+
+
+def anexar_lotes(clientes=None, pedidos=None, itens=None, pasta: str = PASTA_DADOS) -> Agregados:
+    """Anexa os lotes informados e atualiza os agregados somando só o que chegou.
+
+    Se os agregados em disco não correspondem aos dados atuais (CSV trocado, lote anexado por fora),
+    eles são recalculados por completo uma vez antes de somar o lote. Um cliente novo que chega
+    depois dos seus pedidos passa a contar esses pedidos em `por_tipo_cliente` (o primeiro registro
+    de cada código vale, como na junção de fatos.py: lotes não mudam o tipo de um cliente existente).
+    """
+    from metricas import passada_fundida
+
+    agregados = _ler_agregados(pasta)
+    if agregados is None or agregados.versao != versao_dados(pasta):
+        conjunto = obter_conjunto(pasta)
+        agregados = passada_fundida(conjunto.fatos, conjunto.versao)
+
+    lotes = dict(zip(TABELAS_INCREMENTAIS, (clientes, pedidos, itens)))
+    for tabela in TABELAS_INCREMENTAIS:
+        df = lotes[tabela]
+        if df is None or df.empty:
+            continue
+        if tabela == "clientes":
+            conhecidos = ler_tabela("clientes", pasta)["CodigoCliente"]
+        df, _ = gravar_lote(tabela, df, pasta)
+        if tabela == "clientes":
+            # pedidos já gravados de clientes que só agora existem (os deste lote de pedidos vêm abaixo)
+            novos = df[~df["CodigoCliente"].isin(conhecidos)].drop_duplicates(subset="CodigoCliente")
+            if not novos.empty:
+                tipos = novos.set_index("CodigoCliente")["TipoCliente"]
+                _somar_contagens(agregados.por_tipo_cliente, _clientes_dos_pedidos(pasta).map(tipos))
+        elif tabela == "pedidos":
+            # só a dimensão de clientes é lida (já com os lotes de clientes gravados acima)
+            dim = ler_tabela("clientes", pasta).drop_duplicates(subset="CodigoCliente").set_index("CodigoCliente")
+            agregados.somar_pedidos(df, df["CodigoClientePedido"].map(dim["TipoCliente"]))
+        elif tabela == "itens":
+            agregados.somar_itens(df)
+
+    agregados.versao = versao_dados(pasta)
+    _gravar_agregados(agregados, pasta)
+    return agregados
+
+
+def _diferente(a, b) -> bool:
+    if isinstance(a, float) or isinstance(b, float):
+        if math.isnan(a) and math.isnan(b):
+            return False
+        return abs(a - b) > TOLERANCIA * max(abs(a), abs(b), 1.0)
+    return a != b
+
+
+def _celulas(resposta) -> list:
+    tabela = resposta if isinstance(resposta, pd.DataFrame) else pd.json_normalize(resposta)
+    return list(tabela.columns) + tabela.to_numpy().ravel().tolist()
+
+
+def _mesmo_valor(a, b) -> bool:
+    if isinstance(a, numbers.Real) and isinstance(b, numbers.Real):
+        return not _diferente(float(a), float(b))
+    return a == b or (pd.isna(a) and pd.isna(b))
+
+
+def comparar_agregados(a: Agregados, b: Agregados) -> dict:
+    """{campo: (a, b)} dos números que diferem além da tolerância (a versão não entra)."""
+    divergencias = {}
+    for campo, valor in asdict(a).items():
+        esperado = getattr(b, campo)
+        if campo == "versao":
+            continue
+        if isinstance(valor, dict):
+            for chave in valor.keys() | esperado.keys():
+                if _diferente(valor.get(chave, 0), esperado.get(chave, 0)):
+                    divergencias[f"{campo}[{chave}]"] = (valor.get(chave), esperado.get(chave))
+        elif _diferente(valor, esperado):
+            divergencias[campo] = (valor, esperado)
+    return divergencias
+
+
+def verificar_consistencia(pasta: str = PASTA_DADOS) -> dict:
+    """Compara os agregados incrementais com um recálculo completo e com as respostas do motor.
+
+    Devolve {campo: (incremental, recálculo)} só com as divergências; vazio = consistente.
+    """
+    from consultas import RESPOSTAS_AGREGADAS, responder
+    from metricas import obter_agregados
+
+    conjunto = obter_conjunto(pasta)
+    incremental = obter_agregados(conjunto)
+    divergencias = comparar_agregados(incremental, recalcular_agregados(conjunto.fatos, conjunto.versao))
+
+    # respostas servidas pelos agregados x as mesmas perguntas pelo motor sobre os fatos
+    for intencao in RESPOSTAS_AGREGADAS:
+        rapida = responder(intencao, {}, conjunto.fatos, incremental)
+        motor = responder(intencao, {}, conjunto.fatos)
+        a, b = _celulas(rapida), _celulas(motor)
+        if len(a) != len(b) or not all(_mesmo_valor(x, y) for x, y in zip(a, b)):
+            divergencias[f"resposta:{intencao}"] = (rapida, motor)
+    return divergencias
+
+
+def descartar_lotes(pasta: str = PASTA_DADOS):
+    """Remove todos os lotes (ex.: a exportação completa nova já os contém)."""
+    shutil.rmtree(os.path.join(pasta, PASTA_LOTES), ignore_errors=True)
+    if os.path.exists(_caminho_agregados(pasta)):
+        os.remove(_caminho_agregados(pasta))
+
+
+def _ler_arquivo(caminho: str) -> pd.DataFrame:
+    if caminho.endswith(".parquet"):
+        return pd.read_parquet(caminho)
+    return pd.read_csv(caminho, encoding="utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pasta", default=PASTA_DADOS)
+    sub = parser.add_subparsers(dest="comando", required=True)
+    anexar = sub.add_parser("anexar", help="grava novos lotes e atualiza os agregados")
+    for tabela in TABELAS_INCREMENTAIS:
+        anexar.add_argument(f"--{tabela}", help=f"CSV ou Parquet com as novas linhas de {tabela}")
+    sub.add_parser("verificar", help="compara os agregados incrementais com um recálculo completo")
+    sub.add_parser("descartar-lotes", help="remove os lotes anexados e os agregados")
+    args = parser.parse_args()
+
+    if args.comando == "anexar":
+        lotes = {t: _ler_arquivo(getattr(args, t)) for t in TABELAS_INCREMENTAIS if getattr(args, t)}
+        if not lotes:
+            parser.error("informe ao menos um de --clientes, --pedidos, --itens")
+        agregados = anexar_lotes(pasta=args.pasta, **lotes)
+        print(
+            f"✔️ Lotes anexados ({', '.join(f'{t}: {len(df):,}' for t, df in lotes.items())}) | versão "
+            f"{agregados.versao} | {agregados.total_pedidos:,} pedidos | ticket médio {agregados.ticket_medio:,.2f}"
+        )
+    elif args.comando == "verificar":
+        divergencias = verificar_consistencia(args.pasta)
+        if not divergencias:
+            print("✔️ Agregados incrementais iguais ao recálculo completo.")
+            return
+        for campo, (incremental, completo) in divergencias.items():
+            print(f"❌ {campo}: incremental={incremental} | completo={completo}")
+        raise SystemExit(1)
+    else:
+        descartar_lotes(args.pasta)
+        print("✔️ Lotes removidos.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# instrumentacao.py
+"""Cronometragem leve dos caminhos quentes: tempo por etapa, linhas varridas e percentis por intenção.
+
+Desligada por padrão (SKYONE_INSTRUMENTACAO=1 liga, ou `ativar()` em tempo de execução). Desligada,
+`etapa()`/`intencao()` devolvem um contexto nulo compartilhado: o custo é uma chamada de função.
+Os percentis são calculados sobre as últimas JANELA medições de cada série (janela rolante).
+"""
+import contextlib
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+from collections import deque
+
+JANELA = 1000
+LINHAS_PERFIL = 25
+
+ativo = os.getenv("SKYONE_INSTRUMENTACAO", "").lower() in ("1", "true", "sim")
+ultimo_perfil = None  # {"rotulo", "caminho", "texto"} do último cProfile gravado
+
+_NULO = contextlib.nullcontext()
+_series = {}
+_trava = threading.Lock()
+_perfil_pendente = threading.Event()
+
+
+class _Serie:
+    __slots__ = ("tempos", "contagem", "soma", "linhas")
+
+    def __init__(self):
+        self.tempos = deque(maxlen=JANELA)
+        self.contagem = 0
+        self.soma = 0.0
+        self.linhas = 0
+
+
+def ativar(ligado: bool = True):
+    """Liga/desliga para o processo inteiro (todas as sessões)."""
+    global ativo
+    ativo = bool(ligado)
+
+
+def registrar(familia: str, nome: str, segundos: float, linhas: int = 0):
+    with _trava:
+        serie = _series.get((familia, nome))
+        if serie is None:
+            serie = _series[(familia, nome)] = _Serie()
+        serie.tempos.append(segundos)
+        serie.contagem += 1
+        serie.soma += segundos
+        serie.linhas += linhas
+
+
+class _Cronometro:
+    __slots__ = ("familia", "nome", "linhas", "inicio")
+
+    def __init__(self, familia: str, nome: str, linhas: int):
+        self.familia, self.nome, self.linhas = familia, nome, linhas
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+
+    def __exit__(self, *exc):
+        registrar(self.familia, self.nome, time.perf_counter() - self.inicio, self.linhas)
+
+
+def etapa(nome: str, linhas: int = 0):
+    """`with etapa("kpis"):` — tempo de parede da etapa e linhas varridas por ela."""
+    return _Cronometro("etapa", nome, linhas) if ativo else _NULO
+
+
+def intencao(nome: str):
+    """`with intencao("ticket_medio"):` — latência ponta a ponta de uma pergunta, por intenção."""
+    return _Cronometro("intencao", nome, 0) if ativo else _NULO
+
+
+def limpar():
+    with _trava:
+        _series.clear()
+
+
+# ------------------------------------------------------------------
+# Leitura / exportação
+# ------------------------------------------------------------------
+def _percentil(ordenados, p):
+    return ordenados[min(int(len(ordenados) * p), len(ordenados) - 1)]
+
+
+def resumo() -> dict:
+    """{"etapa": {nome: {...}}, "intencao": {nome: {...}}} com p50/p95/p99 em ms da janela."""
+    with _trava:
+        copia = {chave: (sorted(s.tempos), s.contagem, s.soma, s.linhas) for chave, s in _series.items()}
+    saida = {"etapa": {}, "intencao": {}}
+    for (familia, nome), (tempos, contagem, soma, linhas) in sorted(copia.items()):
+        saida[familia][nome] = {
+            "contagem": contagem,
+            "total_s": soma,
+            "p50_ms": _percentil(tempos, 0.50) * 1000,
+            "p95_ms": _percentil(tempos, 0.95) * 1000,
+            "p99_ms": _percentil(tempos, 0.99) * 1000,
+            "linhas": linhas,
+        }
+    return saida
+
+
+def exportar_prometheus(prefixo: str = "skyone") -> str:
+    """Formato texto do Prometheus: um summary por família (quantis da janela, _sum e _count acumulados)."""
+    linhas = []
+    for familia, series in resumo().items():
+        metrica = f"{prefixo}_{familia}_segundos"
+        linhas.append(f"# TYPE {metrica} summary")
+        for nome, s in series.items():
+            rotulo = f'{familia}="{nome}"'
+            for q, chave in (("0.5", "p50_ms"), ("0.95", "p95_ms"), ("0.99", "p99_ms")):
+                linhas.append(f'{metrica}{{{rotulo},quantile="{q}"}} {s[chave] / 1000:.6f}')
+            linhas.append(f"{metrica}_sum{{{rotulo}}} {s['total_s']:.6f}")
+            linhas.append(f"{metrica}_count{{{rotulo}}} {s['contagem']}")
+        if familia == "etapa":
+            linhas.append(f"# TYPE {prefixo}_linhas_varridas_total counter")
+            for nome, s in series.items():
+                if s["linhas"]:
+                    linhas.append(f'{prefixo}_linhas_varridas_total{{etapa="{nome}"}} {s["linhas"]}')
+    return "\n".join(linhas) + "\n"
+
+
+# ------------------------------------------------------------------
+# cProfile de uma requisição
+# ------------------------------------------------------------------
+def perfilar_proxima():
+    """Arma o cProfile para a próxima requisição que passar por `perfil()`."""
+    _perfil_pendente.set()
+
+
+class _Perfil:
+    def __init__(self, rotulo: str):
+        self.rotulo = rotulo
+        self.perfil = cProfile.Profile()
+
+    def __enter__(self):
+        try:
+            self.perfil.enable()
+        except ValueError:  # outro profiler já ativo neste processo
+            self.perfil = None
+
+    def __exit__(self, *exc):
+        global ultimo_perfil
+        if self.perfil is None:
+            return
+        self.perfil.disable()
+        from dados import PASTA_CACHE, PASTA_DADOS
+
+        pasta = os.path.join(PASTA_DADOS, PASTA_CACHE, "perfis")
+        os.makedirs(pasta, exist_ok=True)
+        # nanossegundos no nome: dois perfis no mesmo segundo (ou de outro processo) não se sobrescrevem
+        caminho = os.path.join(pasta, f"perfil-{time.strftime('%Y%m%d-%H%M%S')}-{time.time_ns() % 10**9:09d}.prof")
+        self.perfil.dump_stats(caminho)
+        texto = io.StringIO()
+        pstats.Stats(self.perfil, stream=texto).sort_stats("cumulative").print_stats(LINHAS_PERFIL)
+        ultimo_perfil = {"rotulo": self.rotulo, "caminho": caminho, "texto": texto.getvalue()}
+
+
+def perfil(rotulo: str):
+    """Contexto que perfila o bloco com cProfile se `perfilar_proxima()` foi chamado (uma vez só)."""
+    if not _perfil_pendente.is_set():
+        return _NULO
+    _perfil_pendente.clear()
+    return _Perfil(rotulo)
@@ -0,0 +1,294 @@
+# intencoes.py
+"""Interpretação de perguntas: texto normalizado e tokenizado, casado com um índice de gatilhos numa passada.
+
+A pergunta perde acentos, caixa e pontuação; cada palavra vira um termo canônico (sinônimos, plural
+e, para palavras desconhecidas, correção de digitação contra o vocabulário dos gatilhos). Os gatilhos
+são conjuntos de termos: um índice invertido termo -> gatilhos conta as ocorrências e um gatilho casa
+quando todos os seus termos aparecem. A confiança é o produto da qualidade dos termos usados
+(1.0 exato/sinônimo, similaridade quando corrigido); abaixo de LIMIAR_CONFIANCA a pergunta fica
+`nao_mapeado`. Parâmetros extraídos: métricas e dimensões ("por ..."), o N de "top N" e o período
+("este mês", "de 01/03/2024 a 15/03/2024"; ver periodos.py), tirado do texto antes dos termos.
+"""
+import difflib
+import re
+import unicodedata
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
+
+import periodos
+from motor import DIMENSOES, METRICAS
+
+LIMIAR_CONFIANCA = 0.75
+SIMILARIDADE_MINIMA = 0.8  # difflib: abaixo disso a palavra não é corrigida
+TAMANHO_MINIMO_CORRECAO = 4
+TOP_PADRAO, TOP_MAXIMO = 5, 100
+
+# Métricas do motor: cada gatilho é um conjunto de termos que precisam aparecer juntos.
+GATILHOS_METRICAS = {
+    "ticket_medio": [("ticket", "medio")],
+    "desconto_medio": [("desconto", "medio")],
+    "faturamento": [("faturamento",)],
+    "quantidade": [("quantidade",), ("item", "vendido")],
+    "pedidos": [("quanto", "pedido"), ("numero", "pedido"), ("total", "pedido")],
+}
+
+# Dimensões: sequência contígua de termos (sem palavras vazias) logo depois de "por".
+FRASES_DIMENSOES = {
+    "tipo_cliente": [("tipo", "cliente")],
+    "forma_pagamento": [("forma", "pagamento"), ("pagamento",)],
+    "situacao": [("status",)],
+    "produto": [("produto",)],
+}
+
+# Intenções fixas (pergunta sem recorte "por ..."), em ordem de prioridade.
+# Um "por <dimensão>" que a resposta não usa deixa a pergunta não mapeada (a quebra não seria feita),
+# exceto o da própria intenção ("clientes por tipo de cliente").
+GATILHOS_FIXOS = [
+    ("ticket_medio", [("ticket", "medio")]),
+    ("desconto_medio", [("desconto", "medio")]),
+    ("top_produtos", [("produto", "mais", "vendido"), ("top", "produto")]),
+    ("formas_pgto", [("forma", "pagamento")]),
+    ("frete_gratis", [("frete", "gratis")]),
+    ("status_pedidos", [("status",)]),
+    ("tipo_cliente", [("tipo", "cliente"), ("cliente", "fisico"), ("cliente", "juridico"), ("juridico",)]),
+]
+DIMENSAO_DAS_FIXAS = {
+    "top_produtos": "produto", "formas_pgto": "forma_pagamento", "status_pedidos": "situacao", "tipo_cliente": "tipo_cliente",
+}
+
+SINONIMOS = {
+    "media": "medio",
+    "situacao": "status",
+    "situacoes": "status",
+    "pgto": "pagamento",
+    "gratuito": "gratis",
+    "gratuita": "gratis",
+    "juridica": "juridico",
+    "pj": "juridico",
+    "fisica": "fisico",
+    "pf": "fisico",
+    "ranking": "top",
+    "itens": "item",
+    "venda": "vendido",
+    "receita": "faturamento",
+    "qtd": "quantidade",
+    "qtde": "quantidade",
+    "quantas": "quanto",
+    "nro": "numero",
+}
+
+PALAVRAS_VAZIAS = frozenset(
+    "a as o os de da das do dos e em na nas no nos um uma para pra com que qual quais "
+    "me mostre mostra mostrar ver quero saber sobre cada".split()
+)
+
+NUMEROS_POR_EXTENSO = {
+    "um": 1, "dois": 2, "tres": 3, "quatro": 4, "cinco": 5, "seis": 6, "sete": 7, "oito": 8, "nove": 9,
+    "dez": 10, "quinze": 15, "vinte": 20, "trinta": 30, "cinquenta": 50, "cem": 100,
+}
+
+
+@dataclass(frozen=True)
+class Interpretacao:
+    intencao: str
+    parametros: dict = field(default_factory=dict)
+    confianca: float = 0.0
+    termos: tuple = ()  # termos canônicos da pergunta
+    corrigidos: tuple = ()  # ((palavra, termo), ...) corrigidos por similaridade
+
+
+# ------------------------------------------------------------------
+# Normalização
+# ------------------------------------------------------------------
+_NAO_ALFANUMERICO = re.compile(r"[^a-z0-9]+")
+
+
+def normalizar(texto: str) -> list:
+    """Sem acentos, minúsculo, sem pontuação -> lista de palavras."""
+    sem_acento = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+    return _NAO_ALFANUMERICO.sub(" ", sem_acento.lower()).split()
+
+
+def _vocabulario() -> frozenset:
+    termos = set(SINONIMOS.values())
+    for gatilhos in GATILHOS_METRICAS.values():
+        termos.update(t for g in gatilhos for t in g)
+    for frases in FRASES_DIMENSOES.values():
+        termos.update(t for f in frases for t in f)
+    for _, gatilhos in GATILHOS_FIXOS:
+        termos.update(t for g in gatilhos for t in g)
+    return frozenset(termos)
+
+
+VOCABULARIO = _vocabulario()
+# alvos da correção: termos do vocabulário e as grafias que os sinônimos cobrem ("situacao")
+_CORRIGIVEIS = sorted(t for t in VOCABULARIO | SINONIMOS.keys() if len(t) >= TAMANHO_MINIMO_CORRECAO)
+
+
+def _transposicoes(palavra: str):
+    """Palavras a uma troca de letras vizinhas de distância (o erro de digitação mais comum)."""
+    for i in range(len(palavra) - 1):
+        if palavra[i] != palavra[i + 1]:
+            yield palavra[:i] + palavra[i + 1] + palavra[i] + palavra[i + 2 :]
+
+
+@lru_cache(maxsize=16384)
+def termo_canonico(palavra: str):
+    """(termo, qualidade): sinônimo/plural com qualidade 1.0, digitação corrigida com a similaridade."""
+    singular = palavra[:-1] if palavra.endswith("s") and len(palavra) > 3 else None
+    candidatas = (palavra, singular) if singular else (palavra,)
+    for candidata in candidatas:
+        if candidata in SINONIMOS:
+            return SINONIMOS[candidata], 1.0
+        if candidata in VOCABULARIO:
+            return candidata, 1.0
+    if len(palavra) < TAMANHO_MINIMO_CORRECAO or palavra in PALAVRAS_VAZIAS or palavra.isdigit():
+        return palavra, 1.0
+    # letras trocadas: o difflib pontua mal em palavras curtas ("forams" x "forma" = 0.73)
+    for candidata in candidatas:
+        for vizinha in _transposicoes(candidata):
+            termo = SINONIMOS.get(vizinha) or (vizinha if vizinha in VOCABULARIO else None)
+            if termo and len(vizinha) >= TAMANHO_MINIMO_CORRECAO:
+                return termo, max(SIMILARIDADE_MINIMA, 1 - 1 / len(vizinha))
+    proximas = difflib.get_close_matches(palavra, _CORRIGIVEIS, n=1, cutoff=SIMILARIDADE_MINIMA)
+    if not proximas:
+        return palavra, 1.0
+    return SINONIMOS.get(proximas[0], proximas[0]), difflib.SequenceMatcher(None, palavra, proximas[0]).ratio()
+
+
+# ------------------------------------------------------------------
+# Índice compilado
+# ------------------------------------------------------------------
+def _compilar():
+    """Gatilhos numerados ((grupo, chave, termos)) e o índice invertido termo -> números dos gatilhos."""
+    gatilhos = [("metrica", chave, frozenset(g)) for chave, gs in GATILHOS_METRICAS.items() for g in gs]
+    gatilhos += [("fixa", chave, frozenset(g)) for chave, gs in GATILHOS_FIXOS for g in gs]
+    indice = {}
+    for numero, (_, _, termos) in enumerate(gatilhos):
+        for termo in termos:
+            indice.setdefault(termo, []).append(numero)
+    return gatilhos, indice
+
+
+_GATILHOS, _INDICE = _compilar()
+_PRIORIDADE_FIXAS = {chave: i for i, (chave, _) in enumerate(GATILHOS_FIXOS)}
+
+
+def _confianca(termos, qualidades: dict) -> float:
+    confianca = 1.0
+    for termo in termos:
+        confianca *= qualidades[termo]
+    return confianca
+
+
+def _casados(qualidades: dict) -> dict:
+    """Uma passada pelos termos da pergunta: {(grupo, chave): melhor confiança entre os gatilhos casados}."""
+    contagem = {}
+    for termo in qualidades:
+        for numero in _INDICE.get(termo, ()):
+            contagem[numero] = contagem.get(numero, 0) + 1
+    casados = {}
+    for numero, n in contagem.items():
+        grupo, chave, termos = _GATILHOS[numero]
+        if n == len(termos):
+            confianca = _confianca(termos, qualidades)
+            casados[(grupo, chave)] = max(casados.get((grupo, chave), 0.0), confianca)
+    return casados
+
+
+def _dimensoes_pedidas(termos: list, qualidades: dict) -> dict:
+    """{dimensão: confiança} das frases "por <dimensão>" da pergunta, na ordem em que aparecem."""
+    conteudo = [t for t in termos if t not in PALAVRAS_VAZIAS]
+    achadas = {}
+    for i, termo in enumerate(conteudo):
+        if termo != "por":
+            continue
+        seguintes = conteudo[i + 1 :]
+        for dimensao, frases in FRASES_DIMENSOES.items():
+            if dimensao in achadas:
+                continue
+            frase = next((f for f in frases if tuple(seguintes[: len(f)]) == f), None)
+            if frase:
+                achadas[dimensao] = _confianca(frase, qualidades)
+                break
+    return achadas
+
+
+def _top_n(termos: list):
+    """N de "top 10 produtos", "os 3 produtos mais vendidos", "top dez"; None se não houver."""
+    for i, termo in enumerate(termos):
+        n = int(termo) if termo.isdigit() else NUMEROS_POR_EXTENSO.get(termo)
+        if n is None:
+            continue
+        vizinhas = termos[max(i - 1, 0) : i + 2]
+        if "top" in vizinhas or "produto" in vizinhas:
+            return max(1, min(n, TOP_MAXIMO))
+    return None
+
+
+# ------------------------------------------------------------------
+# Interpretação
+# ------------------------------------------------------------------
+def interpretar_detalhado(pergunta: str, hoje=None) -> Interpretacao:
+    """Pergunta -> Interpretacao (intenção, parâmetros, confiança). Não toca nos dados.
+
+    `hoje` (datetime.date, padrão: a data atual) resolve os períodos relativos ("mês passado").
+    """
+    periodo, pergunta = periodos.extrair(pergunta, hoje)
+    interpretacao = _interpretar_termos(normalizar(pergunta))
+    if periodo is None or interpretacao.intencao == "nao_mapeado":
+        return interpretacao
+    parametros = {**interpretacao.parametros, "periodo": periodo.parametro()}
+    return replace(interpretacao, parametros=parametros)
+
+
+def _interpretar_termos(palavras: list) -> Interpretacao:
+    """Palavras da pergunta (já sem a frase de período) -> Interpretacao."""
+    termos, qualidades, corrigidos = [], {}, []
+    for palavra in palavras:
+        termo, qualidade = termo_canonico(palavra)
+        termos.append(termo)
+        qualidades[termo] = max(qualidades.get(termo, 0.0), qualidade)
+        if qualidade < 1.0:
+            corrigidos.append((palavra, termo))
+    termos_t, corrigidos = tuple(termos), tuple(corrigidos)
+
+    casados = _casados(qualidades)
+    melhor = max(casados.values(), default=0.0)  # se não mapear: confiança do melhor candidato descartado
+    pedidas = _dimensoes_pedidas(termos, qualidades) if "por" in qualidades else {}
+    metricas = tuple(m for m in GATILHOS_METRICAS if ("metrica", m) in casados)
+    if metricas and pedidas:
+        tabelas = {METRICAS[m].tabela for m in metricas}
+        if any(not tabelas <= DIMENSOES[d].colunas.keys() for d in pedidas):
+            # "ticket médio por produto": a métrica não se quebra nessa dimensão; não responde sem a quebra
+            return Interpretacao("nao_mapeado", {}, melhor, termos_t, corrigidos)
+        confianca = min(casados[("metrica", m)] for m in metricas) * min(pedidas.values())
+        if confianca >= LIMIAR_CONFIANCA:
+            parametros = {"metricas": metricas, "dimensoes": tuple(pedidas)}
+            n = _top_n(termos) if "top" in termos else None
+            if n:
+                parametros["limite"] = n
+            return Interpretacao("metricas_por_dimensao", parametros, confianca, termos_t, corrigidos)
+
+    fixas = sorted(
+        ((chave, c) for (grupo, chave), c in casados.items() if grupo == "fixa" and c >= LIMIAR_CONFIANCA),
+        key=lambda kv: _PRIORIDADE_FIXAS[kv[0]],
+    )
+    if fixas:
+        intencao, confianca = fixas[0]
+        if set(pedidas) - {DIMENSAO_DAS_FIXAS.get(intencao)}:
+            return Interpretacao("nao_mapeado", {}, melhor, termos_t, corrigidos)
+        parametros = {}
+        if intencao == "top_produtos":
+            n = _top_n(termos)
+            if n and n != TOP_PADRAO:
+                parametros["n"] = n
+        return Interpretacao(intencao, parametros, confianca, termos_t, corrigidos)
+
+    return Interpretacao("nao_mapeado", {}, melhor, termos_t, corrigidos)
+
+
+def interpretar(pergunta: str, hoje=None):
+    """Pergunta -> (intenção, parâmetros)."""
+    r = interpretar_detalhado(pergunta, hoje)
+    return r.intencao, r.parametros
@@ -0,0 +1,303 @@
+# llm.py
+"""Chamadas ao modelo (OpenRouter / API compatível com OpenAI) para explicar respostas já calculadas."""
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+from cache_llm import CacheLLM, chave_llm
+from contexto_llm import TOKENS_POR_NUMERO, codificar_contexto, estimar_tokens
+from dados import PASTA_CACHE, PASTA_DADOS
+from despacho_llm import DespachoLLM
+from recuperacao import codificar_trechos, obter_indice
+
+# Cliente HTTP do processo: conexões keep-alive reaproveitadas entre reruns e sessões.
+TIMEOUT_CONEXAO = float(os.getenv("OPENROUTER_TIMEOUT_CONEXAO", "5"))
+TIMEOUT_LEITURA = float(os.getenv("OPENROUTER_TIMEOUT_LEITURA", "60"))
+MAX_TENTATIVAS = int(os.getenv("OPENROUTER_MAX_TENTATIVAS", "3"))  # backoff exponencial com jitter do SDK
+MAX_CONEXOES = 20
+# Despacho (despacho_llm.py): chamadas iguais em voo coalescidas, concorrência e taxa limitadas no processo.
+MAX_CONCORRENTES = int(os.getenv("OPENROUTER_MAX_CONCORRENTES", "4"))
+REQUISICOES_POR_SEGUNDO = float(os.getenv("OPENROUTER_REQUISICOES_POR_SEGUNDO", "5"))
+RAJADA = int(os.getenv("OPENROUTER_RAJADA", "10"))
+MAX_FILA = int(os.getenv("OPENROUTER_MAX_FILA", "32"))
+TIMEOUT_FILA = float(os.getenv("OPENROUTER_TIMEOUT_FILA", "30"))  # espera por vaga/token antes de desistir
+TIMEOUT_TOTAL = float(os.getenv("OPENROUTER_TIMEOUT_TOTAL", "120"))  # quanto quem pergunta espera a resposta
+
+_cache_llm = None
+_trava_cache_llm = threading.Lock()
+_despacho = None
+_trava_despacho = threading.Lock()
+_clientes = {}
+_trava_clientes = threading.Lock()
+
+
+def obter_cliente(base_url: str, api_key: str):
+    """Um cliente OpenAI por (base_url, api_key) no processo, com pool de conexões persistentes."""
+    import httpx
+    from openai import DefaultHttpxClient, OpenAI
+
+    with _trava_clientes:
+        chave = (base_url, api_key)
+        if chave not in _clientes:
+            timeout = httpx.Timeout(TIMEOUT_LEITURA, connect=TIMEOUT_CONEXAO)
+            http_client = DefaultHttpxClient(
+                timeout=timeout,
+                limits=httpx.Limits(
+                    max_connections=MAX_CONEXOES, max_keepalive_connections=MAX_CONEXOES, keepalive_expiry=120
+                ),
+            )
+            _clientes[chave] = OpenAI(
+                base_url=base_url,
+                api_key=api_key,
+                timeout=timeout,
+                max_retries=MAX_TENTATIVAS,
+                http_client=http_client,
+            )
+        return _clientes[chave]
+
+
+@dataclass
+class Latencia:
+    """Tempos (s) de uma chamada: até os cabeçalhos da resposta, até o primeiro token e total."""
+
+    conexao: float = None
+    primeiro_token: float = None
+    total: float = None
+    do_cache: bool = False
+    fila: float = None  # espera por vaga no despacho e token do balde
+    compartilhada: bool = False  # acompanhou uma chamada igual já em voo
+    tokens_prompt: dict = None  # {"antes": formato anterior, "depois": codificador compacto}
+
+    def resumo(self) -> str:
+        if self.do_cache:
+            texto = f"cache · total {self.total * 1000:.0f} ms"
+        else:
+            partes = [
+                ("fila", self.fila), ("conexão", self.conexao), ("primeiro token", self.primeiro_token), ("total", self.total)
+            ]
+            texto = " · ".join(f"{nome} {valor * 1000:.0f} ms" for nome, valor in partes if valor is not None)
+            if self.compartilhada:
+                texto += " · chamada compartilhada"
+        if self.tokens_prompt:
+            texto += f" · prompt {self.tokens_prompt['antes']} → {self.tokens_prompt['depois']} tokens"
+        return texto
+
+
+def obter_cache_llm() -> CacheLLM:
+    """Cache em disco compartilhado pelo processo (criado na primeira chamada)."""
+    global _cache_llm
+    if _cache_llm is None:  # caminho rápido sem a trava; a trava garante uma única conexão SQLite
+        with _trava_cache_llm:
+            if _cache_llm is None:
+                _cache_llm = CacheLLM(os.path.join(PASTA_DADOS, PASTA_CACHE, "llm.sqlite"))
+    return _cache_llm
+
+
+def obter_despacho() -> DespachoLLM:
+    """Despacho compartilhado pelo processo (todas as sessões do app e as requisições da API)."""
+    global _despacho
+    with _trava_despacho:
+        if _despacho is None:
+            _despacho = DespachoLLM(
+                max_concorrentes=MAX_CONCORRENTES,
+                taxa=REQUISICOES_POR_SEGUNDO,
+                rajada=RAJADA,
+                max_fila=MAX_FILA,
+                timeout_fila=TIMEOUT_FILA,
+                timeout=TIMEOUT_TOTAL,
+            )
+        return _despacho
+
+
+def default_system_prompt():
+    return (
+        "Você é um analista de dados sênior. Explique o raciocínio com clareza, "
+        "cite as fórmulas usadas e a interpretação do resultado. Use apenas os números que eu te passar. "
+        "Se algo não fizer sentido, diga explicitamente."
+    )
+
+
+def summarize_numbers_for_llm(d: dict, limit=60) -> str:
+    """Formato anterior do contexto (lista de números solta); mantido só para comparar o tamanho do prompt."""
+    flat = []
+
+    def walk(x):
+        if isinstance(x, dict):
+            for v in x.values():
+                walk(v)
+        elif isinstance(x, (list, tuple, set)):
+            for v in x:
+                walk(v)
+        else:
+            try:
+                v = float(x)
+                flat.append(v)
+            except Exception:
+                pass
+
+    walk(d)
+    return ", ".join(f"{v:.4f}" for v in flat[:limit])
+
+
+def _tokens_prompt_legado(question: str, result, max_numbers: int) -> int:
+    content = (
+        f"Pergunta do usuário: {question}\n"
+        f"Números já calculados pelo backend (use apenas estes): {summarize_numbers_for_llm(result, limit=max_numbers)}\n"
+        f"Resultado estruturado (não envie de volta, apenas use para explicar): {result}"
+    )
+    return estimar_tokens(default_system_prompt()) + estimar_tokens(content)
+
+
+def _montar_pedido(question: str, result, max_numbers: int):
+    """Mensagens do chat + contexto codificado (usado também na chave do cache)."""
+    contexto = codificar_contexto(result, max_tokens=max_numbers * TOKENS_POR_NUMERO)
+    content = f"Pergunta do usuário: {question}\nDados já calculados pelo backend (use apenas estes):\n{contexto}"
+    messages = [
+        {"role": "system", "content": default_system_prompt()},
+        {"role": "user", "content": content},
+    ]
+    return messages, contexto
+
+
+def tokens_prompt(question: str, result, max_numbers=60) -> dict:
+    """Tamanho estimado do prompt no formato anterior (números + repr) e com o codificador compacto."""
+    messages, _ = _montar_pedido(question, result, max_numbers)
+    return {
+        "antes": _tokens_prompt_legado(question, result, max_numbers),
+        "depois": sum(estimar_tokens(m["content"]) for m in messages),
+    }
+
+
+def _gerar(client, model, messages, temperature, chave_cache):
+    """Produtor do despacho: uma chamada ao provedor; o texto vai para o cache ao terminar."""
+    completion = client.chat.completions.create(model=model, messages=messages, temperature=temperature)
+    yield None  # conectado
+    resposta = completion.choices[0].message.content
+    if chave_cache and resposta:
+        obter_cache_llm().guardar(chave_cache, resposta)
+    yield resposta or ""
+
+
+def _gerar_fluxo(client, model, messages, temperature, chave_cache):
+    """Produtor do despacho em fluxo: repassa os pedaços; interrompido, fecha a conexão e não guarda nada."""
+    fluxo = client.chat.completions.create(model=model, messages=messages, temperature=temperature, stream=True)
+    yield None  # conectado
+    partes = []
+    try:
+        for pedaco in fluxo:
+            texto = pedaco.choices[0].delta.content if pedaco.choices else None
+            if texto:
+                partes.append(texto)
+                yield texto
+    finally:
+        fluxo.close()
+    if chave_cache and partes:
+        obter_cache_llm().guardar(chave_cache, "".join(partes))
+
+
+def _chamar(client, model, question: str, messages, payload: str, temperature, cache):
+    """(texto, erro): cache em disco, senão uma chamada pelo despacho."""
+    try:
+        chave = chave_llm(model, messages[0]["content"], question, payload, temperature)
+        if cache:
+            guardada = obter_cache_llm().obter(chave)
+            if guardada is not None:
+                return guardada, None
+        resposta = obter_despacho().executar(
+            chave, lambda: _gerar(client, model, messages, temperature, chave if cache else None)
+        )
+        return resposta, None
+    except Exception as e:
+        return None, f"Erro ao chamar o modelo: {e}"
+
+
+def _chamar_em_fluxo(client, model, question: str, messages, payload: str, temperature, cache, latencia, inicio):
+    chave = chave_llm(model, messages[0]["content"], question, payload, temperature)
+    if cache:
+        guardada = obter_cache_llm().obter(chave)
+        if guardada is not None:
+            latencia.do_cache = True
+            latencia.total = time.monotonic() - inicio
+            yield guardada
+            return
+
+    antes = time.monotonic()
+    fluxo, chamada = obter_despacho().acompanhar(
+        chave, lambda: _gerar_fluxo(client, model, messages, temperature, chave if cache else None)
+    )
+    latencia.compartilhada = chamada.criada_em < antes
+    for texto in fluxo:
+        if latencia.primeiro_token is None:
+            latencia.primeiro_token = time.monotonic() - inicio
+            if chamada.conectada_em is not None:
+                latencia.conexao = max(chamada.conectada_em - inicio, 0.0)
+            latencia.fila = chamada.espera_fila
+        yield texto
+    latencia.total = time.monotonic() - inicio
+
+
+def ask_model_explain(client, model, question: str, result: dict, max_numbers=60, temperature=0.1, cache=True):
+    if not client:
+        return None, "Cliente IA não disponível."
+    try:
+        messages, payload = _montar_pedido(question, result, max_numbers)
+    except Exception as e:
+        return None, f"Erro ao chamar o modelo: {e}"
+    return _chamar(client, model, question, messages, payload, temperature, cache)
+
+
+def ask_model_explain_stream(
+    client, model, question: str, result: dict, max_numbers=60, temperature=0.1, cache=True, latencia=None
+):
+    """Versão em fluxo de ask_model_explain: gera o texto token a token (para st.write_stream).
+
+    Erros (inclusive fila cheia e tempo esgotado no despacho) são propagados como exceção;
+    `latencia` (Latencia) é preenchida durante a geração.
+    """
+    if not client:
+        raise RuntimeError("Cliente IA não disponível.")
+    latencia = latencia if latencia is not None else Latencia()
+    inicio = time.monotonic()
+    messages, payload = _montar_pedido(question, result, max_numbers)
+    latencia.tokens_prompt = tokens_prompt(question, result, max_numbers)
+    yield from _chamar_em_fluxo(client, model, question, messages, payload, temperature, cache, latencia, inicio)
+
+
+def _montar_pedido_fallback(question: str, trechos):
+    """Mensagens do chat com os fatos recuperados do índice (o texto dos fatos entra na chave do cache)."""
+    contexto = codificar_trechos(trechos)
+    content = (
+        f"Pergunta do usuário: {question}\n"
+        f"Fatos do conjunto de dados relevantes para a pergunta (use apenas estes):\n{contexto}"
+    )
+    messages = [
+        {"role": "system", "content": default_system_prompt()},
+        {"role": "user", "content": content},
+    ]
+    return messages, contexto
+
+
+def ask_model_fallback(
+    client, model, question: str, conjunto, max_numbers=60, stream=False, latencia=None, temperature=0.1, cache=True
+):
+    """Quando a pergunta não é mapeada, tenta responder SOMENTE com os fatos do conjunto relevantes para ela.
+
+    Os fatos saem do índice BM25 da versão dos dados (recuperacao.obter_indice): os mais relevantes
+    que cabem no mesmo orçamento de contexto das explicações (max_numbers × TOKENS_POR_NUMERO).
+    Com stream=True devolve (gerador de texto, None) no lugar de (texto, None).
+    """
+    if not client:
+        return None, "Cliente IA não disponível."
+    inicio = time.monotonic()
+    try:
+        trechos = obter_indice(conjunto).selecionar(question, max_tokens=max_numbers * TOKENS_POR_NUMERO)
+    except Exception as e:
+        return None, f"Erro ao montar o contexto: {e}"
+    if not trechos:
+        return None, "Nenhum fato do conjunto para enviar."
+    messages, payload = _montar_pedido_fallback(question, trechos)
+    if stream:
+        latencia = latencia if latencia is not None else Latencia()
+        return _chamar_em_fluxo(client, model, question, messages, payload, temperature, cache, latencia, inicio), None
+    return _chamar(client, model, question, messages, payload, temperature, cache)
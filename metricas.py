@@ -0,0 +1,139 @@
+# metricas.py
+"""Núcleo de métricas dos dois apps: KPIs do cabeçalho e respostas fixas saem dos mesmos agregados.
+
+Os agregados (incremental.Agregados) são calculados numa passada fundida: uma sobre os pedidos, com a
+máscara de faturados montada uma vez e todas as somas e contagens juntas, e uma sobre os itens. Ficam
+memorizados por versão dos dados, na memória do processo e em data/.cache/agregados.json (que
+incremental.py mantém lote a lote). Todo número exibido por app.py e app_classico.py vem daqui; ticket
+e desconto médios são sempre sobre os pedidos faturados.
+
+Uso (tempo da passada fundida x recálculo pelo motor):
+    python metricas.py --pasta data
+"""
+import argparse
+import math
+import threading
+import time
+from dataclasses import dataclass
+
+import pandas as pd
+
+from dados import PASTA_DADOS, obter_conjunto
+from incremental import Agregados, _gravar_agregados, _ler_agregados, comparar_agregados, recalcular_agregados
+from instrumentacao import etapa
+
+TOP_PADRAO = 5
+
+_agregados = {}
+_trava_agregados = threading.Lock()
+
+
+@dataclass(frozen=True)
+class Kpis:
+    total_pedidos: int
+    ticket_medio: float
+    pct_frete_gratis: float
+    desconto_medio: float
+
+
+# ------------------------------------------------------------------
+# Agregados: passada fundida, memorizada por versão
+# ------------------------------------------------------------------
+def passada_fundida(fatos, versao: str = None) -> Agregados:
+    """Todos os agregados numa passada por tabela. Fora da memória (DuckDB), pelas consultas do motor."""
+    if getattr(fatos, "pedidos", None) is None:
+        return recalcular_agregados(fatos, versao)
+    agregados = Agregados(versao=versao)
+    agregados.somar_pedidos(fatos.pedidos, fatos.pedidos["TipoCliente"])
+    agregados.somar_itens(fatos.itens)
+    return agregados
+
+
+def obter_agregados(conjunto) -> Agregados:
+    """Agregados da versão do conjunto: memória do processo, depois o arquivo em disco, por fim a passada fundida."""
+    with _trava_agregados:
+        atual = _agregados.get(conjunto.pasta)
+        if atual is not None and atual.versao == conjunto.versao:
+            return atual
+        atual = _ler_agregados(conjunto.pasta)
+        if atual is None or atual.versao != conjunto.versao:
+            with etapa("agregados:recalculo"):
+                atual = passada_fundida(conjunto.fatos, conjunto.versao)
+            _gravar_agregados(atual, conjunto.pasta)
+        _agregados[conjunto.pasta] = atual
+        return atual
+
+
+# ------------------------------------------------------------------
+# KPIs e respostas fixas (O(grupos): os números já vêm somados)
+# ------------------------------------------------------------------
+def kpis(conjunto) -> Kpis:
+    ag = obter_agregados(conjunto)
+    pct_frete = ag.frete_gratis / ag.total_pedidos * 100 if ag.total_pedidos else 0.0
+    return Kpis(ag.total_pedidos, ag.ticket_medio, pct_frete, ag.desconto_medio)
+
+
+def _contagem(contagens: dict, colunas) -> pd.DataFrame:
+    linhas = sorted(contagens.items(), key=lambda kv: (-kv[1], kv[0]))
+    return pd.DataFrame(linhas, columns=colunas)
+
+
+def top_produtos(agregados, fatos, n=TOP_PADRAO) -> pd.DataFrame:
+    linhas = sorted(agregados.quantidade_por_produto.items(), key=lambda kv: (-kv[1], kv[0]))[:n]
+    nomes = fatos.produtos["Produto"] if "Produto" in fatos.produtos.columns else pd.Series(dtype=object)
+    return pd.DataFrame(
+        {"Produto": [nomes.get(c) for c, _ in linhas], "QuantidadeVendidaItem": [q for _, q in linhas]}
+    )
+
+
+RESPOSTAS_AGREGADAS = {
+    "ticket_medio": lambda ag, fatos: {
+        "titulo": "Ticket médio (pedidos faturados)",
+        "valor": ag.ticket_medio,
+        "detalhe": {"soma_total": ag.soma_total_faturado, "num_pedidos_faturados": ag.pedidos_faturados},
+    },
+    "desconto_medio": lambda ag, fatos: {
+        "titulo": "Desconto médio (pedidos faturados)",
+        "valor": ag.desconto_medio,
+        "detalhe": {"soma_descontos": ag.soma_desconto_faturado, "num_pedidos_faturados": ag.pedidos_faturados},
+    },
+    "top_produtos": top_produtos,
+    "formas_pgto": lambda ag, fatos: _contagem(ag.por_forma_pagamento, ["Forma de Pagamento", "Total"]),
+    "frete_gratis": lambda ag, fatos: {"total_frete_gratis": ag.frete_gratis},
+    "status_pedidos": lambda ag, fatos: _contagem(ag.por_situacao, ["Situação", "Total"]),
+    "tipo_cliente": lambda ag, fatos: _contagem(ag.por_tipo_cliente, ["Tipo de Cliente", "Total de Pedidos"]),
+}
+
+
+def resposta(intencao: str, conjunto, n: int = TOP_PADRAO):
+    """Resposta fixa da intenção (mesmo formato de consultas.responder) a partir dos agregados da versão."""
+    agregados = obter_agregados(conjunto)
+    if intencao == "top_produtos":
+        return top_produtos(agregados, conjunto.fatos, n)
+    return RESPOSTAS_AGREGADAS[intencao](agregados, conjunto.fatos)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pasta", default=PASTA_DADOS)
+    parser.add_argument("--backend", choices=["pandas", "duckdb"])
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    conjunto = obter_conjunto(args.pasta, args.backend)
+    tempos = {}
+    for nome, calcular in (("passada fundida", passada_fundida), ("motor", recalcular_agregados)):
+        melhor = math.inf
+        for _ in range(args.repeticoes):
+            inicio = time.perf_counter()
+            resultado = calcular(conjunto.fatos, conjunto.versao)
+            melhor = min(melhor, time.perf_counter() - inicio)
+        tempos[nome] = (melhor, resultado)
+    for nome, (segundos, _) in tempos.items():
+        print(f"{nome:<16}{segundos * 1000:>10.1f} ms")
+    divergencias = comparar_agregados(tempos["passada fundida"][1], tempos["motor"][1])
+    if divergencias:
+        for campo, (fundida, motor) in divergencias.items():
+            print(f"❌ {campo}: passada fundida={fundida} | motor={motor}")
+        raise SystemExit(1)
+    print(f"✔️ Mesmos números ({tempos['motor'][1].total_pedidos:,} pedidos).")
@@ -0,0 +1,150 @@
+# motor.py
+"""Motor declarativo de métricas: métricas × dimensões × filtros, resolvido com um único groupby por tabela."""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from instrumentacao import etapa
+
+
+@dataclass(frozen=True)
+class Metrica:
+    rotulo: str
+    tabela: str  # "pedidos" ou "itens" (fatos.Fatos)
+    coluna: str = None  # None = contagem de linhas
+    agregacao: str = "size"  # mean | sum | count (não vazios) | size
+    somente_faturados: bool = False
+
+
+@dataclass(frozen=True)
+class Dimensao:
+    rotulo: str
+    colunas: dict  # tabela -> coluna de agrupamento
+    descricao: str = None  # coluna levada junto ao grupo (ex.: nome do produto ao agrupar pelo código)
+
+
+@dataclass(frozen=True)
+class Consulta:
+    metricas: tuple
+    dimensoes: tuple = ()
+    filtros: tuple = ()  # ((coluna, valor), ...) aplicados em todas as tabelas envolvidas
+    ordenar_por: str = None  # chave de métrica; padrão: a primeira, decrescente, quando há dimensões
+    limite: int = None
+
+
+METRICAS = {
+    "ticket_medio": Metrica("Ticket médio", "pedidos", "TotalPedido", "mean", somente_faturados=True),
+    "faturamento": Metrica("Faturamento", "pedidos", "TotalPedido", "sum", somente_faturados=True),
+    "desconto_medio": Metrica("Desconto médio", "pedidos", "ValorDesconto", "mean", somente_faturados=True),
+    "soma_descontos": Metrica("Soma de descontos", "pedidos", "ValorDesconto", "sum", somente_faturados=True),
+    "pedidos": Metrica("Total de pedidos", "pedidos"),
+    "pedidos_faturados": Metrica("Pedidos faturados", "pedidos", "is_faturado", "sum"),
+    # denominadores das médias (mean ignora vazios); usados pelos agregados incrementais
+    "faturados_com_total": Metrica("Faturados com total", "pedidos", "TotalPedido", "count", somente_faturados=True),
+    "faturados_com_desconto": Metrica(
+        "Faturados com desconto informado", "pedidos", "ValorDesconto", "count", somente_faturados=True
+    ),
+    "quantidade": Metrica("Quantidade vendida", "itens", "QuantidadeVendidaItem", "sum"),
+}
+
+DIMENSOES = {
+    "tipo_cliente": Dimensao("Tipo de Cliente", {"pedidos": "TipoCliente"}),
+    "forma_pagamento": Dimensao("Forma de Pagamento", {"pedidos": "FormaPagamento"}),
+    "situacao": Dimensao("Situação", {"pedidos": "SituacaoPedido"}),
+    "produto": Dimensao("Produto", {"itens": "CodigoProdutoVendido"}, descricao="Produto"),
+    "codigo_produto": Dimensao("Código do Produto", {"itens": "CodigoProdutoVendido"}),
+}
+
+
+def _agregar_tabela(df: pd.DataFrame, tabela: str, chaves_metricas, dimensoes, filtros) -> pd.DataFrame:
+    """Uma passada sobre `df`: todas as métricas da tabela saem do mesmo groupby."""
+    mascara = np.ones(len(df), dtype=bool)
+    for coluna, valor in filtros:
+        if coluna not in df.columns:
+            raise ValueError(f"Filtro '{coluna}' não existe na tabela de {tabela}.")
+        mascara &= (df[coluna] == valor).to_numpy(dtype=bool, na_value=False)
+
+    colunas, especificacao = {}, {}
+    for chave in chaves_metricas:
+        m = METRICAS[chave]
+        if m.coluna is None:
+            colunas.setdefault("__linha", np.ones(len(df), dtype=np.int8))
+            especificacao[chave] = ("__linha", "size")
+            continue
+        valores = df[m.coluna]
+        if m.somente_faturados:
+            valores = valores.where(df["is_faturado"])
+        colunas[chave] = valores
+        especificacao[chave] = (chave, m.agregacao)
+
+    grupos = []
+    for d in dimensoes:
+        dim = DIMENSOES[d]
+        if tabela not in dim.colunas:
+            raise ValueError(f"Dimensão '{d}' não existe na tabela de {tabela}.")
+        colunas[d] = df[dim.colunas[tabela]]
+        grupos.append(d)
+        if dim.descricao:
+            colunas[f"{d}__descricao"] = df[dim.descricao]
+            especificacao[f"{d}__descricao"] = (f"{d}__descricao", "first")
+
+    frame = pd.DataFrame(colunas, index=df.index)
+    if not mascara.all():
+        frame = frame[mascara]
+    if grupos:
+        return frame.groupby(grupos, observed=True).agg(**especificacao)
+    # sem dimensões: um único grupo, mantendo o mesmo caminho de agregação
+    unico = frame.groupby(np.zeros(len(frame), dtype=np.int8)).agg(**especificacao)
+    return unico.reindex([0]).fillna({c: 0 for c, (_, op) in especificacao.items() if op in ("size", "sum", "count")})
+
+
+def agregar(consulta: Consulta, fatos) -> pd.DataFrame:
+    """Só a varredura: métricas (chaves) indexadas pelas dimensões, sem ordenar nem rotular.
+
+    Backends fora da memória (motor_duckdb.FatosDuckDB) fazem a varredura por tabela em `agregar_tabela`
+    e informam o tamanho de cada tabela em `linhas` (linhas varridas, para a instrumentação).
+    """
+    por_tabela = {}
+    for chave in consulta.metricas:
+        por_tabela.setdefault(METRICAS[chave].tabela, []).append(chave)
+
+    agregar_tabela = getattr(fatos, "agregar_tabela", None)
+    partes = []
+    for tabela, chaves in por_tabela.items():
+        if agregar_tabela:
+            with etapa(f"motor:{tabela}", fatos.linhas[tabela]):
+                partes.append(agregar_tabela(tabela, chaves, consulta.dimensoes, consulta.filtros))
+        else:
+            df = getattr(fatos, tabela)
+            with etapa(f"motor:{tabela}", len(df)):
+                partes.append(_agregar_tabela(df, tabela, chaves, consulta.dimensoes, consulta.filtros))
+    return partes[0] if len(partes) == 1 else pd.concat(partes, axis=1, join="outer")
+
+
+def apresentar(agregado: pd.DataFrame, consulta: Consulta) -> pd.DataFrame:
+    """Ordenação, limite e rótulos sobre o resultado de `agregar` (pode conter métricas a mais)."""
+    resultado = agregado
+    if consulta.dimensoes:
+        chave_ordem = consulta.ordenar_por or consulta.metricas[0]
+        resultado = resultado.sort_values(chave_ordem, ascending=False, kind="stable")
+    if consulta.limite:
+        resultado = resultado.head(consulta.limite)
+
+    resultado = resultado.reset_index(drop=not consulta.dimensoes)
+    renomear = {chave: METRICAS[chave].rotulo for chave in consulta.metricas}
+    for d in consulta.dimensoes:
+        dim = DIMENSOES[d]
+        if dim.descricao:
+            # o rótulo exibido é a descrição (nome do produto), não o código de agrupamento
+            resultado = resultado.drop(columns=d)
+            renomear[f"{d}__descricao"] = dim.rotulo
+        else:
+            renomear[d] = dim.rotulo
+    colunas = [DIMENSOES[d].rotulo for d in consulta.dimensoes] + [METRICAS[c].rotulo for c in consulta.metricas]
+    return resultado.rename(columns=renomear)[colunas]
+
+
+def executar(consulta: Consulta, fatos) -> pd.DataFrame:
+    """Executa a consulta sobre a camada de fatos; métricas da mesma tabela compartilham a varredura."""
+    return apresentar(agregar(consulta, fatos), consulta)
@@ -0,0 +1,254 @@
+# motor_duckdb.py
+"""Backend fora da memória: as consultas do motor viram SQL no DuckDB sobre os arquivos Arrow do cache.
+
+Pedidos e itens não são carregados no pandas: o DuckDB lê os arquivos (base + lotes) via pyarrow.dataset,
+levando filtros e colunas até a leitura e agregando em fluxo. Só clientes e produtos (dimensões pequenas)
+ficam em memória. Ative com SKYONE_BACKEND=duckdb.
+
+Uso (paridade com o backend pandas):
+    python motor_duckdb.py --pasta data
+    python -m pytest -q tests/test_paridade.py   # os mesmos casos num conjunto pequeno de gerar_dados.py
+"""
+import argparse
+import threading
+import time
+
+import duckdb
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from dados import PASTA_DADOS, arquivos_tabela
+from fatos import COLUNAS_PRODUTO
+from motor import DIMENSOES, METRICAS
+
+FUNCOES_SQL = {"mean": "avg", "sum": "sum", "count": "count"}
+
+# Colunas que vêm das dimensões (mesmo enriquecimento de fatos.construir_fatos): tabela -> coluna -> junção.
+JUNCOES = {
+    "pedidos": {"TipoCliente": ("dim_clientes", "CodigoClientePedido", "CodigoCliente")},
+    "itens": {c: ("dim_produtos", "CodigoProdutoVendido", "CodigoProduto") for c in COLUNAS_PRODUTO},
+}
+
+
+def _q(nome: str) -> str:
+    return '"' + nome.replace('"', '""') + '"'
+
+
+def _esquema_unificado(esquemas) -> pa.Schema:
+    """Esquema da base, com inteiros alargados quando um lote precisou de um tipo maior."""
+    base = esquemas[0]
+    campos = []
+    for campo in base:
+        tipos = [e.field(campo.name).type for e in esquemas if campo.name in e.names]
+        if all(pa.types.is_integer(t) for t in tipos):
+            campo = campo.with_type(max(tipos, key=lambda t: t.bit_width))
+        campos.append(campo)
+    return pa.schema(campos)
+
+
+def _dataset(arquivos) -> ds.Dataset:
+    esquemas = [ds.dataset(a, format="ipc").schema for a in arquivos]
+    return ds.dataset(arquivos, format="ipc", schema=_esquema_unificado(esquemas))
+
+
+class FatosDuckDB:
+    """Mesma interface de consulta de fatos.Fatos (motor.executar), com pedidos e itens no disco."""
+
+    def __init__(self, pasta: str, clientes: pd.DataFrame, produtos: pd.DataFrame):
+        inicio = time.perf_counter()
+        self.clientes = clientes.drop_duplicates(subset="CodigoCliente").set_index("CodigoCliente")
+        self.produtos = produtos.drop_duplicates(subset="CodigoProduto").set_index("CodigoProduto")
+        self.datasets = {t: _dataset(arquivos_tabela(t, pasta)) for t in ("pedidos", "itens")}
+        self.linhas = {t: d.count_rows() for t, d in self.datasets.items()}  # linhas varridas (instrumentação)
+        self._colunas = {
+            "pedidos": set(self.datasets["pedidos"].schema.names) | {"TipoCliente"},
+            "itens": set(self.datasets["itens"].schema.names) | (set(self.produtos.columns) & set(JUNCOES["itens"])),
+        }
+        # uma conexão por conjunto; consultas serializadas (a conexão não é thread-safe)
+        self._con = duckdb.connect()
+        self._trava = threading.Lock()
+        for tabela, dataset in self.datasets.items():
+            self._con.register(tabela, dataset)
+        self._con.register("dim_clientes", self.clientes[["TipoCliente"]].reset_index())
+        self._con.register("dim_produtos", self.produtos.reset_index())
+        self.segundos_construcao = time.perf_counter() - inicio
+
+    def _consultar(self, sql: str, parametros=()) -> pd.DataFrame:
+        with self._trava:
+            return self._con.execute(sql, list(parametros)).df()
+
+    def _origem(self, tabela: str, colunas) -> str:
+        """FROM da tabela, com LEFT JOIN só nas dimensões cujas colunas a consulta usa."""
+        juncoes = {}
+        for coluna in colunas:
+            if coluna in JUNCOES.get(tabela, {}):
+                juncoes.setdefault(JUNCOES[tabela][coluna][0], JUNCOES[tabela][coluna])
+        sql = f"{tabela} AS t"
+        for dim, chave, chave_dim in juncoes.values():
+            sql += f" LEFT JOIN {dim} ON t.{_q(chave)} = {dim}.{_q(chave_dim)}"
+        return sql
+
+    def _coluna(self, tabela: str, coluna: str) -> str:
+        if coluna in JUNCOES.get(tabela, {}):
+            return f"{JUNCOES[tabela][coluna][0]}.{_q(coluna)}"
+        return f"t.{_q(coluna)}"
+
+    def agregar_tabela(self, tabela, chaves_metricas, dimensoes, filtros) -> pd.DataFrame:
+        """Equivalente SQL de motor._agregar_tabela: mesmo índice (dimensões) e mesmas colunas."""
+        usadas, selecao, condicoes, parametros = set(), [], [], []
+        for coluna, valor in filtros:
+            if coluna not in self._colunas[tabela]:
+                raise ValueError(f"Filtro '{coluna}' não existe na tabela de {tabela}.")
+            usadas.add(coluna)
+            condicoes.append(f"{self._coluna(tabela, coluna)} = ?")
+            parametros.append(valor)
+
+        grupos = []
+        for d in dimensoes:
+            dim = DIMENSOES[d]
+            if tabela not in dim.colunas:
+                raise ValueError(f"Dimensão '{d}' não existe na tabela de {tabela}.")
+            usadas.add(dim.colunas[tabela])
+            expressao = self._coluna(tabela, dim.colunas[tabela])
+            selecao.append(f"{expressao} AS {_q(d)}")
+            condicoes.append(f"{expressao} IS NOT NULL")  # groupby do pandas descarta chaves vazias
+            grupos.append(str(len(selecao)))  # por posição: o apelido pode colidir com colunas das dimensões
+            if dim.descricao:
+                usadas.add(dim.descricao)
+                selecao.append(f"any_value({self._coluna(tabela, dim.descricao)}) AS {_q(d + '__descricao')}")
+
+        for chave in chaves_metricas:
+            m = METRICAS[chave]
+            if m.coluna is None:
+                selecao.append(f"count(*) AS {_q(chave)}")
+                continue
+            valor = self._coluna(tabela, m.coluna)
+            tipo = self.datasets[tabela].schema.field(m.coluna).type
+            if m.agregacao == "sum" and pa.types.is_boolean(tipo):
+                valor = f"CAST({valor} AS INTEGER)"
+            if m.somente_faturados:
+                valor = f"CASE WHEN t.is_faturado THEN {valor} END"
+            expressao = f"{FUNCOES_SQL[m.agregacao]}({valor})"
+            if m.agregacao == "sum":
+                expressao = f"coalesce({expressao}, 0)"  # soma vazia é 0, como no pandas
+                if pa.types.is_integer(tipo) or pa.types.is_boolean(tipo):
+                    expressao = f"CAST({expressao} AS BIGINT)"  # soma de inteiros continua inteira
+            selecao.append(f"{expressao} AS {_q(chave)}")
+
+        sql = f"SELECT {', '.join(selecao)} FROM {self._origem(tabela, usadas)}"
+        if condicoes:
+            sql += " WHERE " + " AND ".join(condicoes)
+        if grupos:
+            # ordem das chaves igual à do groupby, para empates saírem na mesma ordem
+            sql += f" GROUP BY {', '.join(grupos)} ORDER BY {', '.join(grupos)}"
+        resultado = self._consultar(sql, parametros)
+        if grupos:
+            return resultado.set_index(list(dimensoes))
+        return resultado
+
+    def cubos_diarios(self, coluna_data: str, dimensoes) -> tuple:
+        """Cubos diários de cubos.py no SQL: (pedidos por dia × `dimensoes`, itens por dia × produto, pedidos sem data)."""
+        texto = f"CAST(t.{_q(coluna_data)} AS VARCHAR)"
+        dia = f"coalesce(TRY_CAST({texto} AS DATE), CAST(try_strptime({texto}, '%d/%m/%Y') AS DATE))"
+        chaves = ", ".join(f"{self._coluna('pedidos', c)} AS {_q(c)}" for c in dimensoes)
+        faturado = "CASE WHEN t.is_faturado THEN {} END"
+        pedidos = self._consultar(
+            f"""
+            SELECT {dia} AS data, {chaves},
+                   count(*) AS pedidos,
+                   CAST(coalesce(sum(CAST(t.is_faturado AS INTEGER)), 0) AS BIGINT) AS pedidos_faturados,
+                   count({faturado.format('t."TotalPedido"')}) AS faturados_com_total,
+                   coalesce(sum({faturado.format('t."TotalPedido"')}), 0) AS faturamento,
+                   count({faturado.format('t."ValorDesconto"')}) AS faturados_com_desconto,
+                   coalesce(sum({faturado.format('t."ValorDesconto"')}), 0) AS soma_descontos,
+                   CAST(coalesce(sum(CAST(t.frete_gratis AS INTEGER)), 0) AS BIGINT) AS frete_gratis
+            FROM {self._origem('pedidos', dimensoes)}
+            GROUP BY ALL ORDER BY ALL
+            """
+        )
+        sem_data = pedidos["data"].isna()
+        inteira = pa.types.is_integer(self.datasets["itens"].schema.field("QuantidadeVendidaItem").type)
+        soma_quantidade = f'CAST(sum(t."QuantidadeVendidaItem") AS {"BIGINT" if inteira else "DOUBLE"})'
+        itens = self._consultar(
+            f"""
+            WITH dias AS (SELECT t."CodigoPedido", any_value({dia}) AS data FROM pedidos AS t GROUP BY 1)
+            SELECT dias.data, t."CodigoProdutoVendido", {soma_quantidade} AS quantidade
+            FROM itens AS t JOIN dias ON t."CodigoPedidoItem" = dias."CodigoPedido"
+            WHERE dias.data IS NOT NULL AND t."CodigoProdutoVendido" IS NOT NULL
+            GROUP BY ALL ORDER BY ALL
+            """
+        )
+        pedidos_sem_data = int(pedidos.loc[sem_data, "pedidos"].sum())
+        pedidos = pedidos[~sem_data].reset_index(drop=True)
+        for cubo in (pedidos, itens):
+            cubo["data"] = pd.to_datetime(cubo["data"]).astype("datetime64[ns]")
+        return pedidos, itens, pedidos_sem_data
+
+    def amostra(self, tabela: str, n: int = 5) -> pd.DataFrame:
+        if tabela not in self.datasets:
+            return getattr(self, tabela).head(n).reset_index()
+        return self.datasets[tabela].head(n).to_pandas()
+
+    def materializar(self, tabela: str) -> pd.DataFrame:
+        """Tabela inteira em memória (exportação); evite em bases maiores que a RAM."""
+        if tabela not in self.datasets:
+            return getattr(self, tabela).reset_index()
+        return self.datasets[tabela].to_table().to_pandas()
+
+
+# ------------------------------------------------------------------
+# Paridade entre backends
+# ------------------------------------------------------------------
+def casos_paridade() -> dict:
+    """{nome: função(fatos)} das consultas comparadas entre os backends (respostas fixas e métrica × dimensão)."""
+    from consultas import RESPOSTAS_FIXAS, dataset_min_snapshot
+    from motor import Consulta, executar
+
+    casos = {f"resposta:{i}": (lambda f, i=i: RESPOSTAS_FIXAS[i](f)) for i in RESPOSTAS_FIXAS}
+    casos["snapshot"] = dataset_min_snapshot
+    for chave, metrica in METRICAS.items():
+        casos[f"metrica:{chave}"] = lambda f, c=chave: executar(Consulta((c,)), f)
+        for d, dim in DIMENSOES.items():
+            if metrica.tabela in dim.colunas:
+                casos[f"metrica:{chave}×{d}"] = lambda f, c=chave, d=d: executar(Consulta((c,), (d,)), f)
+    return casos
+
+
+def mesmas_celulas(a, b) -> bool:
+    """As duas respostas têm as mesmas colunas e os mesmos valores (números com tolerância)?"""
+    from incremental import _celulas, _mesmo_valor
+
+    ca, cb = _celulas(a), _celulas(b)
+    return len(ca) == len(cb) and all(_mesmo_valor(x, y) for x, y in zip(ca, cb))
+
+
+def verificar_paridade(pasta: str = PASTA_DADOS) -> dict:
+    """Roda as mesmas consultas nos dois backends; devolve {consulta: (pandas, duckdb)} das divergências."""
+    from dados import obter_conjunto
+    from incremental import comparar_agregados, recalcular_agregados
+
+    em_memoria = obter_conjunto(pasta, backend="pandas").fatos
+    em_disco = obter_conjunto(pasta, backend="duckdb").fatos
+
+    divergencias = {
+        f"agregados.{campo}": par
+        for campo, par in comparar_agregados(recalcular_agregados(em_memoria), recalcular_agregados(em_disco)).items()
+    }
+    for nome, caso in casos_paridade().items():
+        a, b = caso(em_memoria), caso(em_disco)
+        if not mesmas_celulas(a, b):
+            divergencias[nome] = (a, b)
+    return divergencias
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara as respostas dos backends pandas e duckdb.")
+    parser.add_argument("--pasta", default=PASTA_DADOS)
+    args = parser.parse_args()
+    divergencias = verificar_paridade(args.pasta)
+    if not divergencias:
+        print("✔️ Backends pandas e duckdb com os mesmos números.")
+    for nome, (em_memoria, em_disco) in divergencias.items():
+        print(f"❌ {nome}:\n  pandas={em_memoria}\n  duckdb={em_disco}")
+    raise SystemExit(1 if divergencias else 0)
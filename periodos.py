@@ -0,0 +1,185 @@
+# periodos.py
+"""Períodos nas perguntas: "este mês", "último trimestre", "de 01/03/2024 a 15/03/2024" -> intervalo de datas.
+
+A frase de período é procurada no texto sem acentos e em minúsculas, e `extrair` a tira do texto.
+Assim os números de datas ("últimos 30 dias", "2024") não são lidos como o N de "top N" e não
+passam pela correção de digitação. Expressões relativas ("este mês", "últimos 7 dias") são
+resolvidas contra `hoje`. O intervalo é fechado nas duas pontas; a semana começa na segunda-feira.
+"""
+import calendar
+import re
+import unicodedata
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+MESES = {
+    "janeiro": 1, "fevereiro": 2, "marco": 3, "abril": 4, "maio": 5, "junho": 6,
+    "julho": 7, "agosto": 8, "setembro": 9, "outubro": 10, "novembro": 11, "dezembro": 12,
+}
+# abreviações só valem com o ano ("mar/2024"): sozinhas são palavras comuns ("dez", "set", "mar")
+MESES_ABREVIADOS = {nome[:3]: numero for nome, numero in MESES.items()}
+
+ORDINAIS_TRIMESTRE = {"1": 1, "2": 2, "3": 3, "4": 4, "primeiro": 1, "segundo": 2, "terceiro": 3, "quarto": 4}
+QUANTIDADES = {"dois": 2, "duas": 2, "tres": 3, "quatro": 4, "cinco": 5, "seis": 6, "sete": 7, "dez": 10,
+               "doze": 12, "quinze": 15, "trinta": 30, "sessenta": 60, "noventa": 90}
+
+
+@dataclass(frozen=True)
+class Periodo:
+    inicio: date
+    fim: date  # inclusive
+
+    def parametro(self) -> tuple:
+        """Forma guardada nos parâmetros da interpretação (entra na chave do cache de respostas)."""
+        return self.inicio.isoformat(), self.fim.isoformat()
+
+    @classmethod
+    def de_parametro(cls, parametro) -> "Periodo":
+        inicio, fim = parametro
+        return cls(date.fromisoformat(inicio), date.fromisoformat(fim))
+
+    def descricao(self) -> str:
+        if self.inicio == self.fim:
+            return self.inicio.strftime("%d/%m/%Y")
+        return f"{self.inicio:%d/%m/%Y} a {self.fim:%d/%m/%Y}"
+
+
+# ------------------------------------------------------------------
+# Aritmética de calendário
+# ------------------------------------------------------------------
+def fim_do_mes(ano: int, mes: int) -> date:
+    return date(ano, mes, calendar.monthrange(ano, mes)[1])
+
+
+def somar_meses(dia: date, meses: int) -> date:
+    """`dia` deslocado em `meses`, com o dia limitado ao fim do mês (31/03 - 1 mês = 29/02)."""
+    indice = dia.year * 12 + dia.month - 1 + meses
+    ano, mes = divmod(indice, 12)
+    return date(ano, mes + 1, min(dia.day, calendar.monthrange(ano, mes + 1)[1]))
+
+
+def _unidade(unidade: str, hoje: date, deslocamento: int = 0) -> Periodo:
+    """A semana/mês/trimestre/ano que contém `hoje`, deslocado em `deslocamento` unidades (inteiro)."""
+    if unidade == "semana":
+        inicio = hoje - timedelta(days=hoje.weekday()) + timedelta(weeks=deslocamento)
+        return Periodo(inicio, inicio + timedelta(days=6))
+    if unidade == "ano":
+        return Periodo(date(hoje.year + deslocamento, 1, 1), date(hoje.year + deslocamento, 12, 31))
+    meses = 3 if unidade == "trimestre" else 1
+    primeiro = date(hoje.year, (hoje.month - 1) // meses * meses + 1, 1)
+    inicio = somar_meses(primeiro, deslocamento * meses)
+    return Periodo(inicio, somar_meses(inicio, meses) - timedelta(days=1))
+
+
+def _ate_hoje(periodo: Periodo, hoje: date) -> Periodo:
+    return Periodo(periodo.inicio, min(periodo.fim, hoje))
+
+
+def _trimestre(numero: int, ano: int) -> Periodo:
+    inicio = date(ano, 3 * (numero - 1) + 1, 1)
+    return Periodo(inicio, fim_do_mes(ano, inicio.month + 2))
+
+
+def _mes_mais_recente(mes: int, hoje: date) -> Periodo:
+    """Mês citado sem ano: a ocorrência mais recente que já começou ("em março", em fevereiro -> ano passado)."""
+    ano = hoje.year if mes <= hoje.month else hoje.year - 1
+    return Periodo(date(ano, mes, 1), fim_do_mes(ano, mes))
+
+
+# ------------------------------------------------------------------
+# Reconhecimento
+# ------------------------------------------------------------------
+_DATA = r"\d{1,2}/\d{1,2}/\d{4}|\d{4}-\d{1,2}-\d{1,2}"
+_UNIDADE = r"(semana|mes|trimestre|ano)"
+_ESTE = r"(?:este|esse|neste|nesse|deste|desse|esta|essa|nesta|nessa|desta|dessa)"
+_QUANTIDADE = r"(\d+|" + "|".join(QUANTIDADES) + ")"
+_MES = "|".join(MESES)
+_MES_ABREVIADO = "|".join(MESES_ABREVIADOS)
+
+
+def _data(texto: str) -> date:
+    if "/" in texto:
+        dia, mes, ano = (int(p) for p in texto.split("/"))
+    else:
+        ano, mes, dia = (int(p) for p in texto.split("-"))
+    return date(ano, mes, dia)
+
+
+def _intervalo(m, hoje):
+    inicio, fim = _data(m.group(1)), _data(m.group(2))
+    return Periodo(min(inicio, fim), max(inicio, fim))
+
+
+def _ultimos(m, hoje):
+    n = int(m.group(1)) if m.group(1).isdigit() else QUANTIDADES[m.group(1)]
+    unidade = m.group(2)
+    if unidade.startswith("dia"):
+        inicio = hoje - timedelta(days=n - 1)
+    elif unidade.startswith("semana"):
+        inicio = hoje - timedelta(weeks=n) + timedelta(days=1)
+    elif unidade.startswith("mes"):
+        inicio = somar_meses(hoje, -n) + timedelta(days=1)
+    else:
+        inicio = somar_meses(hoje, -12 * n) + timedelta(days=1)
+    return Periodo(inicio, hoje)
+
+
+def _mes_com_ano(m, hoje):
+    mes = MESES.get(m.group(1)) or MESES_ABREVIADOS[m.group(1)]
+    ano = int(m.group(2))
+    return Periodo(date(ano, mes, 1), fim_do_mes(ano, mes))
+
+
+def _trimestre_citado(m, hoje):
+    return _trimestre(ORDINAIS_TRIMESTRE[m.group(1)], int(m.group(2)) if m.group(2) else hoje.year)
+
+
+def _ano(m, hoje):
+    ano = int(m.group(1))
+    return Periodo(date(ano, 1, 1), date(ano, 12, 31))
+
+
+# (padrão, conversor), na ordem de tentativa: o primeiro que casar vale e sai do texto
+PADROES = [
+    (rf"(?:de |entre |desde )?({_DATA}) (?:a|ate|e) ({_DATA})", _intervalo),
+    (rf"desde ({_DATA})", lambda m, hoje: Periodo(min(_data(m.group(1)), hoje), hoje)),
+    (rf"(?:em |no dia |dia )?({_DATA})", lambda m, hoje: Periodo(_data(m.group(1)), _data(m.group(1)))),
+    (rf"(?:nos |nas )?(?:ultimos|ultimas) {_QUANTIDADE} (dias|semanas|meses|anos)", _ultimos),
+    (r"(?:de )?hoje", lambda m, hoje: Periodo(hoje, hoje)),
+    (r"(?:de )?ontem", lambda m, hoje: Periodo(hoje - timedelta(days=1), hoje - timedelta(days=1))),
+    (rf"{_ESTE} {_UNIDADE}", lambda m, hoje: _ate_hoje(_unidade(m.group(1), hoje), hoje)),
+    (rf"(?:no |na |do |da )?{_UNIDADE} (?:atual|corrente)", lambda m, hoje: _ate_hoje(_unidade(m.group(1), hoje), hoje)),
+    (rf"(?:no |na |do |da )?(?:ultimo|ultima) {_UNIDADE}", lambda m, hoje: _unidade(m.group(1), hoje, -1)),
+    (rf"(?:no |na |do |da )?{_UNIDADE} (?:passado|passada|anterior)", lambda m, hoje: _unidade(m.group(1), hoje, -1)),
+    (r"(?:no |do )?(1|2|3|4|primeiro|segundo|terceiro|quarto)o? trimestre(?: de| do ano de)? ?(\d{4})?", _trimestre_citado),
+    (rf"(?:em |de )?({_MES})(?: de|/| )? ?(\d{{4}})", _mes_com_ano),
+    (rf"(?:em |de )?({_MES_ABREVIADO})(?:/| de | |-)(\d{{4}})", _mes_com_ano),
+    (rf"(?:em |de |no mes de )?({_MES})", lambda m, hoje: _mes_mais_recente(MESES[m.group(1)], hoje)),
+    (r"(?:em |de |no ano de |durante )?((?:19|20)\d\d)", _ano),
+]
+_COMPILADOS = [(re.compile(rf"(?<![\w/-]){padrao}(?![\w/-])"), conversor) for padrao, conversor in PADROES]
+_ESPACOS = re.compile(r"\s+")
+# filtro barato no texto em minúsculas: sem nenhuma destas palavras (ou dígito), nenhum padrão casa
+_PISTAS = re.compile(r"\d|hoje|ontem|semana|m[eê]s|trimestre|ano|" + _MES.replace("marco", "mar[cç]o"))
+
+
+def _preparar(texto: str) -> str:
+    """Sem acentos, minúsculo, espaços simples; mantém / e - (datas)."""
+    sem_acento = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+    return _ESPACOS.sub(" ", re.sub(r"[^a-z0-9/\- ]+", " ", sem_acento.lower())).strip()
+
+
+def extrair(texto: str, hoje: date = None):
+    """(Periodo ou None, texto sem a frase de período). Datas impossíveis ("31/02/2024") são ignoradas."""
+    if not _PISTAS.search(texto.lower()):
+        return None, texto
+    hoje = hoje or date.today()
+    preparado = _preparar(texto)
+    for padrao, conversor in _COMPILADOS:
+        for m in padrao.finditer(preparado):
+            try:
+                periodo = conversor(m, hoje)
+            except ValueError:
+                continue
+            return periodo, preparado[: m.start()] + " " + preparado[m.end() :]
+    return None, texto
@@ -0,0 +1,287 @@
+# recuperacao.py
+"""Índice local de recuperação (BM25) para o fallback da IA: fatos do conjunto em frases curtas.
+
+Na carga, por versão dos dados, os números do conjunto viram trechos de texto: um com os totais,
+um por forma de pagamento, tipo de cliente, situação, produto e mês (os meses saem dos cubos de
+período; sem cubos, não há trechos de mês). Os trechos entram num índice BM25 em memória junto com
+os parágrafos de rag/prompt.txt. Uma pergunta não mapeada leva ao modelo só os trechos mais
+relevantes que cabem no orçamento de tokens, em vez do mesmo resumo genérico para toda pergunta.
+Nenhum serviço externo.
+
+Os pesos BM25 de cada (termo, trecho) são calculados na construção; a busca soma os pesos das
+listas dos termos da pergunta (numpy) e escolhe os k maiores.
+
+Uso (constrói o índice e mostra os trechos escolhidos para uma pergunta):
+    python recuperacao.py --pasta data "qual forma de pagamento tem o maior ticket?"
+"""
+import argparse
+import math
+import os
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from contexto_llm import estimar_tokens, formatar_valor
+from cubos import obter_cubos
+from dados import PASTA_DADOS, obter_conjunto
+from instrumentacao import etapa
+from intencoes import normalizar
+from metricas import obter_agregados
+from motor import Consulta, executar
+from periodos import MESES
+
+ARQUIVO_PROMPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rag", "prompt.txt")
+TOP_K = 8
+NO_RANKING = 3  # maiores e menores citados nos trechos de ranking (meses, produtos)
+K1, B = 1.5, 0.75
+
+PALAVRAS_VAZIAS = frozenset(
+    "a o as os de da do das dos e em no na nos nas um uma uns umas por para com sem que qual quais "
+    "quanto quanta quantos quantas como onde quando ao aos se me meu minha foi foram ser sao esta "
+    "estao tem teve ha muito muita entre sobre isso esse essa este".split()
+)
+# famílias de palavras do negócio: "vendemos"/"vendidas"/"vendas", "faturou"/"faturamento", ...
+_RAIZES = (("vend", "venda"), ("fatur", "fatura"), ("compr", "compra"), ("pag", "pagamento"), ("descont", "desconto"))
+# palavras curtas que os sufixos estragariam ("meses", "mais") e os comparativos dos rankings
+_PALAVRAS = {
+    "meses": "mes", "mais": "mais", "maior": "mais", "maiores": "mais", "melhor": "mais", "melhores": "mais",
+    "menos": "menos", "menor": "menos", "menores": "menos", "pior": "menos", "piores": "menos",
+}
+# plural -> singular, o suficiente para "formas"/"forma", "situações"/"situação", "valores"/"valor"
+_SUFIXOS = (("coes", "cao"), ("oes", "ao"), ("eses", "es"), ("ais", "al"), ("eis", "el"), ("res", "r"), ("zes", "z"), ("s", ""))
+_NOMES_MESES = {numero: nome for nome, numero in MESES.items()}
+_NOMES_MESES[3] = "março"
+
+_indices = {}
+_trava_indices = threading.Lock()
+
+
+def _radical(palavra: str) -> str:
+    if palavra in _PALAVRAS:
+        return _PALAVRAS[palavra]
+    for prefixo, raiz in _RAIZES:
+        if palavra.startswith(prefixo):
+            return raiz
+    for sufixo, troca in _SUFIXOS:
+        if palavra.endswith(sufixo) and len(palavra) > len(sufixo) + 2:
+            palavra = palavra[: -len(sufixo)] + troca
+            break
+    # masculino e feminino juntos ("jurídicos"/"jurídica")
+    return palavra[:-1] if len(palavra) > 4 and palavra[-1] in "ao" else palavra
+
+
+def termos(texto: str) -> list:
+    """Palavras sem acento, em minúsculas, sem palavras vazias, no singular e sem gênero."""
+    return [_radical(p) for p in normalizar(texto) if p not in PALAVRAS_VAZIAS]
+
+
+@dataclass(frozen=True)
+class Trecho:
+    texto: str
+    fonte: str  # geral | forma_pagamento | tipo_cliente | situacao | produto | mes | ranking | prompt
+    tokens: int
+
+
+@dataclass(frozen=True)
+class IndiceBM25:
+    versao: str
+    trechos: list = field(repr=False)
+    listas: dict = field(repr=False)  # termo -> (posições dos trechos, pesos BM25)
+    segundos_construcao: float = 0.0
+
+    def buscar(self, pergunta: str, k: int = TOP_K) -> list:
+        """[(Trecho, pontuação)] dos k trechos com pontuação positiva, do maior para o menor."""
+        pontos = np.zeros(len(self.trechos))
+        for termo in set(termos(pergunta)):
+            lista = self.listas.get(termo)
+            if lista is not None:
+                pontos[lista[0]] += lista[1]
+        candidatos = np.flatnonzero(pontos > 0)
+        if len(candidatos) > k:
+            candidatos = candidatos[np.argpartition(-pontos[candidatos], k - 1)[:k]]
+        ordem = candidatos[np.argsort(-pontos[candidatos], kind="stable")]
+        return [(self.trechos[i], float(pontos[i])) for i in ordem]
+
+    def selecionar(self, pergunta: str, max_tokens: int, k: int = TOP_K) -> list:
+        """Trechos para o prompt: os mais relevantes que cabem em `max_tokens`; sem nenhum termo em comum, os totais."""
+        achados = [t for t, _ in self.buscar(pergunta, k)] or [t for t in self.trechos if t.fonte == "geral"]
+        escolhidos, usados = [], 0
+        for trecho in achados:
+            if usados + trecho.tokens <= max_tokens:
+                escolhidos.append(trecho)
+                usados += trecho.tokens
+        return escolhidos
+
+
+def codificar_trechos(trechos) -> str:
+    return "\n".join(f"- {t.texto}" for t in trechos)
+
+
+# ------------------------------------------------------------------
+# Trechos (fatos do conjunto)
+# ------------------------------------------------------------------
+def _reais(valor) -> str:
+    return f"R$ {formatar_valor(valor)}"
+
+
+def _pct(parte, todo) -> str:
+    return f"{parte / todo * 100:.1f}%" if todo else "0%"
+
+
+def _frase_pedidos(rotulo: str, linha, total_pedidos: int) -> str:
+    frase = f"{rotulo}: {int(linha['pedidos'])} pedidos ({_pct(linha['pedidos'], total_pedidos)} do total), "
+    if not linha["pedidos_faturados"]:
+        return frase + "nenhum faturado."
+    return frase + (
+        f"{int(linha['pedidos_faturados'])} faturados, faturamento {_reais(linha['faturamento'])}, "
+        f"ticket médio {_reais(linha['ticket_medio'])}, desconto médio {_reais(linha['desconto_medio'])}."
+    )
+
+
+def _ranking(mais: str, menos: str, itens) -> str:
+    """"<mais>: a, b, c; <menos>: x, y, z." de [(rótulo, valor)] já ordenados do maior para o menor."""
+    citar = lambda parte: ", ".join(f"{r} ({v})" for r, v in parte)  # noqa: E731
+    n = min(NO_RANKING, len(itens) // 2) or 1
+    return f"{mais}: {citar(itens[:n])}; {menos}: {citar(itens[::-1][:n])}."
+
+
+def _trechos_dimensoes(fatos, total_pedidos: int):
+    metricas = ("pedidos", "pedidos_faturados", "faturamento", "ticket_medio", "desconto_medio")
+    for dimensao, fonte, prefixo in (
+        ("forma_pagamento", "forma_pagamento", "Forma de pagamento"),
+        ("tipo_cliente", "tipo_cliente", "Tipo de cliente"),
+        ("situacao", "situacao", "Situação do pedido"),
+    ):
+        tabela = executar(Consulta(metricas, (dimensao,)), fatos)
+        tabela.columns = ["valor", *metricas]
+        for linha in tabela.to_dict("records"):
+            yield fonte, _frase_pedidos(f"{prefixo} {linha['valor']}", linha, total_pedidos)
+
+
+def _trechos_produtos(fatos):
+    quantidades = executar(Consulta(("quantidade",), ("codigo_produto",)), fatos)
+    nomes = fatos.produtos["Produto"] if "Produto" in fatos.produtos.columns else pd.Series(dtype=object)
+    total = len(quantidades)
+    ranking = []
+    for posicao, (codigo, quantidade) in enumerate(quantidades.itertuples(index=False, name=None), start=1):
+        nome = str(nomes.get(codigo, codigo))
+        rotulo = nome if nome.lower().startswith("produto") else f"Produto {nome}"
+        ranking.append((rotulo, f"{int(quantidade)} unidades"))
+        yield "produto", (
+            f"{rotulo} (código {codigo}): {int(quantidade)} unidades vendidas, "
+            f"posição {posicao} entre {total} produtos em quantidade."
+        )
+    if ranking:
+        yield "ranking", _ranking("Produtos mais vendidos", "menos vendidos", ranking)
+
+
+def _trechos_meses(cubos):
+    meses = cubos.pedidos_mes.groupby("data").sum(numeric_only=True)
+    itens = cubos.itens_mes.groupby("data")["quantidade"].sum()
+    ordem = meses["faturamento"].rank(ascending=False, method="min").astype(int)
+    ranking = meses["faturamento"].sort_values(ascending=False, kind="stable")
+    if len(ranking):
+        yield "ranking", _ranking(
+            "Meses com mais faturamento",
+            "com menos faturamento",
+            [(f"{_NOMES_MESES[d.month]} de {d.year}", _reais(v)) for d, v in ranking.items()],
+        )
+    for data, linha in meses.iterrows():
+        ticket = linha["faturamento"] / linha["faturados_com_total"] if linha["faturados_com_total"] else 0.0
+        yield "mes", (
+            f"Mês {_NOMES_MESES[data.month]} de {data.year} ({data:%m/%Y}): {int(linha['pedidos'])} pedidos, "
+            f"{int(linha['pedidos_faturados'])} faturados, faturamento {_reais(linha['faturamento'])} "
+            f"(posição {ordem[data]} entre {len(meses)} meses), ticket médio {_reais(ticket)}, "
+            f"{int(itens.get(data, 0))} unidades vendidas."
+        )
+
+
+def _trechos_prompt(caminho: str):
+    if not os.path.exists(caminho):
+        return
+    with open(caminho, encoding="utf-8") as f:
+        for paragrafo in f.read().split("\n\n"):
+            if paragrafo.strip():
+                yield "prompt", " ".join(paragrafo.split())
+
+
+def gerar_trechos(fatos, cubos, agregados, caminho_prompt: str = ARQUIVO_PROMPT) -> list:
+    """Frases com os números do conjunto (totais, dimensões, produtos, meses) e os parágrafos do prompt.
+
+    Os totais saem dos `agregados` da versão (metricas.obter_agregados), os meses dos `cubos`
+    (None quando faltam a data ou as chaves item -> pedido: sem trechos de mês).
+    """
+    ag = agregados
+    periodo = ""
+    if cubos is not None and cubos.primeiro_dia:
+        periodo = f" de {cubos.primeiro_dia:%d/%m/%Y} a {cubos.ultimo_dia:%d/%m/%Y}"
+    pares = [(
+        "geral",
+        f"Totais gerais do conjunto: {ag.total_pedidos} pedidos{periodo}, {ag.pedidos_faturados} faturados, "
+        f"faturamento {_reais(ag.soma_total_faturado)}, ticket médio {_reais(ag.ticket_medio)}, "
+        f"desconto médio {_reais(ag.desconto_medio)}, frete grátis em {_pct(ag.frete_gratis, ag.total_pedidos)} dos pedidos.",
+    )]
+    pares += _trechos_dimensoes(fatos, ag.total_pedidos)
+    if cubos is not None:
+        pares += _trechos_meses(cubos)
+    pares += _trechos_produtos(fatos)
+    pares += _trechos_prompt(caminho_prompt)
+    return [Trecho(texto, fonte, estimar_tokens(texto) + 2) for fonte, texto in pares]  # + "- " e a quebra de linha
+
+
+# ------------------------------------------------------------------
+# Índice
+# ------------------------------------------------------------------
+def construir_indice(trechos: list, versao: str = None) -> IndiceBM25:
+    inicio = time.perf_counter()
+    frequencias = [Counter(termos(t.texto)) for t in trechos]
+    tamanhos = np.array([sum(f.values()) for f in frequencias], dtype=float)
+    media = tamanhos.mean() if len(tamanhos) else 0.0
+    postagens = {}
+    for posicao, frequencia in enumerate(frequencias):
+        for termo, tf in frequencia.items():
+            postagens.setdefault(termo, ([], []))
+            postagens[termo][0].append(posicao)
+            postagens[termo][1].append(tf)
+    n = len(trechos)
+    normas = K1 * (1 - B + B * tamanhos / media) if media else tamanhos
+    listas = {}
+    for termo, (posicoes, tfs) in postagens.items():
+        posicoes, tfs = np.array(posicoes), np.array(tfs, dtype=float)
+        idf = math.log(1 + (n - len(posicoes) + 0.5) / (len(posicoes) + 0.5))
+        listas[termo] = (posicoes, idf * tfs * (K1 + 1) / (tfs + normas[posicoes]))
+    return IndiceBM25(versao, trechos, listas, time.perf_counter() - inicio)
+
+
+def obter_indice(conjunto) -> IndiceBM25:
+    """Índice da versão do conjunto, montado uma vez por versão (trechos + BM25)."""
+    with _trava_indices:
+        atual = _indices.get(conjunto.pasta)
+        if atual is None or atual.versao != conjunto.versao:
+            with etapa("indice:construcao"):
+                inicio = time.perf_counter()
+                trechos = gerar_trechos(conjunto.fatos, obter_cubos(conjunto), obter_agregados(conjunto))
+                atual = construir_indice(trechos, conjunto.versao)
+                atual = IndiceBM25(atual.versao, atual.trechos, atual.listas, time.perf_counter() - inicio)
+            _indices[conjunto.pasta] = atual
+        return atual
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("pergunta")
+    parser.add_argument("--pasta", default=PASTA_DADOS)
+    parser.add_argument("--backend", choices=["pandas", "duckdb"])
+    parser.add_argument("--max-tokens", type=int, default=180)
+    args = parser.parse_args()
+
+    indice = obter_indice(obter_conjunto(args.pasta, args.backend))
+    print(f"{len(indice.trechos)} trechos, {len(indice.listas)} termos, construído em {indice.segundos_construcao * 1000:.0f} ms")
+    for trecho, pontos in indice.buscar(args.pergunta):
+        print(f"{pontos:6.2f}  [{trecho.fonte}] {trecho.texto}")
+    escolhidos = indice.selecionar(args.pergunta, args.max_tokens)
+    print(f"\nContexto ({sum(t.tokens for t in escolhidos)} tokens):\n{codificar_trechos(escolhidos)}")
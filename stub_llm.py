@@ -0,0 +1,135 @@
+# stub_llm.py
+"""Servidor local que imita /v1/chat/completions (API compatível com OpenAI) para testes offline.
+
+Uso:
+    python stub_llm.py --porta 8765 --atraso 0.5
+    OPENROUTER_BASE_URL=http://127.0.0.1:8765/v1 OPENROUTER_API_KEY=stub streamlit run app.py
+"""
+import argparse
+import json
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # cabeçalho e corpo em escritas separadas: sem NODELAY o ACK atrasado soma ~40 ms por resposta
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        corpo = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        servidor = self.server
+        with servidor.trava:
+            servidor.chamadas += 1
+            servidor.simultaneas += 1
+            servidor.max_simultaneas = max(servidor.max_simultaneas, servidor.simultaneas)
+        try:
+            self._responder_pergunta(corpo)
+        finally:
+            with servidor.trava:
+                servidor.simultaneas -= 1
+
+    def _responder_pergunta(self, corpo: dict):
+        servidor = self.server
+        # prompts maiores demoram mais a ser lidos pelo modelo (~4 caracteres por token)
+        tokens_prompt = sum(len(m.get("content") or "") for m in corpo.get("messages", [])) / 4
+        time.sleep(servidor.atraso + servidor.atraso_por_mil_tokens * tokens_prompt / 1000)
+        pergunta = corpo.get("messages", [{}])[-1].get("content", "")
+        texto = f"[stub] Resposta para: {pergunta.splitlines()[0] if pergunta else ''}"
+        if corpo.get("stream"):
+            self._responder_em_fluxo(corpo, texto)
+            return
+        resposta = {
+            "id": f"stub-{servidor.chamadas}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": corpo.get("model", "stub"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": texto}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(pergunta) // 4, "completion_tokens": len(texto) // 4},
+        }
+        dados = json.dumps(resposta).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _responder_em_fluxo(self, corpo: dict, texto: str):
+        # Server-sent events no formato de chat.completion.chunk, uma palavra por evento.
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i, palavra in enumerate(texto.split(" ")):
+            evento = {
+                "id": f"stub-{self.server.chamadas}",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": corpo.get("model", "stub"),
+                "choices": [{"index": 0, "delta": {"content": palavra if i == 0 else " " + palavra}}],
+            }
+            self._enviar_pedaco(f"data: {json.dumps(evento)}\n\n")
+            time.sleep(self.server.atraso_token)
+        self._enviar_pedaco("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _enviar_pedaco(self, texto: str):
+        dados = texto.encode("utf-8")
+        self.wfile.write(f"{len(dados):X}\r\n".encode() + dados + b"\r\n")
+        self.wfile.flush()
+
+
+class _Servidor(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # clientes descartados fecham conexões keep-alive ociosas; não é erro do stub
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def iniciar_stub(porta: int = 0, atraso: float = 0.0, atraso_token: float = 0.0, atraso_por_mil_tokens: float = 0.0):
+    """Sobe o stub numa thread daemon; devolve (servidor, base_url).
+
+    `servidor.chamadas` conta requisições e `servidor.max_simultaneas` guarda o pico de requisições
+    atendidas ao mesmo tempo. `atraso` simula o tempo até a primeira resposta, somado a
+    `atraso_por_mil_tokens` por mil tokens do prompt; `atraso_token`, o intervalo entre pedaços em fluxo.
+    """
+    servidor = _Servidor(("127.0.0.1", porta), _Handler)
+    servidor.chamadas = 0
+    servidor.simultaneas = 0
+    servidor.max_simultaneas = 0
+    servidor.atraso = atraso
+    servidor.atraso_token = atraso_token
+    servidor.atraso_por_mil_tokens = atraso_por_mil_tokens
+    servidor.trava = threading.Lock()
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f"http://127.0.0.1:{servidor.server_address[1]}/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--atraso", type=float, default=0.0, help="segundos de espera antes de responder")
+    parser.add_argument("--atraso-token", type=float, default=0.0, help="segundos entre pedaços no modo stream")
+    parser.add_argument("--atraso-prompt", type=float, default=0.0, help="segundos a mais por mil tokens do prompt")
+    args = parser.parse_args()
+    servidor, url = iniciar_stub(args.porta, args.atraso, args.atraso_token, args.atraso_prompt)
+    print(f"Stub ouvindo em {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        servidor.shutdown()
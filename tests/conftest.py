@@ -0,0 +1,20 @@
+# tests/conftest.py
+"""Fixtures comuns: a raiz do repositório no sys.path e um conjunto pequeno gerado por gerar_dados.py."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gerar_dados import gerar  # noqa: E402
+
+PEDIDOS_TESTE = 3_000
+
+
+@pytest.fixture(scope="session")
+def pasta_dados(tmp_path_factory):
+    """Pasta com os quatro CSVs sintéticos (com alguns TotalPedido inválidos); o cache .cache fica dentro dela."""
+    pasta = str(tmp_path_factory.mktemp("dados"))
+    gerar(PEDIDOS_TESTE, pasta, semente=7, taxa_invalidos=2e-3, verbose=False)
+    return pasta
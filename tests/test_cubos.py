@@ -0,0 +1,40 @@
+# tests/test_cubos.py
+"""Perguntas com período quando faltam colunas dos cubos: todo o histórico, com o aviso, nos dois backends."""
+import importlib.util
+import os
+
+import pytest
+
+from consultas import route_question
+from cubos import obter_cubos
+from dados import ARQUIVOS, obter_conjunto
+
+BACKENDS = [
+    "pandas",
+    pytest.param("duckdb", marks=pytest.mark.skipif(importlib.util.find_spec("duckdb") is None, reason="sem duckdb")),
+]
+
+
+def _sem_coluna(origem: str, destino: str, tabela: str, coluna: str) -> str:
+    """Cópia dos CSVs de `origem` com `coluna` renomeada no cabeçalho de `tabela`."""
+    os.makedirs(destino)
+    for nome, arquivo in ARQUIVOS.items():
+        with open(os.path.join(origem, arquivo), encoding="utf-8") as f:
+            cabecalho, resto = f.readline(), f.read()
+        if nome == tabela:
+            cabecalho = ",".join(f"{c}X" if c == coluna else c for c in cabecalho.rstrip("\n").split(",")) + "\n"
+        with open(os.path.join(destino, arquivo), "w", encoding="utf-8") as f:
+            f.write(cabecalho + resto)
+    return destino
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("tabela, coluna", [("pedidos", "DataPedido"), ("itens", "CodigoPedidoItem")])
+def test_periodo_sem_cubos(pasta_dados, tmp_path, backend, tabela, coluna):
+    conjunto = obter_conjunto(_sem_coluna(pasta_dados, str(tmp_path / "dados"), tabela, coluna), backend)
+    assert obter_cubos(conjunto) is None
+    intencao, resultado = route_question("ticket médio em 2024", conjunto, usar_cache=False)
+    assert intencao == "ticket_medio"
+    assert f"{tabela}.{coluna}" in resultado["periodo"]
+    _, quantidades = route_question("quantidade por produto em 2024", conjunto, usar_cache=False)
+    assert f"{tabela}.{coluna}" in quantidades.attrs["periodo"]
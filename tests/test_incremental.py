@@ -0,0 +1,55 @@
+# tests/test_incremental.py
+"""Lotes anexados: os agregados incrementais batem com o recálculo completo em qualquer ordem de chegada."""
+import shutil
+
+import pandas as pd
+import pytest
+
+from dados import ARQUIVOS
+from incremental import anexar_lotes, verificar_consistencia
+
+CLIENTE_NOVO = 99999
+
+
+@pytest.fixture
+def pasta(pasta_dados, tmp_path):
+    """Cópia dos CSVs gerados (os lotes e o cache de cada teste ficam separados)."""
+    destino = tmp_path / "dados"
+    destino.mkdir()
+    for arquivo in ARQUIVOS.values():
+        shutil.copy(f"{pasta_dados}/{arquivo}", destino)
+    return str(destino)
+
+
+def _pedidos_do_cliente(pasta: str, cliente: int, primeiro: int = 900_001) -> pd.DataFrame:
+    pedidos = pd.read_csv(f"{pasta}/{ARQUIVOS['pedidos']}").tail(5)
+    return pedidos.assign(CodigoPedido=range(primeiro, primeiro + len(pedidos)), CodigoClientePedido=cliente)
+
+
+def _cliente(pasta: str, codigo: int, tipo: str = None) -> pd.DataFrame:
+    cliente = pd.read_csv(f"{pasta}/{ARQUIVOS['clientes']}").head(1).assign(CodigoCliente=codigo)
+    return cliente.assign(TipoCliente=tipo) if tipo else cliente
+
+
+def test_clientes_depois_dos_pedidos(pasta):
+    anexar_lotes(pedidos=_pedidos_do_cliente(pasta, CLIENTE_NOVO), pasta=pasta)
+    assert verificar_consistencia(pasta) == {}
+    anexar_lotes(clientes=_cliente(pasta, CLIENTE_NOVO), pasta=pasta)
+    assert verificar_consistencia(pasta) == {}
+
+
+def test_clientes_e_pedidos_no_mesmo_lote(pasta):
+    anexar_lotes(pedidos=_pedidos_do_cliente(pasta, CLIENTE_NOVO), pasta=pasta)
+    anexar_lotes(
+        clientes=_cliente(pasta, CLIENTE_NOVO),
+        pedidos=_pedidos_do_cliente(pasta, CLIENTE_NOVO, primeiro=900_101),
+        pasta=pasta,
+    )
+    assert verificar_consistencia(pasta) == {}
+
+
+def test_cliente_existente_mantem_o_tipo(pasta):
+    # o primeiro registro de cada código vale: um lote com outro tipo não muda as contagens
+    anexar_lotes(clientes=_cliente(pasta, 1, tipo="Jurídica"), pasta=pasta)
+    anexar_lotes(clientes=_cliente(pasta, 1, tipo="Física"), pasta=pasta)
+    assert verificar_consistencia(pasta) == {}
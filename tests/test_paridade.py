@@ -0,0 +1,70 @@
+# tests/test_paridade.py
+"""Paridade entre os backends pandas e duckdb: as mesmas consultas, agregados, cubos e respostas do roteador."""
+import pytest
+
+pytest.importorskip("duckdb")
+
+from consultas import route_question  # noqa: E402
+from cubos import DIMENSOES_PEDIDOS, construir_cubos  # noqa: E402
+from dados import obter_conjunto  # noqa: E402
+from incremental import comparar_agregados, recalcular_agregados  # noqa: E402
+from motor_duckdb import casos_paridade, mesmas_celulas, verificar_paridade  # noqa: E402
+
+CASOS = casos_paridade()
+CUBOS = {  # cubo -> chaves das células (a ordem das linhas com a mesma data não importa)
+    "pedidos_dia": ("data", *DIMENSOES_PEDIDOS),
+    "itens_dia": ("data", "CodigoProdutoVendido"),
+    "pedidos_mes": ("data", *DIMENSOES_PEDIDOS),
+    "itens_mes": ("data", "CodigoProdutoVendido"),
+}
+PERGUNTAS = [
+    "ticket médio do mês passado",
+    "desconto médio no último trimestre",
+    "top 10 produtos este ano",
+    "faturamento por forma de pagamento nos últimos 90 dias",
+    "ticket médio por tipo de cliente em 2024",
+    "quantidade por produto de 15/02/2024 a 10/05/2024",
+    "status dos pedidos nos últimos 7 dias",
+    "quantos pedidos por status",
+    "tipo de cliente",
+    "frete grátis",
+]
+
+
+@pytest.fixture(scope="module")
+def fatos(pasta_dados):
+    """(pandas, duckdb) da mesma pasta."""
+    return obter_conjunto(pasta_dados, "pandas").fatos, obter_conjunto(pasta_dados, "duckdb").fatos
+
+
+@pytest.mark.parametrize("nome", list(CASOS))
+def test_consulta(fatos, nome):
+    em_memoria, em_disco = (CASOS[nome](f) for f in fatos)
+    assert mesmas_celulas(em_memoria, em_disco), f"pandas={em_memoria}\nduckdb={em_disco}"
+
+
+def test_agregados(fatos):
+    assert comparar_agregados(*(recalcular_agregados(f) for f in fatos)) == {}
+
+
+@pytest.mark.parametrize("cubo", CUBOS)
+def test_cubos(fatos, cubo):
+    em_memoria, em_disco = (construir_cubos(f, "teste") for f in fatos)
+    assert em_memoria.pedidos_sem_data == em_disco.pedidos_sem_data
+    a, b = getattr(em_memoria, cubo), getattr(em_disco, cubo)
+    assert list(a.columns) == list(b.columns)
+    a, b = (c.sort_values(list(CUBOS[cubo])).reset_index(drop=True) for c in (a, b))
+    assert mesmas_celulas(a, b)
+
+
+@pytest.mark.parametrize("pergunta", PERGUNTAS)
+def test_roteador(pasta_dados, pergunta):
+    # sem o cache de respostas: a chave é a versão dos dados, igual nos dois backends
+    (i, a), (j, b) = (route_question(pergunta, obter_conjunto(pasta_dados, backend), usar_cache=False)
+                      for backend in ("pandas", "duckdb"))
+    assert i == j != "nao_mapeado"
+    assert mesmas_celulas(a, b), f"pandas={a}\nduckdb={b}"
+
+
+def test_verificar_paridade(pasta_dados):
+    assert verificar_paridade(pasta_dados) == {}